@@ -0,0 +1,94 @@
+"""
+Requests/sec of an ``aiohttp.ClientSession`` against a local aiohttp test
+server, before and after ``AioHttpLogger`` is set up. ``--writer`` writes
+the log file through a ``BatchWriter`` instead of loguru's enqueue sink.
+
+    python benchmarks/bench_aiohttp.py --requests 3000 --body-size 2048
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+from fastapi_and_logging import BatchWriter, sink_manager
+from fastapi_and_logging.http_clients import AioHttpLogger
+
+
+async def start_server(body_size: int) -> tuple:
+    body = b"x" * body_size
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=body, content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/items", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/items"
+
+
+async def measure(url: str, requests: int) -> float:
+    async with aiohttp.ClientSession() as session:
+        start = time.perf_counter()
+        for _ in range(requests):
+            async with session.get(url) as response:
+                await response.read()
+        return time.perf_counter() - start
+
+
+async def run(
+    requests: int,
+    body_size: int,
+    log_path: str,
+    use_writer: bool,
+) -> dict:
+    runner, url = await start_server(body_size)
+    try:
+        await measure(url, 100)
+        results = {"no logging": await measure(url, requests)}
+        AioHttpLogger(
+            log_path=log_path,
+            writer=BatchWriter(log_path) if use_writer else None,
+        )
+        results["AioHttpLogger"] = await measure(url, requests)
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--body-size", type=int, default=2048)
+    parser.add_argument("--writer", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = asyncio.run(
+            run(
+                args.requests,
+                args.body_size,
+                os.path.join(directory, "apicall.log"),
+                args.writer,
+            )
+        )
+        sink_manager.remove_all()
+
+    baseline = results["no logging"]
+    for name, elapsed in results.items():
+        added = (elapsed - baseline) / args.requests * 1e6
+        print(
+            f"{name:<14} {args.requests / elapsed:>8,.0f} requests/sec"
+            f"  added {added:>7.1f}us/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Size, write speed and scan speed of incoming-log records in JSON lines and
+in the binary format (``BinarySerializer``). The scan reads every record
+back with ``fastapi_and_logging.binary.read_records``.
+
+    python benchmarks/bench_binary.py --records 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from bench_serializers import RECORD
+
+from fastapi_and_logging.binary import BinarySerializer, read_records
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.serializers import get_serializer
+
+
+def write(path: str, serializer, records: int) -> float:
+    dumps_line = serializer.dumps_line
+    start = time.perf_counter()
+    with open(path, "wb") as file:
+        file.write(b"".join(dumps_line(RECORD) for _ in range(records)))
+    return time.perf_counter() - start
+
+
+def scan(path: str) -> float:
+    start = time.perf_counter()
+    for _ in read_records(path):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    serializers = {
+        "json lines": get_serializer(),
+        "binary": BinarySerializer(LoggerNameEnum.INCOMING),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name, serializer in serializers.items():
+            path = os.path.join(directory, name.replace(" ", "_"))
+            written = write(path, serializer, args.records)
+            size = os.path.getsize(path)
+            scanned = scan(path)
+            print(
+                f"{name:<10} {size / args.records:>6.0f} bytes/record"
+                f"  write {args.records / written:>10,.0f} records/sec"
+                f"  scan {args.records / scanned:>10,.0f} records/sec"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measure the import time of the package entry points with
+``python -X importtime``. Each statement runs in a fresh interpreter
+``--repeat`` times; the median cumulative import time of the package and
+the heaviest third-party imports it triggered are printed.
+
+    python benchmarks/bench_import.py --repeat 5
+    python benchmarks/bench_import.py --statement "import fastapi_and_logging"
+"""
+import argparse
+import collections
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = (
+    "import fastapi_and_logging",
+    "from fastapi_and_logging import BatchWriter",
+    "from fastapi_and_logging.http_clients import HTTPXLogger",
+    "from fastapi_and_logging.http_clients import AioHttpLogger",
+    "from fastapi_and_logging import FastAPIIncomingLog",
+    "import fastapi_and_logging.__main__",
+)
+
+
+def run(statement: str) -> dict:
+    """
+    Cumulative import time in microseconds of every top-level package
+    imported by ``statement``.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.strip()
+        # Top-level entries are not indented.
+        if name == name.lstrip(" ") and "." not in name:
+            times[name] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument(
+        "--statement",
+        action="append",
+        help="statement to measure (default: every entry point)",
+    )
+    args = parser.parse_args()
+
+    for statement in args.statement or STATEMENTS:
+        runs = [run(statement) for _ in range(args.repeat)]
+        medians = collections.Counter(
+            {
+                name: statistics.median(times.get(name, 0) for times in runs)
+                for name in runs[0]
+            }
+        )
+        total = sum(medians.values()) / 1000
+        own = medians.get("fastapi_and_logging", 0) / 1000
+        heaviest = ", ".join(
+            f"{name} {value / 1000:.1f}ms"
+            for name, value in medians.most_common(args.top)
+            if name != "fastapi_and_logging"
+        )
+        print(f"{statement}")
+        print(f"  total {total:8.1f}ms  package {own:8.1f}ms  {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Requests/sec and mean added latency of incoming logging through the
+``LoggingRoute`` route class and through ``IncomingLogMiddleware``, against
+an app without incoming logging. The three apps are measured in turn for
+several rounds and the median round is reported, since single runs are
+noisy.
+
+    python benchmarks/bench_middleware.py --requests 3000 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from fastapi_and_logging import FastAPIIncomingLog, sink_manager
+
+
+def create_app(log_path: str = None, use_middleware: bool = False):
+    app = FastAPI()
+    if log_path is not None:
+        FastAPIIncomingLog(
+            app,
+            log_path=log_path,
+            use_middleware=use_middleware,
+        )
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id, "name": "item"}
+
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        start = time.perf_counter()
+        for index in range(requests):
+            await client.get(f"/items/{index}?q=search")
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "incoming.log")
+        # Both apps share the LoggingRoute configuration, so they are set
+        # up with the same options.
+        apps = {
+            "no logging": create_app(),
+            "route class": create_app(log_path, use_middleware=False),
+            "asgi middleware": create_app(log_path, use_middleware=True),
+        }
+        rounds = {name: [] for name in apps}
+        for _ in range(args.rounds):
+            for name, app in apps.items():
+                rounds[name].append(asyncio.run(measure(app, args.requests)))
+        sink_manager.remove_all()
+
+    results = {
+        name: statistics.median(times) for name, times in rounds.items()
+    }
+    baseline = results["no logging"]
+    for name, elapsed in results.items():
+        added = (elapsed - baseline) / args.requests * 1e6
+        print(
+            f"{name:<16} {args.requests / elapsed:>8,.0f} requests/sec"
+            f"  added {added:>7.1f}us/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Send incoming records through a ``NetworkWriter`` to a local
+``LogCollector`` and print the sustained records/sec and the writer stats.
+``--outage`` stops the collector for that many seconds in the middle of
+the run, so the records are spilled to disk and replayed when it comes
+back; the run fails if a record is missing.
+
+    python benchmarks/bench_network.py --records 200000
+    python benchmarks/bench_network.py --records 50000 --outage 2
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from fastapi_and_logging import (
+    LogCollector,
+    LogTypeEnum,
+    NetworkWriter,
+    sink_manager,
+)
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum
+from fastapi_and_logging.logging import get_incoming_logger, incoming_formatter
+
+RESPONSE = {"items": [{"id": index, "name": "item"} for index in range(20)]}
+
+
+def wait_for(collector: LogCollector, total: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while collector.total < total and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--compression-level", type=int, default=1)
+    parser.add_argument(
+        "--outage",
+        type=float,
+        default=0.0,
+        help="seconds the collector is down in the middle of the run",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        collector = LogCollector().start()
+        writer = NetworkWriter(
+            "127.0.0.1",
+            collector.port,
+            batch_size=args.batch_size,
+            flush_interval=0.05,
+            max_queue_size=args.records,
+            compression_level=args.compression_level,
+            retries=1,
+            retry_backoff=0.05,
+            reconnect_interval=0.2,
+            spill_path=os.path.join(directory, "spill.bin"),
+            max_spill_size=1024 * 1024 * 1024,
+        )
+        sink_manager.register(
+            LoggerNameEnum.INCOMING,
+            file_path=LogPathEnum.INCOMING,
+            log_type=LogTypeEnum.NETWORK,
+            writer=writer,
+            format=incoming_formatter,
+        )
+
+        outage = None
+        if args.outage:
+
+            def restart() -> None:
+                collector.stop()
+                time.sleep(args.outage)
+                collector.start()
+
+            outage = threading.Timer(0.2, restart)
+            outage.start()
+
+        start = time.perf_counter()
+        for index in range(args.records):
+            get_incoming_logger(
+                log_type=LogTypeEnum.NETWORK,
+                extra_data={"index": index, "response": RESPONSE},
+            )
+            if outage is not None and index % 1000 == 0:
+                # Keep logging through the outage instead of queueing
+                # everything before it starts.
+                time.sleep(0.001)
+        queued = time.perf_counter() - start
+        if outage is not None:
+            outage.join()
+        writer.stop()
+        wait_for(collector, args.records, timeout=30)
+        elapsed = time.perf_counter() - start
+        stats = writer.get_stats()
+        sink_manager.remove_all()
+        collector.stop()
+
+    print("stats", stats)
+    print(
+        f"received {collector.total} records in {collector.frames} frames, "
+        f"{collector.bytes_received / collector.frames / 1024:.1f} KiB/frame"
+    )
+    print(f"logging calls {args.records / queued:,.0f} records/sec")
+    print(f"delivered {collector.total / elapsed:,.0f} records/sec")
+    if collector.total < args.records - stats["dropped"] or stats["dropped"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
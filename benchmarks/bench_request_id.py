@@ -0,0 +1,52 @@
+"""
+Request IDs/sec of each ``RequestIdEnum`` strategy, and of reading the ID
+from an incoming ``X-Request-ID`` header.
+
+    python benchmarks/bench_request_id.py --ids 200000
+"""
+import argparse
+import time
+
+from fastapi_and_logging.enums import RequestIdEnum
+from fastapi_and_logging.request_id import (
+    get_header_request_id,
+    get_request_id_builder,
+)
+
+HEADERS = [
+    (b"host", b"api.example.com"),
+    (b"user-agent", b"python-httpx/0.27.2"),
+    (b"accept", b"*/*"),
+    (b"x-request-id", b"01J9ZQ3V5K8W2YQ7N4M6P0R1ST"),
+]
+
+
+def measure(build, ids: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ids):
+        build()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ids", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = {
+        strategy.value: measure(get_request_id_builder(strategy), args.ids)
+        for strategy in RequestIdEnum
+    }
+    results["x-request-id"] = measure(
+        lambda: get_header_request_id(HEADERS, b"x-request-id"), args.ids
+    )
+
+    for name, elapsed in results.items():
+        print(
+            f"{name:<13} {args.ids / elapsed:>12,.0f} ids/sec"
+            f"  {elapsed / args.ids * 1e9:>7.0f}ns/id"
+        )
+
+
+if __name__ == "__main__":
+    main()
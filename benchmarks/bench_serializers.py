@@ -0,0 +1,75 @@
+"""
+Records/sec for a typical incoming-log dict with each available serializer
+backend, compared with the previous ``json.dumps(..., default=str)`` call.
+
+    python benchmarks/bench_serializers.py --records 100000
+"""
+import argparse
+import json
+import time
+
+from fastapi_and_logging.enums import SerializerEnum
+from fastapi_and_logging.serializers import get_serializer
+
+RECORD = {
+    "request_id": "6d6503d2-5cd5-4298-905c-3b575c9691c6",
+    "endpoint": "read_item",
+    "path": "/items/1",
+    "status_code": 200,
+    "query": {"q": "search"},
+    "request": "",
+    "response": {"id": 1, "name": "item", "tags": ["a", "b", "c"]},
+    "headers": {
+        "host": "example.com",
+        "accept": "*/*",
+        "accept-encoding": "gzip, deflate",
+        "connection": "keep-alive",
+        "user-agent": "Mozilla/5.0 (X11; Linux x86_64) Chrome/120.0",
+    },
+    "request_time": 1760000000.123,
+    "response_time": 1760000000.125,
+    "duration": 2.12,
+    "browser": "Chrome:120.0",
+    "os": "Linux:",
+    "device": "Other",
+}
+
+
+def measure(dumps, records: int) -> float:
+    start = time.perf_counter()
+    for _ in range(records):
+        dumps(RECORD)
+    return records / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {
+        "json.dumps": measure(
+            lambda data: json.dumps(
+                data, default=str, ensure_ascii=False
+            ).encode("utf-8"),
+            args.records,
+        )
+    }
+    for backend in (
+        SerializerEnum.JSON,
+        SerializerEnum.ORJSON,
+        SerializerEnum.MSGSPEC,
+    ):
+        try:
+            serializer = get_serializer(backend)
+        except ImportError:
+            print(f"{backend:<12} not installed")
+            continue
+        results[str(backend)] = measure(serializer.dumps_line, args.records)
+
+    for name, records_per_sec in results.items():
+        print(f"{name:<12} {records_per_sec:>12,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main()
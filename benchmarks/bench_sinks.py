@@ -0,0 +1,70 @@
+"""
+Compare per-record throughput of re-adding the loguru sink on every call
+(the previous ``create_logger`` behaviour) with the persistent sink registry.
+
+    python benchmarks/bench_sinks.py --records 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from loguru import logger
+
+from fastapi_and_logging.enums import LoggerNameEnum, LogTypeEnum
+from fastapi_and_logging.logging import get_incoming_logger, sink_manager
+
+RECORD = {
+    "request_id": "6d6503d2-5cd5-4298-905c-3b575c9691c6",
+    "endpoint": "index",
+    "path": "/",
+    "status_code": 200,
+    "query": {},
+    "request": "",
+    "response": {"message": "ok"},
+}
+
+
+def re_add_sink_per_record(file_path: str, records: int) -> float:
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.remove()
+        logger.add(file_path, enqueue=True, format="{message}")
+        logger.bind(data=RECORD).info("Incoming Request")
+    logger.remove()
+    return time.perf_counter() - start
+
+
+def sink_registry(file_path: str, records: int) -> float:
+    sink_manager.register(
+        LoggerNameEnum.INCOMING,
+        file_path=file_path,
+        log_type=LogTypeEnum.FILE,
+        enqueue=True,
+    )
+    start = time.perf_counter()
+    for _ in range(records):
+        get_incoming_logger(file_path=file_path, extra_data=RECORD)
+    logger.complete()
+    elapsed = time.perf_counter() - start
+    sink_manager.remove_all()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, bench in (
+            ("re-add sink per record", re_add_sink_per_record),
+            ("sink registry", sink_registry),
+        ):
+            file_path = os.path.join(directory, f"{bench.__name__}.log")
+            elapsed = bench(file_path, args.records)
+            print(f"{name:<24} {args.records / elapsed:>12,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+End-to-end benchmark of the logging hot paths. A sample FastAPI app is
+driven in-process through httpx's ASGI transport (incoming and exception
+logging), and httpx and aiohttp clients call a local aiohttp mock server
+(API-call logging). Every configuration runs in a fresh process and
+reports requests/sec, p50/p99 latency and the latency added over the same
+workload without logging, the bytes written by the sink and the peak RSS.
+
+Sinks: ``file`` (loguru with enqueue), ``file-sync`` (loguru without
+enqueue), ``batch`` (``BatchWriter``), ``console`` (stderr, redirected to a
+file) and, for exceptions, ``aggregate`` (``ExceptionLogger`` with an
+aggregation window). ``none`` is the baseline.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --kinds incoming --body-sizes 256 \\
+        --compare results.json
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import typing
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+KINDS = ("incoming", "exception", "httpx", "aiohttp")
+SINKS = ("none", "file", "file-sync", "batch", "console")
+EXTRA_SINKS = {"exception": ("aggregate",)}
+LOGGER_NAMES = {
+    "incoming": "incoming",
+    "exception": "exception",
+    "httpx": "apicall",
+    "aiohttp": "apicall",
+}
+
+
+def get_percentile(values: typing.List[float], percentile: float) -> float:
+    index = min(len(values) - 1, int(len(values) * percentile))
+    return values[index]
+
+
+def setup_sink(kind: str, sink: str, log_path: str) -> dict:
+    """
+    Register the sink before the logger, so the logger's own registration
+    reuses it. Returns the logger keyword arguments.
+    """
+    from fastapi_and_logging import BatchWriter, LogTypeEnum, sink_manager
+    from fastapi_and_logging.logging import (
+        apicall_formatter,
+        exception_formatter,
+        incoming_formatter,
+    )
+
+    if sink == "console":
+        return {"log_path": log_path, "log_type": LogTypeEnum.CONSOLE}
+    if sink == "batch":
+        return {"log_path": log_path, "writer": BatchWriter(log_path)}
+    if sink == "file-sync":
+        sink_manager.register(
+            LOGGER_NAMES[kind],
+            file_path=log_path,
+            enqueue=False,
+            format={
+                "incoming": incoming_formatter,
+                "exception": exception_formatter,
+            }.get(kind, apicall_formatter),
+        )
+    if sink == "aggregate":
+        return {"log_path": log_path, "aggregate_window": 60}
+    return {"log_path": log_path}
+
+
+async def drive_app(app, requests: int, path: str, body: bytes) -> list:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://app.test"
+    ) as client:
+        return await drive(
+            lambda index: client.post(f"{path}/{index}", content=body),
+            requests,
+        )
+
+
+async def drive(send: typing.Callable, requests: int) -> list:
+    for index in range(min(100, requests)):
+        await send(index)
+    latencies = []
+    for index in range(requests):
+        start = time.perf_counter()
+        await send(index)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_app(config: dict, log_path: str) -> list:
+    from fastapi import FastAPI, Request, Response
+
+    kind, sink = config["kind"], config["sink"]
+    payload = b"x" * config["body_size"]
+    app = FastAPI()
+    if sink != "none":
+        options = setup_sink(kind, sink, log_path)
+        if kind == "incoming":
+            from fastapi_and_logging import FastAPIIncomingLog
+
+            FastAPIIncomingLog(app, **options)
+        else:
+            from fastapi_and_logging import ExceptionLogger
+
+            ExceptionLogger(app, **options)
+
+    @app.post("/items/{item_id}")
+    async def create_item(item_id: int, request: Request):
+        await request.body()
+        return Response(content=payload, media_type="text/plain")
+
+    @app.post("/errors/{item_id}")
+    async def create_error(item_id: int, request: Request):
+        await request.body()
+        raise ValueError("item failed")
+
+    path = "/items" if kind == "incoming" else "/errors"
+    return await drive_app(app, config["requests"], path, payload)
+
+
+async def start_server(body_size: int) -> tuple:
+    from aiohttp import web
+
+    body = b"x" * body_size
+
+    async def handler(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(body=body, content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_post("/items/{item_id}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/items"
+
+
+async def run_client(config: dict, log_path: str) -> list:
+    kind, sink = config["kind"], config["sink"]
+    payload = b"x" * config["body_size"]
+    runner, url = await start_server(config["body_size"])
+    try:
+        if kind == "httpx":
+            import httpx
+
+            if sink != "none":
+                from fastapi_and_logging.http_clients import HTTPXLogger
+
+                HTTPXLogger(
+                    sync_client=False, **setup_sink(kind, sink, log_path)
+                )
+            async with httpx.AsyncClient() as client:
+                return await drive(
+                    lambda index: client.post(
+                        f"{url}/{index}", content=payload
+                    ),
+                    config["requests"],
+                )
+
+        import aiohttp
+
+        if sink != "none":
+            from fastapi_and_logging.http_clients import AioHttpLogger
+
+            AioHttpLogger(**setup_sink(kind, sink, log_path))
+
+        async with aiohttp.ClientSession() as session:
+
+            async def send(index: int) -> None:
+                async with session.post(
+                    f"{url}/{index}", data=payload
+                ) as response:
+                    await response.read()
+
+            return await drive(send, config["requests"])
+    finally:
+        await runner.cleanup()
+
+
+def run_config(config: dict) -> dict:
+    """
+    Run one configuration; called in a fresh process.
+    """
+    from fastapi_and_logging import sink_manager
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, f"{config['kind']}.log")
+        stderr = None
+        if config["sink"] == "console":
+            stderr = os.dup(2)
+            console = os.open(
+                os.path.join(directory, "console.log"),
+                os.O_WRONLY | os.O_CREAT,
+            )
+            os.dup2(console, 2)
+            os.close(console)
+        try:
+            if config["kind"] in ("incoming", "exception"):
+                run = run_app
+            else:
+                run = run_client
+            start = time.perf_counter()
+            latencies = asyncio.run(run(config, log_path))
+            elapsed = time.perf_counter() - start
+            # Stopping the writer and removing the sinks waits for the
+            # queued records, so every record is on disk.
+            writer = sink_manager.get_writer(
+                LOGGER_NAMES[config["kind"]], log_path
+            )
+            if writer is not None:
+                writer.stop()
+            sink_manager.remove_all()
+            drained = time.perf_counter() - start
+        finally:
+            if stderr is not None:
+                sys.stderr.flush()
+                os.dup2(stderr, 2)
+                os.close(stderr)
+        bytes_written = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+
+    latencies.sort()
+    return {
+        **config,
+        "name": f"{config['kind']}/{config['sink']}/{config['body_size']}",
+        "requests_per_sec": len(latencies) / sum(latencies),
+        "p50_ms": get_percentile(latencies, 0.5) * 1000,
+        "p99_ms": get_percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "elapsed_sec": elapsed,
+        "drain_sec": drained - elapsed,
+        "bytes_written": bytes_written,
+        "peak_rss_bytes": (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            if resource is not None
+            else None
+        ),
+    }
+
+
+def run_isolated(config: dict) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=1, mp_context=context
+    ) as executor:
+        return executor.submit(run_config, config).result()
+
+
+def get_version() -> typing.Optional[str]:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # pragma: no cover
+        return None
+    try:
+        return version("fastapi-and-logging")
+    except PackageNotFoundError:
+        return None
+
+
+def compare(results: typing.List[dict], path: str) -> None:
+    with open(path) as file:
+        previous = {
+            result["name"]: result for result in json.load(file)["results"]
+        }
+    print("compared with", path, file=sys.stderr)
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        ratio = result["requests_per_sec"] / before["requests_per_sec"]
+        print(
+            f"  {result['name']:<28} {ratio:>6.2f}x requests/sec"
+            f"  p99 {before['p99_ms']:.3f} -> {result['p99_ms']:.3f}ms",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--body-sizes", default="256,16384")
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    parser.add_argument("--sinks", default=",".join(SINKS))
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    selected = args.sinks.split(",")
+    results = []
+    for kind in args.kinds.split(","):
+        # The baseline runs first; the added latency is relative to it.
+        sinks = ["none"]
+        sinks += [sink for sink in SINKS[1:] if sink in selected]
+        sinks += EXTRA_SINKS.get(kind, ())
+        for body_size in map(int, args.body_sizes.split(",")):
+            baseline = None
+            for sink in sinks:
+                result = run_isolated(
+                    {
+                        "kind": kind,
+                        "sink": sink,
+                        "body_size": body_size,
+                        "requests": args.requests,
+                    }
+                )
+                if baseline is None:
+                    baseline = result
+                result["added_p50_ms"] = result["p50_ms"] - baseline["p50_ms"]
+                result["added_p99_ms"] = result["p99_ms"] - baseline["p99_ms"]
+                results.append(result)
+                print(
+                    f"{result['name']:<28}"
+                    f" {result['requests_per_sec']:>8,.0f} requests/sec"
+                    f"  added p50 {result['added_p50_ms']:>7.3f}ms"
+                    f"  p99 {result['added_p99_ms']:>7.3f}ms"
+                    f"  {result['bytes_written']:>10,} bytes"
+                    f"  rss {(result['peak_rss_bytes'] or 0) >> 20}MiB",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "version": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.datetime.now().isoformat(),
+        "requests": args.requests,
+        "results": results,
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(data + "\n")
+    else:
+        print(data)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Requests/sec of an httpx client against a local mock transport with no
+logging, with the ``HTTPXClient`` event hooks and with the wrapping
+``LoggingTransport``.
+
+    python benchmarks/bench_transport.py --requests 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import httpx
+
+from fastapi_and_logging import sink_manager
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.http_clients.httpx import HTTPXClient
+from fastapi_and_logging.http_clients.transport import LoggingTransport
+from fastapi_and_logging.logging import apicall_formatter
+
+BODY = b'{"id": 1, "name": "item", "tags": ["a", "b", "c"]}'
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=BODY)
+
+
+def measure(client: httpx.Client, requests: int) -> float:
+    with client:
+        start = time.perf_counter()
+        for index in range(requests):
+            client.get(f"http://upstream.test/items/{index}")
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        hooks_path = os.path.join(directory, "hooks.log")
+        sink_manager.register(
+            LoggerNameEnum.APICALL,
+            file_path=hooks_path,
+            enqueue=True,
+            format=apicall_formatter,
+        )
+        HTTPXClient._log_path = hooks_path
+        results = {
+            "no logging": measure(
+                httpx.Client(transport=httpx.MockTransport(handler)),
+                args.requests,
+            ),
+            "client hooks": measure(
+                HTTPXClient(transport=httpx.MockTransport(handler)),
+                args.requests,
+            ),
+            "transport": measure(
+                httpx.Client(
+                    transport=LoggingTransport(
+                        httpx.MockTransport(handler),
+                        log_path=os.path.join(directory, "transport.log"),
+                    )
+                ),
+                args.requests,
+            ),
+        }
+        sink_manager.remove_all()
+
+    baseline = results["no logging"]
+    for name, elapsed in results.items():
+        added = (elapsed - baseline) / args.requests * 1e6
+        print(
+            f"{name:<13} {args.requests / elapsed:>8,.0f} requests/sec"
+            f"  added {added:>7.1f}us/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
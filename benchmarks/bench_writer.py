@@ -0,0 +1,88 @@
+"""
+Compare loguru's ``enqueue=True`` file sink with ``BatchWriter``: records/sec
+and per-call latency seen by the caller.
+
+    python benchmarks/bench_writer.py --records 20000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from loguru import logger
+
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.logging import (
+    get_incoming_logger,
+    incoming_formatter,
+    sink_manager,
+)
+from fastapi_and_logging.writer import BatchWriter
+
+RECORD = {
+    "request_id": "6d6503d2-5cd5-4298-905c-3b575c9691c6",
+    "endpoint": "index",
+    "path": "/",
+    "status_code": 200,
+    "query": {},
+    "request": "",
+    "response": {"message": "ok"},
+}
+
+
+def run(file_path: str, records: int, writer: BatchWriter = None) -> dict:
+    sink_manager.register(
+        LoggerNameEnum.INCOMING,
+        file_path=file_path,
+        writer=writer,
+        enqueue=True,
+        format=incoming_formatter,
+    )
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(records):
+        call_start = time.perf_counter()
+        get_incoming_logger(file_path=file_path, extra_data=RECORD)
+        latencies.append(time.perf_counter() - call_start)
+    logger.complete()
+    sink_manager.remove_all()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "records_per_sec": records / elapsed,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "loguru enqueue": run(
+                os.path.join(directory, "enqueue.log"), args.records
+            ),
+            "batch writer": run(
+                os.path.join(directory, "batch.log"),
+                args.records,
+                writer=BatchWriter(
+                    os.path.join(directory, "batch.log"),
+                    batch_size=args.batch_size,
+                ),
+            ),
+        }
+    for name, result in results.items():
+        print(
+            f"{name:<16} {result['records_per_sec']:>10,.0f} records/sec"
+            f"  p50 {result['p50_us']:>7.1f}us"
+            f"  p99 {result['p99_us']:>7.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
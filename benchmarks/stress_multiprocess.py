@@ -0,0 +1,97 @@
+"""
+Spawn several processes that write incoming records through
+``BatchWriter(shard_by_pid=True)``, merge the shards and check that every
+line is a complete JSON record and that no record is missing. Prints the
+total records/sec. ``--shared`` writes all processes to one file instead.
+
+    python benchmarks/stress_multiprocess.py --processes 8 --records 20000
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from fastapi_and_logging import BatchWriter, sink_manager
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.logging import get_incoming_logger, incoming_formatter
+from fastapi_and_logging.shards import merge_shards
+
+RESPONSE = {"items": [{"id": index, "name": "item"} for index in range(20)]}
+
+
+def worker(file_path: str, records: int, shard: bool) -> None:
+    sink_manager.register(
+        LoggerNameEnum.INCOMING,
+        file_path=file_path,
+        writer=BatchWriter(
+            file_path,
+            max_queue_size=records,
+            shard_by_pid=shard,
+        ),
+        format=incoming_formatter,
+    )
+    pid = os.getpid()
+    for index in range(records):
+        get_incoming_logger(
+            file_path=file_path,
+            extra_data={"pid": pid, "index": index, "response": RESPONSE},
+        )
+    sink_manager.remove_all()
+
+
+def check(file_path: str, processes: int, records: int) -> dict:
+    counts = collections.Counter()
+    torn = 0
+    with open(file_path, "rb") as file:
+        for line in file:
+            try:
+                counts[json.loads(line)["pid"]] += 1
+            except ValueError:
+                torn += 1
+    return {
+        "processes": len(counts),
+        "records": sum(counts.values()),
+        "missing": processes * records - sum(counts.values()),
+        "torn": torn,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--shared", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "incoming.log")
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(
+                target=worker,
+                args=(file_path, args.records, not args.shared),
+            )
+            for _ in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        if not args.shared:
+            print("merge", merge_shards(file_path, remove=True))
+        result = check(file_path, args.processes, args.records)
+
+    total = args.processes * args.records
+    print("check", result)
+    print(f"{total / elapsed:,.0f} records/sec over {elapsed:.2f}s")
+    if result["missing"] or result["torn"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
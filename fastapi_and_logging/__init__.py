@@ -1,11 +1,71 @@
-from .enums import LogTypeEnum
-from .fastapi import ExceptionLogger, FastAPIIncomingLog, LoggingRoute
-from .logging import create_logger
+import importlib
+import typing
+
+from .binary import BinarySerializer
+from .enums import (
+    CompressionEnum,
+    LogTypeEnum,
+    OverflowPolicyEnum,
+    SerializerEnum,
+)
+from .headers import HeaderFilter
+from .metrics import MetricsRegistry
+from .network import LogCollector, NetworkWriter
+from .rotation import RotationPolicy
+from .serializers import get_serializer
+from .writer import BatchWriter
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .fastapi import ExceptionLogger, FastAPIIncomingLog, LoggingRoute
+    from .http_clients.aiohttp import AioHttpLogger
+    from .http_clients.httpx import HTTPXLogger
+    from .logging import SinkManager, create_logger, sink_manager
+
+# Names imported on first access (PEP 562), so that importing the package
+# does not import fastapi, loguru, httpx or aiohttp until they are used.
+_LAZY_ATTRIBUTES = {
+    "FastAPIIncomingLog": ".fastapi",
+    "LoggingRoute": ".fastapi",
+    "ExceptionLogger": ".fastapi",
+    "HTTPXLogger": ".http_clients.httpx",
+    "AioHttpLogger": ".http_clients.aiohttp",
+    "create_logger": ".logging",
+    "SinkManager": ".logging",
+    "sink_manager": ".logging",
+}
 
 __all__ = [
     "FastAPIIncomingLog",
     "LoggingRoute",
     "LogTypeEnum",
+    "OverflowPolicyEnum",
+    "BatchWriter",
+    "SerializerEnum",
+    "get_serializer",
+    "BinarySerializer",
     "create_logger",
+    "SinkManager",
+    "sink_manager",
     "ExceptionLogger",
+    "HTTPXLogger",
+    "AioHttpLogger",
+    "HeaderFilter",
+    "RotationPolicy",
+    "MetricsRegistry",
+    "CompressionEnum",
+    "NetworkWriter",
+    "LogCollector",
 ]
+
+
+def __getattr__(name: str) -> typing.Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
@@ -0,0 +1,228 @@
+"""
+Read, filter and convert log files written by this package, in JSON lines
+or in the binary format of ``fastapi_and_logging.binary``::
+
+    python -m fastapi_and_logging cat incoming.bin --where status_code=500
+    python -m fastapi_and_logging convert incoming.log -o incoming.bin
+    python -m fastapi_and_logging convert incoming.bin -o incoming.log
+    python -m fastapi_and_logging query --request-id <id>
+    python -m fastapi_and_logging collect --port 9500 --dir logs
+
+See ``fastapi_and_logging.index`` for the ``index`` and ``query`` commands
+and ``fastapi_and_logging.network`` for ``collect``.
+"""
+import argparse
+import json
+import os
+import sys
+import typing
+
+from fastapi_and_logging.binary import (
+    BinarySerializer,
+    is_binary,
+    open_log,
+    read_records,
+)
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.index import (
+    LogIndex,
+    get_default_paths,
+    parse_time,
+)
+from fastapi_and_logging.index import query as query_logs
+from fastapi_and_logging.network import LogCollector
+from fastapi_and_logging.serializers import get_serializer
+
+
+def parse_where(where: typing.List[str]) -> typing.List[tuple]:
+    conditions = []
+    for condition in where:
+        key, separator, value = condition.partition("=")
+        if not separator:
+            raise SystemExit(f"expected KEY=VALUE, got {condition!r}")
+        conditions.append((key, value))
+    return conditions
+
+
+def matches(record: dict, conditions: typing.List[tuple]) -> bool:
+    for key, value in conditions:
+        field = record.get(key)
+        if field is None or str(field) != value:
+            return False
+    return True
+
+
+def filter_records(
+    paths: typing.List[str],
+    where: typing.List[str] = (),
+    limit: typing.Optional[int] = None,
+) -> typing.Iterator[dict]:
+    conditions = parse_where(where)
+    count = 0
+    for path in paths:
+        for record in read_records(path):
+            if conditions and not matches(record, conditions):
+                continue
+            yield record
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+def guess_logger_name(path: str) -> typing.Optional[LoggerNameEnum]:
+    name = os.path.basename(path).split(".", 1)[0]
+    return LoggerNameEnum(name) if name in set(LoggerNameEnum) else None
+
+
+def write_records(
+    records: typing.Iterable[dict],
+    output: typing.BinaryIO,
+    serializer,
+) -> int:
+    dumps_line = serializer.dumps_line
+    count = 0
+    for record in records:
+        output.write(dumps_line(record))
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m fastapi_and_logging",
+        description="Read, convert and query fastapi-and-logging log files.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cat = commands.add_parser("cat", help="print records as JSON lines")
+    cat.add_argument("paths", nargs="+", metavar="path")
+    cat.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="only records whose field equals the value (repeatable)",
+    )
+    cat.add_argument("--limit", type=int)
+
+    convert = commands.add_parser(
+        "convert", help="convert between JSON lines and binary"
+    )
+    convert.add_argument("path")
+    convert.add_argument("-o", "--output", required=True)
+    convert.add_argument(
+        "--to",
+        choices=("binary", "json"),
+        help="defaults to binary for JSON input and JSON for binary input",
+    )
+    convert.add_argument(
+        "--schema",
+        choices=[name.value for name in LoggerNameEnum],
+        help="binary schema, guessed from the file name by default",
+    )
+    convert.add_argument("--where", action="append", default=[])
+
+    index = commands.add_parser(
+        "index", help="build or update the sidecar index of log files"
+    )
+    index.add_argument("paths", nargs="+", metavar="path")
+
+    query = commands.add_parser(
+        "query",
+        help="incoming, API-call and exception records of a request ID or "
+        "time window",
+    )
+    query.add_argument("--request-id")
+    query.add_argument("--since", help="epoch seconds or ISO date/time")
+    query.add_argument("--until", help="epoch seconds or ISO date/time")
+    query.add_argument(
+        "--dir", default=".", help="directory of the default log files"
+    )
+    query.add_argument(
+        "--log",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="log file to query instead of the default one (repeatable)",
+    )
+
+    collect = commands.add_parser(
+        "collect",
+        help="receive records from NetworkWriter sinks into <topic>.log",
+    )
+    collect.add_argument("--host", default="127.0.0.1")
+    collect.add_argument("--port", type=int, default=9500)
+    collect.add_argument("--dir", default=".")
+
+    args = parser.parse_args()
+    if args.command == "collect":
+        collector = LogCollector(args.host, args.port, directory=args.dir)
+        print(
+            f"collecting on {args.host}:{args.port} into {args.dir}",
+            file=sys.stderr,
+        )
+        try:
+            collector.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.command == "index":
+        for path in args.paths:
+            log_index = LogIndex(path)
+            stats = log_index.update()
+            log_index.close()
+            print(json.dumps({"path": path, **stats}))
+        return
+
+    if args.command == "query":
+        if not (args.request_id or args.since or args.until):
+            parser.error("query needs --request-id, --since or --until")
+        paths = get_default_paths(args.dir)
+        paths.update(parse_where(args.log))
+        results = query_logs(
+            paths,
+            request_id=args.request_id,
+            since=parse_time(args.since) if args.since else None,
+            until=parse_time(args.until) if args.until else None,
+        )
+        dumps_line = get_serializer().dumps_line
+        for name, records in results.items():
+            for record in records:
+                sys.stdout.buffer.write(
+                    dumps_line({"log": str(name), "record": record})
+                )
+        sys.stdout.flush()
+        return
+
+    if args.command == "cat":
+        records = filter_records(args.paths, args.where, args.limit)
+        try:
+            write_records(records, sys.stdout.buffer, get_serializer())
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # e.g. piped into ``head``
+            sys.stderr.close()
+        return
+
+    to = args.to
+    if to is None:
+        with open_log(args.path) as file:
+            to = "json" if is_binary(file) else "binary"
+    if to == "binary":
+        serializer = BinarySerializer(
+            args.schema
+            or guess_logger_name(args.path)
+            or guess_logger_name(args.output)
+        )
+    else:
+        serializer = get_serializer()
+    with open(args.output, "ab") as output:
+        count = write_records(
+            filter_records([args.path], args.where), output, serializer
+        )
+    print(f"{count} records written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
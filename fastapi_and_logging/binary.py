@@ -0,0 +1,312 @@
+"""
+Compact binary log format.
+
+Every record is one frame: a 4-byte big-endian payload length, one byte
+for the payload encoding and the payload, an array
+``[schema_id, present, value, ..., extra]``. Only the values of the fields
+of the record's schema are stored, in schema order and without their
+keys; bit ``i`` of ``present`` is set when field ``i`` is in the record
+and any field outside the schema goes into the trailing ``extra`` map.
+Schema 0 has no fields, so any dict can be written.
+
+The payload is msgpack, which ``BinarySerializer`` requires (the
+``binary`` extra). A record msgpack can not encode, such as one with an
+integer over 64 bits, is written as a JSON array by the configured
+serializer instead; both payloads can be read back from the same file.
+"""
+import functools
+import gzip
+import io
+import json
+import struct
+import typing
+
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.serializers import BaseSerializer, get_serializer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Schema IDs are written to the files; a schema that changes gets a new ID
+# instead of changing the fields of an existing one.
+SCHEMAS: typing.Dict[int, typing.Tuple[str, ...]] = {
+    0: (),
+    1: (
+        "request_id",
+        "endpoint",
+        "path",
+        "status_code",
+        "query",
+        "request",
+        "request_size",
+        "response",
+        "response_size",
+        "time_to_first_byte",
+        "headers",
+        "request_time",
+        "response_time",
+        "duration",
+        "browser",
+        "os",
+        "device",
+    ),
+    2: (
+        "request_id",
+        "method",
+        "url",
+        "status_code",
+        "request_data",
+        "request_size",
+        "response_data",
+        "response_size",
+        "duration",
+        "connection_reused",
+        "timings",
+        "trace_request_ctx",
+        "headers",
+    ),
+    3: (
+        "exception",
+        "error_time",
+        "request_id",
+        "endpoint",
+        "path",
+        "status_code",
+        "error_message",
+    ),
+    4: (
+        "exception",
+        "error_time",
+        "request_id",
+        "endpoint",
+        "path",
+        "status_code",
+        "error_message",
+        "fingerprint",
+        "traceback",
+        "count",
+        "first_seen",
+        "last_seen",
+        "request_ids",
+    ),
+}
+SCHEMA_IDS = {
+    LoggerNameEnum.INCOMING: 1,
+    LoggerNameEnum.APICALL: 2,
+    LoggerNameEnum.EXCEPTION: 4,
+}
+FRAME_HEADER = struct.Struct(">IB")
+MSGPACK = 1
+JSON = 2
+
+MAX_LAYOUTS = 1024
+READ_SIZE = 1024 * 1024
+
+_loads = orjson.loads if orjson is not None else json.loads
+# Key layouts of recently written records; records of one logger almost
+# always have the same keys.
+_layouts: typing.Dict[tuple, tuple] = {}
+
+
+def get_layout(schema_id: int, keys: tuple) -> tuple:
+    """
+    ``(present, in_order, fields, extra_keys)`` for records with ``keys``.
+    ``in_order`` means the keys are exactly the present schema fields in
+    schema order, so the values can be taken as they are.
+    """
+    layout = _layouts.get((schema_id, keys))
+    if layout is None:
+        schema = SCHEMAS[schema_id]
+        present = 0
+        for index, field in enumerate(schema):
+            if field in keys:
+                present |= 1 << index
+        fields = tuple(field for field in schema if field in keys)
+        extra_keys = tuple(key for key in keys if key not in schema)
+        layout = (present, fields == keys, fields, extra_keys)
+        if len(_layouts) >= MAX_LAYOUTS:
+            _layouts.clear()
+        _layouts[(schema_id, keys)] = layout
+    return layout
+
+
+def pack_default(value: typing.Any) -> str:
+    # msgpack also calls ``default`` for integers over 64 bits; those
+    # records are written as JSON instead of turning the number into text.
+    if isinstance(value, int):
+        raise OverflowError(value)
+    return str(value)
+
+
+def encode_values(record: dict, schema_id: int) -> list:
+    present, in_order, fields, extra_keys = get_layout(
+        schema_id, tuple(record)
+    )
+    if in_order:
+        return [schema_id, present, *record.values(), {}]
+    return [
+        schema_id,
+        present,
+        *[record[field] for field in fields],
+        {key: record[key] for key in extra_keys},
+    ]
+
+
+def decode_payload(encoding: int, payload: bytes) -> dict:
+    if encoding == MSGPACK:
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+        values = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    else:
+        values = _loads(payload)
+    record = dict(zip(get_fields(values[0], values[1]), values[2:-1]))
+    if values[-1]:
+        record.update(values[-1])
+    return record
+
+
+@functools.lru_cache(maxsize=MAX_LAYOUTS)
+def get_fields(schema_id: int, present: int) -> typing.Tuple[str, ...]:
+    return tuple(
+        field
+        for index, field in enumerate(SCHEMAS[schema_id])
+        if present >> index & 1
+    )
+
+
+def iter_frames(
+    file: typing.BinaryIO,
+    position: int = 0,
+) -> typing.Iterator[typing.Tuple[int, int, bytes]]:
+    """
+    ``(offset, encoding, payload)`` of the frames in ``file``, read from its
+    current position, which is at ``position`` in the file. A last frame
+    cut short by a crashed writer is skipped.
+    """
+    header_size = FRAME_HEADER.size
+    unpack_header = FRAME_HEADER.unpack_from
+    buffer = b""
+    offset = 0
+    while True:
+        chunk = file.read(READ_SIZE)
+        if not chunk:
+            return
+        position += offset
+        buffer = buffer[offset:] + chunk
+        offset = 0
+        size = len(buffer)
+        while size - offset >= header_size:
+            length, encoding = unpack_header(buffer, offset)
+            start = offset + header_size
+            end = start + length
+            if end > size:
+                break
+            yield position + offset, encoding, buffer[start:end]
+            offset = end
+
+
+def decode_frame_at(data: bytes, offset: int) -> dict:
+    """
+    Record of the frame at ``offset`` of ``data`` (e.g. an mmap).
+    """
+    length, encoding = FRAME_HEADER.unpack_from(data, offset)
+    start = offset + FRAME_HEADER.size
+    return decode_payload(encoding, data[start : start + length])
+
+
+def open_log(path: str) -> typing.BinaryIO:
+    """
+    Open a log file for reading, including rotated ``.gz``/``.zst`` files.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard is not installed")
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        )
+    return open(path, "rb", buffering=1024 * 1024)
+
+
+def is_binary(file: typing.BinaryIO) -> bool:
+    """
+    JSON-lines records start with ``{``; a frame starts with its length,
+    whose first byte is below ``0x7b`` for frames under about 2 GB.
+    """
+    head = file.peek(1)[:1]
+    return head != b"" and head != b"{"
+
+
+def iter_json_lines(file: typing.BinaryIO) -> typing.Iterator[dict]:
+    for line in file:
+        if line.endswith(b"\n"):
+            yield _loads(line)
+
+
+def loads_line(line: bytes) -> dict:
+    return _loads(line)
+
+
+def read_records(path: str) -> typing.Iterator[dict]:
+    """
+    Records of a binary or JSON-lines log file.
+    """
+    with open_log(path) as file:
+        if is_binary(file):
+            for _, encoding, payload in iter_frames(file):
+                yield decode_payload(encoding, payload)
+        else:
+            yield from iter_json_lines(file)
+
+
+class BinarySerializer(BaseSerializer):
+    """
+    Writes records as binary frames. ``name`` picks the fixed schema of
+    that logger's records; without it every key is stored with the record.
+    ``serializer`` encodes the records msgpack can not. Use it as the
+    ``serializer`` of a ``BatchWriter``. Raises ``ImportError`` when
+    msgpack is not installed: a JSON payload is both larger and slower
+    than JSON lines.
+    """
+
+    def __init__(
+        self,
+        name: typing.Optional[LoggerNameEnum] = None,
+        serializer: typing.Optional[BaseSerializer] = None,
+    ) -> None:
+        if msgpack is None:
+            raise ImportError(
+                "msgpack is not installed; install fastapi-and-logging[binary]"
+            )
+        self.schema_id = SCHEMA_IDS.get(name, 0) if name else 0
+        self.serializer = serializer or get_serializer()
+        self._pack = functools.partial(
+            msgpack.packb, default=pack_default, use_bin_type=True
+        )
+
+    def dumps(self, data: typing.Any) -> bytes:
+        values = encode_values(data, self.schema_id)
+        try:
+            payload = self._pack(values)
+            return FRAME_HEADER.pack(len(payload), MSGPACK) + payload
+        except (OverflowError, TypeError, ValueError):
+            # e.g. integers over 64 bits
+            pass
+        payload = self.serializer.dumps(values)
+        return FRAME_HEADER.pack(len(payload), JSON) + payload
+
+    def dumps_line(self, data: typing.Any) -> bytes:
+        return self.dumps(data)
@@ -0,0 +1,37 @@
+class CappedBuffer:
+    """
+    Copies at most ``max_len`` bytes from the chunks it is given into a
+    preallocated buffer and counts every byte in ``total_length``.
+    """
+
+    __slots__ = ("max_len", "total_length", "_buffer", "_view", "_length")
+
+    def __init__(self, max_len: int) -> None:
+        self.max_len = max_len
+        self.total_length = 0
+        self._buffer = None
+        self._view = None
+        self._length = 0
+
+    @property
+    def body(self) -> bytes:
+        if self._view is None:
+            return b""
+        return bytes(self._view[: self._length])
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_length > self._length
+
+    def _copy(self, chunk: bytes) -> None:
+        self.total_length += len(chunk)
+        if self._length >= self.max_len:
+            return
+        if self._buffer is None:
+            self._buffer = bytearray(self.max_len)
+            self._view = memoryview(self._buffer)
+        size = min(len(chunk), self.max_len - self._length)
+        self._view[self._length : self._length + size] = memoryview(chunk)[
+            :size
+        ]
+        self._length += size
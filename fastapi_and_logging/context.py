@@ -0,0 +1,22 @@
+import typing
+from contextvars import ContextVar
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Set by the incoming logger for the task serving the request; every
+# request is served by its own task, so the value never leaks across
+# requests and is still set while a streaming response is sent.
+request_id_context: ContextVar[typing.Optional[str]] = ContextVar(
+    "fastapi_and_logging_request_id", default=None
+)
+
+
+def get_request_id() -> typing.Optional[str]:
+    """
+    Request ID of the incoming request being served, if any.
+    """
+    return request_id_context.get()
+
+
+def set_request_id(request_id: typing.Optional[str]):
+    return request_id_context.set(request_id)
@@ -4,6 +4,7 @@ from strenum import StrEnum
 class LogTypeEnum(StrEnum):
     FILE = "file"
     CONSOLE = "console"
+    NETWORK = "network"
 
 
 class LogPathEnum(StrEnum):
@@ -16,3 +17,29 @@ class LoggerNameEnum(StrEnum):
     INCOMING = "incoming"
     APICALL = "apicall"
     EXCEPTION = "exception"
+
+
+class OverflowPolicyEnum(StrEnum):
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+
+class SerializerEnum(StrEnum):
+    AUTO = "auto"
+    JSON = "json"
+    ORJSON = "orjson"
+    MSGSPEC = "msgspec"
+
+
+class RequestIdEnum(StrEnum):
+    UUID4 = "uuid4"
+    UUID7 = "uuid7"
+    ULID = "ulid"
+    COUNTER = "counter"
+
+
+class CompressionEnum(StrEnum):
+    AUTO = "auto"
+    GZIP = "gzip"
+    ZSTD = "zstd"
@@ -1,11 +1,25 @@
+from .capture import (
+    RequestBodyCapture,
+    ResponseBodyCapture,
+    ResponseSnapshot,
+)
 from .exception import ExceptionLogger, get_exception_logger_default_values
+from .fingerprint import (
+    ExceptionAggregator,
+    ExceptionFingerprinter,
+    exception_fingerprinter,
+)
 from .incoming import (
     FastAPIIncomingLog,
     get_request_data,
     get_response_data,
     log_builder,
 )
+from .middleware import IncomingLogMiddleware
+from .policy import LogPolicy, log_policy
 from .route import LoggingRoute
+from .snapshot import RequestSnapshot
+from .user_agent import UserAgentCache, get_user_agent_data
 
 __all__ = [
     "FastAPIIncomingLog",
@@ -15,4 +29,16 @@ __all__ = [
     "log_builder",
     "ExceptionLogger",
     "get_exception_logger_default_values",
+    "ExceptionAggregator",
+    "ExceptionFingerprinter",
+    "exception_fingerprinter",
+    "UserAgentCache",
+    "RequestSnapshot",
+    "RequestBodyCapture",
+    "ResponseBodyCapture",
+    "ResponseSnapshot",
+    "IncomingLogMiddleware",
+    "LogPolicy",
+    "log_policy",
+    "get_user_agent_data",
 ]
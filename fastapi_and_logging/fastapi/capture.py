@@ -0,0 +1,160 @@
+import os
+import time
+import typing
+
+from starlette.datastructures import Headers
+
+from fastapi_and_logging.buffer import CappedBuffer
+
+Message = typing.MutableMapping[str, typing.Any]
+Receive = typing.Callable[[], typing.Awaitable[Message]]
+Send = typing.Callable[[Message], typing.Awaitable[None]]
+
+
+class RequestBodyCapture(CappedBuffer):
+    """
+    Wraps an ASGI ``receive`` callable and copies at most ``max_len`` bytes
+    of the request body while the application reads it. The full body is
+    never held for logging purposes.
+    """
+
+    __slots__ = ("complete", "_receive")
+
+    def __init__(self, receive: Receive, max_len: int) -> None:
+        super().__init__(max_len)
+        self.complete = False
+        self._receive = receive
+
+    async def __call__(self) -> Message:
+        message = await self._receive()
+        if message["type"] == "http.request":
+            body = message.get("body", b"")
+            if body:
+                self._copy(body)
+            if not message.get("more_body", False):
+                self.complete = True
+        return message
+
+
+class ResponseCapture(CappedBuffer):
+    """
+    Copies at most ``max_len`` bytes of a response body from the ASGI
+    messages passed to ``capture`` and records the time to first byte.
+    """
+
+    __slots__ = ("start_time", "first_byte_time")
+
+    def __init__(self, max_len: int, start_time: float) -> None:
+        super().__init__(max_len)
+        self.start_time = start_time
+        self.first_byte_time = None
+
+    @property
+    def time_to_first_byte(self) -> typing.Optional[float]:
+        if self.first_byte_time is None:
+            return None
+        return (self.first_byte_time - self.start_time) * 1000
+
+    def capture(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.body":
+            body = message.get("body", b"")
+            if body:
+                if self.first_byte_time is None:
+                    self.first_byte_time = time.time()
+                self._copy(body)
+        elif message_type == "http.response.pathsend":
+            self.first_byte_time = time.time()
+            self.total_length = os.path.getsize(message["path"])
+
+
+class ResponseBodyCapture(ResponseCapture):
+    """
+    Wraps a response without a ``body`` (``StreamingResponse``,
+    ``FileResponse``) and copies at most ``max_len`` bytes of it as the
+    chunks are sent. ``on_complete`` is awaited with the capture and the
+    end time once the stream is finished or aborted.
+    """
+
+    __slots__ = ("response", "on_complete")
+
+    def __init__(
+        self,
+        response: typing.Any,
+        max_len: int,
+        start_time: float,
+        on_complete: typing.Callable[..., typing.Awaitable[None]],
+    ) -> None:
+        super().__init__(max_len, start_time)
+        self.response = response
+        self.on_complete = on_complete
+
+    @classmethod
+    def from_response(
+        cls,
+        response: typing.Any,
+        max_len: int,
+        start_time: float,
+    ) -> "ResponseBodyCapture":
+        """
+        Capture the head of an already rendered ``response.body``.
+        """
+        capture = cls(response, max_len, start_time, on_complete=None)
+        capture._copy(response.body)
+        return capture
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def background(self):
+        return self.response.background
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        async def capture_send(message: Message) -> None:
+            self.capture(message)
+            await send(message)
+
+        try:
+            await self.response(scope, receive, capture_send)
+        finally:
+            await self.on_complete(self, end_time=time.time())
+
+
+class ResponseSnapshot(ResponseCapture):
+    """
+    Response stand-in filled from the ASGI messages the application sends,
+    used by ``IncomingLogMiddleware``. ``headers`` is decoded lazily from
+    the raw header list of ``http.response.start``.
+    """
+
+    __slots__ = ("status_code", "raw_headers", "_headers")
+
+    def __init__(self, max_len: int, start_time: float) -> None:
+        super().__init__(max_len, start_time)
+        self.status_code = None
+        self.raw_headers = []
+        self._headers = None
+
+    @property
+    def headers(self) -> Headers:
+        if self._headers is None:
+            self._headers = Headers(raw=self.raw_headers)
+        return self._headers
+
+    def capture(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            self.raw_headers = message.get("headers", [])
+        else:
+            super().capture(message)
@@ -4,24 +4,44 @@ from typing import Callable
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 
-from fastapi_and_logging.enums import LogPathEnum, LogTypeEnum
-from fastapi_and_logging.logging import get_exception_logger
+from fastapi_and_logging.context import get_request_id
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.fastapi.fingerprint import (
+    ExceptionAggregator,
+    exception_fingerprinter,
+)
+from fastapi_and_logging.logging import (
+    exception_formatter,
+    get_exception_logger,
+    sink_manager,
+)
+from fastapi_and_logging.rotation import RotationPolicy
+from fastapi_and_logging.writer import BatchWriter
 
 
 def get_exception_logger_default_values(
     request: Request,
     status_code: int,
     exc: Exception,
+    include_traceback: bool = False,
 ) -> dict:
     scope = request.scope
-    return {
+    endpoint = getattr(scope.get("route"), "name", None)
+    fingerprint, traceback = exception_fingerprinter.fingerprint(exc, endpoint)
+    values = {
         "exception": exc.__class__.__name__,
         "error_time": str(datetime.datetime.now()),
-        "request_id": request.state.request_id,
-        "endpoint": scope.get("route").name,
+        "request_id": (
+            getattr(request.state, "request_id", None) or get_request_id()
+        ),
+        "endpoint": endpoint,
         "path": scope.get("path"),
         "status_code": status_code,
+        "fingerprint": fingerprint,
     }
+    if include_traceback:
+        values["traceback"] = traceback
+    return values
 
 
 class ExceptionLogger:
@@ -33,31 +53,66 @@ class ExceptionLogger:
         log_path: str = LogPathEnum.EXCEPTION,
         log_type: LogTypeEnum = LogTypeEnum.FILE,
         set_default_handlers: bool = True,
+        writer: BatchWriter = None,
+        rotation: RotationPolicy = None,
+        aggregate_window: float = None,
+        max_samples: int = 5,
     ):
         self.app = app
         self.log_path = log_path
         self.log_type = log_type
+        self.aggregator = (
+            ExceptionAggregator(
+                self.write,
+                window=aggregate_window,
+                max_samples=max_samples,
+            )
+            if aggregate_window
+            else None
+        )
+        sink_manager.register(
+            LoggerNameEnum.EXCEPTION,
+            file_path=log_path,
+            log_type=log_type,
+            writer=writer,
+            rotation=rotation,
+            enqueue=True,
+            format=exception_formatter,
+        )
 
         if set_default_handlers:
             self.add_default_exception_handlers()
 
+    def write(self, record: dict) -> None:
+        get_exception_logger(
+            file_path=self.log_path,
+            log_type=self.log_type,
+            extra_data=record,
+        )
+
+    def log_exception(self, record: dict) -> None:
+        """
+        Write ``record``, or count it if it repeats an exception already
+        written in the current aggregation window.
+        """
+        if self.aggregator is None or self.aggregator.add(record):
+            self.write(record)
+
     async def unhandled_exception_handler(
         self,
         request: Request,
         exc: Exception,
     ):
-        get_exception_logger(
-            file_path=self.log_path,
-            log_type=self.log_type,
-            extra_data={
-                "error_message": str(exc),
-                **get_exception_logger_default_values(
-                    request=request,
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    exc=exc,
-                ),
-            },
-        )
+        record = {
+            "error_message": str(exc),
+            **get_exception_logger_default_values(
+                request=request,
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                exc=exc,
+                include_traceback=True,
+            ),
+        }
+        self.log_exception(record)
         return JSONResponse(
             {
                 "detail": "An unexpected error occurred",
@@ -68,17 +123,15 @@ class ExceptionLogger:
     async def handle_http_exception(
         self, request: Request, exc: HTTPException
     ):
-        get_exception_logger(
-            file_path=self.log_path,
-            log_type=self.log_type,
-            extra_data={
+        self.log_exception(
+            {
                 "error_message": exc.detail,
                 **get_exception_logger_default_values(
                     request=request,
                     status_code=exc.status_code,
                     exc=exc,
                 ),
-            },
+            }
         )
         return JSONResponse(
             {"detail": exc.detail}, status_code=exc.status_code
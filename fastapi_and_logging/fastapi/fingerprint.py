@@ -0,0 +1,227 @@
+import atexit
+import hashlib
+import os
+import threading
+import traceback
+import typing
+
+
+class ExceptionFingerprinter:
+    """
+    Groups exceptions by type, endpoint and the functions on their
+    traceback. Frames are described by module and qualified function name
+    without line numbers, so a fingerprint survives unrelated edits of the
+    same file. Descriptions are cached per code object and fingerprints per
+    traceback shape, so a repeated exception costs one walk of its
+    traceback; the traceback text is formatted once per fingerprint and
+    cached with it.
+    """
+
+    max_cache_size = 1024
+
+    def __init__(self) -> None:
+        self._locations: typing.Dict[typing.Any, str] = {}
+        self._fingerprints: typing.Dict[tuple, typing.Tuple[str, str]] = {}
+        self._tracebacks: typing.Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(
+        self,
+        exc: BaseException,
+        endpoint: typing.Optional[str] = None,
+    ) -> typing.Tuple[str, str]:
+        """
+        Fingerprint of ``exc`` and the traceback of the first exception
+        seen with it. Both are read as one cache entry, so clearing the
+        cache from another thread can not separate them.
+        """
+        codes = []
+        tb = exc.__traceback__
+        while tb is not None:
+            codes.append(tb.tb_frame.f_code)
+            tb = tb.tb_next
+        key = (type(exc), endpoint, tuple(codes))
+        entry = self._fingerprints.get(key)
+        if entry is None:
+            entry = self._add(key, exc)
+        return entry
+
+    def get_traceback(self, fingerprint: str) -> typing.Optional[str]:
+        """
+        Traceback of the first exception seen with this fingerprint.
+        """
+        return self._tracebacks.get(fingerprint)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._locations.clear()
+            self._fingerprints.clear()
+            self._tracebacks.clear()
+
+    def _add(self, key: tuple, exc: BaseException) -> typing.Tuple[str, str]:
+        exc_type, endpoint, _ = key
+        frames = []
+        tb = exc.__traceback__
+        while tb is not None:
+            frames.append(self._describe(tb.tb_frame))
+            tb = tb.tb_next
+        fingerprint = hashlib.blake2b(
+            "|".join(
+                (
+                    f"{exc_type.__module__}.{exc_type.__qualname__}",
+                    str(endpoint),
+                    *frames,
+                )
+            ).encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        with self._lock:
+            if len(self._fingerprints) >= self.max_cache_size:
+                self._fingerprints.clear()
+                self._tracebacks.clear()
+            text = self._tracebacks.get(fingerprint)
+            if text is None:
+                text = "".join(traceback.format_tb(exc.__traceback__))
+                self._tracebacks[fingerprint] = text
+            entry = self._fingerprints[key] = (fingerprint, text)
+        return entry
+
+    def _describe(self, frame) -> str:
+        code = frame.f_code
+        description = self._locations.get(code)
+        if description is None:
+            module = frame.f_globals.get("__name__", code.co_filename)
+            qualname = getattr(code, "co_qualname", code.co_name)
+            description = f"{module}.{qualname}"
+            if len(self._locations) >= self.max_cache_size:
+                self._locations.clear()
+            self._locations[code] = description
+        return description
+
+
+exception_fingerprinter = ExceptionFingerprinter()
+
+
+class ExceptionAggregate:
+    """
+    Repeats of one fingerprint within the current window.
+    """
+
+    __slots__ = ("record", "count", "first_seen", "last_seen", "request_ids")
+
+    def __init__(self, record: dict) -> None:
+        self.record = record
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.request_ids: typing.List[str] = []
+
+    def add(self, record: dict, max_samples: int) -> None:
+        self.count += 1
+        self.last_seen = record.get("error_time")
+        if self.first_seen is None:
+            self.first_seen = self.last_seen
+        request_id = record.get("request_id")
+        if request_id is not None and len(self.request_ids) < max_samples:
+            self.request_ids.append(request_id)
+        self.record = record
+
+    def to_record(self) -> dict:
+        record = self.record
+        return {
+            "exception": record.get("exception"),
+            "error_time": self.first_seen,
+            "endpoint": record.get("endpoint"),
+            "path": record.get("path"),
+            "status_code": record.get("status_code"),
+            "error_message": record.get("error_message"),
+            "fingerprint": record.get("fingerprint"),
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "request_ids": self.request_ids,
+        }
+
+
+class ExceptionAggregator:
+    """
+    Collapses repeated exceptions. The first occurrence of a fingerprint
+    in a ``window`` of seconds is written as is, with its traceback; the
+    repeats are counted and written by a background thread at the end of
+    the window as one record with ``count``, ``first_seen``, ``last_seen``
+    and up to ``max_samples`` request IDs. At most ``max_groups``
+    fingerprints are tracked per window; others are written as is.
+    """
+
+    def __init__(
+        self,
+        emit: typing.Callable[[dict], None],
+        window: float = 60.0,
+        max_samples: int = 5,
+        max_groups: int = 1000,
+    ) -> None:
+        self.emit = emit
+        self.window = window
+        self.max_samples = max_samples
+        self.max_groups = max_groups
+        self._groups: typing.Dict[str, ExceptionAggregate] = {}
+        self._lock = threading.Lock()
+        self._start()
+        atexit.register(self.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def add(self, record: dict) -> bool:
+        """
+        Returns True if ``record`` should be written now.
+        """
+        fingerprint = record.get("fingerprint")
+        if fingerprint is None:
+            return True
+        with self._lock:
+            group = self._groups.get(fingerprint)
+            if group is None:
+                if len(self._groups) < self.max_groups:
+                    self._groups[fingerprint] = ExceptionAggregate(record)
+                return True
+            group.add(record, self.max_samples)
+        return False
+
+    def flush(self) -> int:
+        """
+        Write the repeats counted so far. Returns the number of records.
+        """
+        with self._lock:
+            groups, self._groups = self._groups, {}
+        written = 0
+        for group in groups.values():
+            if group.count:
+                self.emit(group.to_record())
+                written += 1
+        return written
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.stop)
+
+    def _start(self) -> None:
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="fastapi-and-logging-exceptions",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives in the child.
+        self._lock = threading.Lock()
+        self._groups = {}
+        if not self._stopped.is_set():
+            self._start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.window):
+            self.flush()
@@ -1,40 +1,66 @@
 import json
 
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import StreamingResponse
 from user_agents.parsers import UserAgent
 
-from fastapi_and_logging.enums import LogPathEnum, LogTypeEnum
+from fastapi_and_logging.enums import (
+    LoggerNameEnum,
+    LogPathEnum,
+    LogTypeEnum,
+    RequestIdEnum,
+)
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.logging import incoming_formatter, sink_manager
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.request_id import get_request_id_builder
+from fastapi_and_logging.rotation import RotationPolicy
+from fastapi_and_logging.sampling import SamplingPolicy
+from fastapi_and_logging.writer import BatchWriter
 
+from .capture import ResponseCapture
+from .middleware import IncomingLogMiddleware
 from .route import LoggingRoute
+from .user_agent import UserAgentCache, get_user_agent_data
 
 
-async def get_request_data(request: Request):
-    body = await request.body()
-    if len(body) > 0:
+def decode_body(body: bytes, truncated: bool) -> dict | str:
+    if not body:
+        return ""
+    if not truncated:
         try:
-            return json.dumps(await request.body())
-        except Exception:
-            return ""
-    return ""
+            return json.loads(body)
+        except ValueError:
+            pass
+    return body.decode("utf-8", errors="replace")
 
 
-def get_response_data(response: Response) -> dict | str:
-    response_max_len = 1000
+async def get_request_data(request: Request) -> dict | str:
+    body_capture = getattr(request.state, "body_capture", None)
+    if body_capture is not None:
+        body, truncated = body_capture.body, body_capture.truncated
+    else:
+        body = await request.body()
+        truncated = len(body) > LoggingRoute.request_max_len
+        body = body[: LoggingRoute.request_max_len]
+    return decode_body(body, truncated)
 
-    if not isinstance(response, StreamingResponse):
-        body = response.body
-        if len(body) < response_max_len:
-            try:
-                response_data = json.loads(response.body)
-            except Exception:
-                response_data = str(body)[response_max_len:]
-        else:
-            response_data = str(body)[response_max_len:]
+
+def get_response_data(response: Response) -> dict | str:
+    if isinstance(response, ResponseCapture):
+        body, truncated = response.body, response.truncated
     else:
-        response_data = "StreamingResponse"
+        body = getattr(response, "body", b"")
+        truncated = len(body) > LoggingRoute.response_max_len
+        body = body[: LoggingRoute.response_max_len]
+    return decode_body(body, truncated)
+
 
-    return response_data
+def get_headers(request: Request) -> dict:
+    header_filter = (
+        getattr(request.state, "header_filter", None)
+        or LoggingRoute.header_filter
+    )
+    return header_filter.filter(request.scope.get("headers", ()))
 
 
 def log_builder(
@@ -48,22 +74,36 @@ def log_builder(
     duration: int,
 ):
     scope = request.scope
-    return {
+    if isinstance(response, ResponseCapture):
+        response_size = response.total_length
+        time_to_first_byte = response.time_to_first_byte
+    else:
+        response_size = len(getattr(response, "body", b""))
+        time_to_first_byte = None
+    log = {
         "request_id": request.state.request_id,
-        "endpoint": scope.get("route").name,
+        "endpoint": getattr(scope.get("route"), "name", None),
         "path": scope.get("path"),
         "status_code": response.status_code,
         "query": dict(request.query_params),
         "request": request_data,
+        "request_size": getattr(
+            getattr(request.state, "body_capture", None),
+            "total_length",
+            None,
+        ),
         "response": response_data,
-        "headers": dict(request.headers),
+        "response_size": response_size,
+        "time_to_first_byte": time_to_first_byte,
+        "headers": get_headers(request),
         "request_time": start_time,
         "response_time": end_time,
         "duration": duration,
-        "browser": f"{user_agent.browser.family}:{user_agent.browser.version_string}",
-        "os": f"{user_agent.os.family}:{user_agent.os.version_string}",
-        "device": user_agent.device.family,
     }
+    # user_agent is None when parsing is deferred to the writer thread.
+    if user_agent is not None:
+        log.update(get_user_agent_data(user_agent))
+    return log
 
 
 class FastAPIIncomingLog:
@@ -75,15 +115,63 @@ class FastAPIIncomingLog:
         get_request_data=get_request_data,
         get_response_data=get_response_data,
         response_max_len: int = 5000,
+        request_max_len: int = 5000,
         log_path: str = LogPathEnum.INCOMING,
         log_type: LogTypeEnum = LogTypeEnum.FILE,
+        writer: BatchWriter = None,
+        user_agent_cache_size: int = 1024,
+        defer_user_agent_parsing: bool = False,
+        use_middleware: bool = False,
+        sampling: SamplingPolicy = None,
+        header_filter: HeaderFilter = None,
+        request_id_strategy: RequestIdEnum = RequestIdEnum.UUID4,
+        request_id_from_header: str = None,
+        rotation: RotationPolicy = None,
+        metrics: MetricsRegistry = None,
+        metrics_path: str = None,
     ) -> None:
         self.app = app
+        self.user_agent_cache = UserAgentCache(user_agent_cache_size)
         LoggingRoute.response_max_len = response_max_len
-        LoggingRoute.request_id_builder = request_id_builder
+        LoggingRoute.request_max_len = request_max_len
+        LoggingRoute.request_id_builder = (
+            request_id_builder or get_request_id_builder(request_id_strategy)
+        )
+        LoggingRoute.request_id_header = (
+            request_id_from_header.lower().encode("latin-1")
+            if request_id_from_header
+            else None
+        )
         LoggingRoute.get_request_data = get_request_data
         LoggingRoute.get_response_data = get_response_data
         LoggingRoute.log_builder = log_builder
         LoggingRoute.log_path = log_path
         LoggingRoute.log_type = log_type
-        self.app.router.route_class = LoggingRoute
+        LoggingRoute.writer = writer
+        LoggingRoute.user_agent_cache = self.user_agent_cache
+        LoggingRoute.defer_user_agent_parsing = defer_user_agent_parsing
+        LoggingRoute.sampling = sampling
+        LoggingRoute.header_filter = header_filter or HeaderFilter()
+        LoggingRoute.metrics = metrics
+        LoggingRoute.config_version += 1
+        # Routes declared before this point are checked here, later ones
+        # when they are registered.
+        for route in self.app.routes:
+            LoggingRoute.check_policy(LoggingRoute.find_policy(route))
+        sink_manager.register(
+            LoggerNameEnum.INCOMING,
+            file_path=log_path,
+            log_type=log_type,
+            writer=writer,
+            rotation=rotation,
+            enqueue=True,
+            format=incoming_formatter,
+        )
+        if metrics is not None and metrics_path:
+            self.app.add_route(
+                metrics_path, metrics.asgi_app(), include_in_schema=False
+            )
+        if use_middleware:
+            self.app.add_middleware(IncomingLogMiddleware)
+        else:
+            self.app.router.route_class = LoggingRoute
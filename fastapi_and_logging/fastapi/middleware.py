@@ -0,0 +1,118 @@
+import time
+import typing
+
+from starlette.datastructures import State
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_and_logging.context import set_request_id
+from fastapi_and_logging.enums import LoggerNameEnum
+
+from .capture import RequestBodyCapture, ResponseSnapshot
+from .policy import ResolvedLogPolicy
+from .route import LoggingRoute
+from .snapshot import RequestSnapshot
+
+
+class IncomingLogMiddleware:
+    """
+    Pure ASGI alternative to ``LoggingRoute``. It works on ``scope``,
+    ``receive`` and ``send`` directly, so it also logs 404s, mounted
+    sub-applications, static files and routes declared before setup.
+    Status and headers come from the ``http.response.start`` message. The
+    configuration set on ``LoggingRoute`` by ``FastAPIIncomingLog`` is
+    shared, records are built by the same ``log_builder``, and the
+    ``LogPolicy`` of the matched route applies in full. Routes using
+    ``LoggingRoute`` skip their own logging while the middleware is
+    installed.
+
+    The per-request cost is about the same as ``LoggingRoute``: most of it
+    is building and writing the record, which both share.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The state dict is filled directly; a State wrapper is only built
+        # for requests that are logged.
+        state = scope.setdefault("state", {})
+        request_id = LoggingRoute.build_request_id(scope)
+        set_request_id(request_id)
+        body_capture = RequestBodyCapture(
+            receive, LoggingRoute.request_max_len
+        )
+        state["request_id"] = request_id
+        state["log_middleware"] = True
+        state["body_capture"] = body_capture
+        start_time = time.time()
+        response = ResponseSnapshot(LoggingRoute.response_max_len, start_time)
+        resolved = False
+
+        def apply_policy() -> None:
+            # The route is matched before the body is read or the
+            # response is sent, so its policy sets the capture limits.
+            nonlocal resolved
+            resolved = True
+            policy = LoggingRoute.get_route_policy(scope.get("route"))
+            body_capture.max_len = policy.request_max_len
+            response.max_len = policy.response_max_len
+
+        async def capture_receive() -> Message:
+            if not resolved:
+                apply_policy()
+            return await body_capture()
+
+        async def capture_send(message: Message) -> None:
+            if not resolved:
+                apply_policy()
+            response.capture(message)
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        except Exception:
+            if response.status_code is None:
+                response.status_code = 500
+            raise
+        finally:
+            end_time = time.time()
+            duration = (end_time - start_time) * 1000
+            route = scope.get("route")
+            if LoggingRoute.metrics is not None:
+                LoggingRoute.metrics.observe(
+                    LoggerNameEnum.INCOMING,
+                    getattr(route, "name", None),
+                    response.status_code,
+                    duration,
+                    body_capture.total_length,
+                    response.total_length,
+                )
+            policy = LoggingRoute.get_route_policy(route)
+            if self.should_log(policy, route, response, duration):
+                state["header_filter"] = policy.header_filter
+                await LoggingRoute.write_log(
+                    request=RequestSnapshot(scope, State(state)),
+                    response=response,
+                    start_time=start_time,
+                    end_time=end_time,
+                    log_path=policy.log_path,
+                )
+
+    @staticmethod
+    def should_log(
+        policy: ResolvedLogPolicy,
+        route: typing.Any,
+        response: ResponseSnapshot,
+        duration: float,
+    ) -> bool:
+        if not policy.enabled:
+            return False
+        return policy.sampling is None or policy.sampling.should_log(
+            getattr(route, "name", None),
+            response.status_code,
+            duration,
+        )
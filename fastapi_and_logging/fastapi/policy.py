@@ -0,0 +1,109 @@
+import typing
+
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.sampling import SamplingPolicy
+
+
+class LogPolicy:
+    """
+    Incoming log settings for one route, resolved on the first request to
+    the route. Options left as None fall back to the values set on
+    ``FastAPIIncomingLog``.
+
+    - ``enabled``: False skips all logging work; only metrics are recorded.
+    - ``capture_request_body`` / ``capture_response_body``: whether bodies
+      are copied into the log.
+    - ``request_max_len`` / ``response_max_len``: body length limits.
+    - ``headers``: a ``HeaderFilter``, or an allowlist of header names
+      that are written to the log, with sensitive values still masked.
+    - ``sampling``: a ``SamplingPolicy`` or a sampling rate.
+    - ``log_path``: the file this route's records are written to. It can
+      not be combined with a ``writer`` or ``LogTypeEnum.NETWORK``.
+    """
+
+    __slots__ = (
+        "enabled",
+        "capture_request_body",
+        "capture_response_body",
+        "request_max_len",
+        "response_max_len",
+        "headers",
+        "sampling",
+        "log_path",
+    )
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        capture_request_body: bool = True,
+        capture_response_body: bool = True,
+        request_max_len: typing.Optional[int] = None,
+        response_max_len: typing.Optional[int] = None,
+        headers: typing.Union[HeaderFilter, typing.Iterable[str], None] = None,
+        sampling: typing.Union[SamplingPolicy, float, None] = None,
+        log_path: typing.Optional[str] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.capture_request_body = capture_request_body
+        self.capture_response_body = capture_response_body
+        self.request_max_len = request_max_len
+        self.response_max_len = response_max_len
+        if headers is not None and not isinstance(headers, HeaderFilter):
+            headers = HeaderFilter(allow=headers)
+        self.headers = headers
+        if isinstance(sampling, (int, float)):
+            sampling = SamplingPolicy(rate=sampling)
+        self.sampling = sampling
+        self.log_path = log_path
+
+
+class ResolvedLogPolicy:
+    """
+    A ``LogPolicy`` with the ``FastAPIIncomingLog`` values filled in for
+    the options it leaves unset. A body that is not captured has a max
+    length of 0.
+    """
+
+    __slots__ = (
+        "enabled",
+        "request_max_len",
+        "response_max_len",
+        "header_filter",
+        "sampling",
+        "log_path",
+    )
+
+    def __init__(
+        self,
+        enabled: bool,
+        request_max_len: int,
+        response_max_len: int,
+        header_filter: HeaderFilter,
+        sampling: typing.Optional[SamplingPolicy],
+        log_path: str,
+    ) -> None:
+        self.enabled = enabled
+        self.request_max_len = request_max_len
+        self.response_max_len = response_max_len
+        self.header_filter = header_filter
+        self.sampling = sampling
+        self.log_path = log_path
+
+
+def log_policy(**kwargs) -> typing.Callable:
+    """
+    Attach a ``LogPolicy`` to an endpoint. Apply it below the route
+    decorator::
+
+        @app.get("/health")
+        @log_policy(enabled=False)
+        def health():
+            ...
+    """
+    policy = LogPolicy(**kwargs)
+
+    def decorator(endpoint: typing.Callable) -> typing.Callable:
+        endpoint.__log_policy__ = policy
+        return endpoint
+
+    return decorator
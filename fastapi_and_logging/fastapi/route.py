@@ -1,35 +1,278 @@
+import functools
 import time
-import uuid
-from typing import Callable, Coroutine
+from typing import Callable, Coroutine, Optional, Type, Union
 
 from fastapi import Request, Response
 from fastapi.routing import APIRoute
-from user_agents.parsers import parse
 
-from fastapi_and_logging.enums import LogTypeEnum
+from fastapi_and_logging.context import set_request_id
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.fastapi.capture import (
+    RequestBodyCapture,
+    ResponseBodyCapture,
+)
 from fastapi_and_logging.fastapi.exception import ExceptionLogger
-from fastapi_and_logging.logging import get_incoming_logger
+from fastapi_and_logging.fastapi.policy import LogPolicy, ResolvedLogPolicy
+from fastapi_and_logging.fastapi.snapshot import RequestSnapshot
+from fastapi_and_logging.fastapi.user_agent import UserAgentCache
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.logging import (
+    get_incoming_logger,
+    incoming_formatter,
+    sink_manager,
+)
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.request_id import (
+    get_header_request_id,
+    uuid4_request_id,
+)
+from fastapi_and_logging.sampling import SamplingPolicy
+from fastapi_and_logging.writer import BatchWriter
 
 
 class LoggingRoute(APIRoute):
-    response_max_len: int
-    request_id_builder: Callable
+    response_max_len: int = 5000
+    request_max_len: int = 5000
+    request_id_builder: Optional[Callable] = None
+    request_id_header: Optional[bytes] = None
     get_request_data: Callable[..., Coroutine]
     get_response_data: Callable
     log_builder: Callable
-    log_path: str
-    log_type: LogTypeEnum
+    log_path: str = LogPathEnum.INCOMING
+    log_type: LogTypeEnum = LogTypeEnum.FILE
+    writer: Optional[BatchWriter] = None
+    user_agent_cache: UserAgentCache = UserAgentCache()
+    defer_user_agent_parsing: bool = False
+    sampling: Optional[SamplingPolicy] = None
+    log_policy: Optional[LogPolicy] = None
+    header_filter: HeaderFilter = HeaderFilter()
+    metrics: Optional[MetricsRegistry] = None
+    # Bumped by FastAPIIncomingLog so cached route policies are resolved
+    # again against the new configuration.
+    config_version: int = 0
+
+    @classmethod
+    def with_policy(
+        cls,
+        policy: Optional[LogPolicy] = None,
+        **kwargs,
+    ) -> Type["LoggingRoute"]:
+        """
+        Route class applying a ``LogPolicy`` to every route of a router::
+
+            APIRouter(route_class=LoggingRoute.with_policy(enabled=False))
+        """
+        return type(
+            cls.__name__,
+            (cls,),
+            {"log_policy": policy or LogPolicy(**kwargs)},
+        )
+
+    def get_log_policy(self) -> LogPolicy:
+        return LoggingRoute.find_policy(self)
+
+    @staticmethod
+    def find_policy(route: Optional[object]) -> LogPolicy:
+        return (
+            getattr(getattr(route, "endpoint", None), "__log_policy__", None)
+            or getattr(route, "log_policy", None)
+            or LogPolicy()
+        )
+
+    @staticmethod
+    def check_policy(policy: LogPolicy) -> None:
+        """
+        A per-route ``log_path`` gets its own loguru file sink, which can not
+        go through the configured ``BatchWriter`` or the network.
+        """
+        if policy.log_path is None:
+            return
+        if LoggingRoute.writer is not None:
+            raise ValueError(
+                "log_policy(log_path=...) can not be used with a writer; "
+                "the route would bypass it"
+            )
+        if LoggingRoute.log_type == LogTypeEnum.NETWORK:
+            raise ValueError(
+                "log_policy(log_path=...) can not be used with "
+                "LogTypeEnum.NETWORK"
+            )
+
+    @staticmethod
+    def resolve_policy(policy: LogPolicy) -> ResolvedLogPolicy:
+        LoggingRoute.check_policy(policy)
+        request_max_len = 0
+        if policy.capture_request_body:
+            request_max_len = (
+                LoggingRoute.request_max_len
+                if policy.request_max_len is None
+                else policy.request_max_len
+            )
+        response_max_len = 0
+        if policy.capture_response_body:
+            response_max_len = (
+                LoggingRoute.response_max_len
+                if policy.response_max_len is None
+                else policy.response_max_len
+            )
+        log_path = policy.log_path or LoggingRoute.log_path
+        if policy.log_path is not None:
+            sink_manager.register(
+                LoggerNameEnum.INCOMING,
+                file_path=log_path,
+                log_type=LoggingRoute.log_type,
+                enqueue=True,
+                format=incoming_formatter,
+            )
+        return ResolvedLogPolicy(
+            enabled=policy.enabled,
+            request_max_len=request_max_len,
+            response_max_len=response_max_len,
+            header_filter=policy.headers or LoggingRoute.header_filter,
+            sampling=policy.sampling or LoggingRoute.sampling,
+            log_path=log_path,
+        )
+
+    @staticmethod
+    def get_route_policy(route: Optional[object]) -> ResolvedLogPolicy:
+        """
+        Resolved policy of the route matched for a request. It is resolved
+        on the first request and cached on the route, which may be a plain
+        ``APIRoute`` or None for unmatched requests, until
+        ``FastAPIIncomingLog`` configures logging again.
+        """
+        cached = getattr(route, "_resolved_log_policy", None)
+        if cached is not None and cached[0] == LoggingRoute.config_version:
+            return cached[1]
+        resolved = LoggingRoute.resolve_policy(LoggingRoute.find_policy(route))
+        if route is not None:
+            route._resolved_log_policy = (
+                LoggingRoute.config_version,
+                resolved,
+            )
+        return resolved
+
+    @staticmethod
+    def is_middleware_logged(request: Request) -> bool:
+        # Set by IncomingLogMiddleware, which logs the request itself.
+        return "log_middleware" in request.scope.get("state", ())
+
+    @staticmethod
+    def build_request_id(scope: Optional[dict] = None) -> str:
+        if LoggingRoute.request_id_header is not None and scope is not None:
+            request_id = get_header_request_id(
+                scope["headers"], LoggingRoute.request_id_header
+            )
+            if request_id is not None:
+                return request_id
+        if LoggingRoute.request_id_builder:
+            return LoggingRoute.request_id_builder()
+        return uuid4_request_id()
+
+    @staticmethod
+    async def write_log(
+        request: Union[Request, RequestSnapshot],
+        response: Response,
+        start_time: float,
+        end_time: float,
+        log_path: Optional[str] = None,
+    ) -> None:
+        duration = (end_time - start_time) * 1000
+
+        user_agent_string = request.headers.get("user-agent", "")
+        if LoggingRoute.defer_user_agent_parsing:
+            user_agent = None
+            processor = functools.partial(
+                LoggingRoute.user_agent_cache.add_user_agent_data,
+                user_agent_string=user_agent_string,
+            )
+        else:
+            user_agent = LoggingRoute.user_agent_cache.parse(user_agent_string)
+            processor = None
+        log_dict = LoggingRoute.log_builder(
+            request=request,
+            request_data=await LoggingRoute.get_request_data(request),
+            response=response,
+            response_data=LoggingRoute.get_response_data(response),
+            user_agent=user_agent,
+            start_time=start_time,
+            end_time=end_time,
+            duration=duration,
+        )
+        get_incoming_logger(
+            file_path=log_path or LoggingRoute.log_path,
+            log_type=LoggingRoute.log_type,
+            extra_data=log_dict,
+            processor=processor,
+        )
+
+    def get_metrics_route_handler(
+        self, original_route_handler: Callable
+    ) -> Callable:
+        """
+        Handler of a route whose logging is disabled: only metrics are
+        recorded, when a ``MetricsRegistry`` is configured.
+        """
+        route_name = self.name
+
+        async def metrics_route_handler(request: Request) -> Response:
+            metrics = LoggingRoute.metrics
+            if metrics is None or LoggingRoute.is_middleware_logged(request):
+                return await original_route_handler(request)
+            start_time = time.time()
+            try:
+                response = await original_route_handler(request)
+            except Exception:
+                metrics.observe(
+                    LoggerNameEnum.INCOMING,
+                    route_name,
+                    500,
+                    (time.time() - start_time) * 1000,
+                )
+                raise
+            metrics.observe(
+                LoggerNameEnum.INCOMING,
+                route_name,
+                response.status_code,
+                (time.time() - start_time) * 1000,
+                response_size=(
+                    len(response.body) if hasattr(response, "body") else None
+                ),
+            )
+            return response
+
+        return metrics_route_handler
 
     def get_route_handler(self) -> Callable:
         original_route_handler = super().get_route_handler()
+        policy = self.get_log_policy()
+        LoggingRoute.check_policy(policy)
+        route_name = self.name
+        if not policy.enabled:
+            return self.get_metrics_route_handler(original_route_handler)
+        route = self
 
         async def custom_route_handler(request: Request) -> Response:
-            request_id = (
-                LoggingRoute.request_id_builder()
-                if LoggingRoute.request_id_builder
-                else str(uuid.uuid4())
-            )
-            request.state.request_id = request_id
+            if LoggingRoute.is_middleware_logged(request):
+                return await original_route_handler(request)
+            # Resolved on the first request rather than here, so routes
+            # declared before FastAPIIncomingLog use its configuration.
+            resolved = LoggingRoute.get_route_policy(route)
+            request_max_len = resolved.request_max_len
+            response_max_len = resolved.response_max_len
+            header_filter = resolved.header_filter
+            sampling = resolved.sampling
+            log_path = resolved.log_path
+            metrics = LoggingRoute.metrics
+            state = request.state
+            state.request_id = LoggingRoute.build_request_id(request.scope)
+            set_request_id(state.request_id)
+            state.header_filter = header_filter
+            # Tee the first request_max_len bytes of the body as the
+            # endpoint reads it instead of buffering the body again.
+            body_capture = RequestBodyCapture(request.receive, request_max_len)
+            request._receive = body_capture
+            state.body_capture = body_capture
             start_time = time.time()
 
             try:
@@ -44,24 +287,48 @@ class LoggingRoute(APIRoute):
                 else:
                     raise exc
 
-            end_time = time.time()
-            duration = (end_time - start_time) * 1000
+            duration = (time.time() - start_time) * 1000
+            if metrics is not None:
+                metrics.observe(
+                    LoggerNameEnum.INCOMING,
+                    route_name,
+                    response.status_code,
+                    duration,
+                    body_capture.total_length,
+                    len(response.body) if hasattr(response, "body") else None,
+                )
+            if sampling is not None and not sampling.should_log(
+                route_name, response.status_code, duration
+            ):
+                return response
+
+            if not hasattr(response, "body"):
+                # Streaming and file responses are logged once the last
+                # chunk has been sent.
+                return ResponseBodyCapture(
+                    response,
+                    response_max_len,
+                    start_time=start_time,
+                    on_complete=functools.partial(
+                        LoggingRoute.write_log,
+                        request,
+                        start_time=start_time,
+                        log_path=log_path,
+                    ),
+                )
 
-            user_agent = parse(request.headers["user-agent"])
-            log_dict = LoggingRoute.log_builder(
+            await LoggingRoute.write_log(
                 request=request,
-                request_data=await LoggingRoute.get_request_data(request),
-                response=response,
-                response_data=LoggingRoute.get_response_data(response),
-                user_agent=user_agent,
+                response=(
+                    ResponseBodyCapture.from_response(
+                        response, response_max_len, start_time
+                    )
+                    if response_max_len != LoggingRoute.response_max_len
+                    else response
+                ),
                 start_time=start_time,
-                end_time=end_time,
-                duration=duration,
-            )
-            get_incoming_logger(
-                file_path=LoggingRoute.log_path,
-                log_type=LoggingRoute.log_type,
-                extra_data=log_dict,
+                end_time=time.time(),
+                log_path=log_path,
             )
             return response
 
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from starlette.datastructures import Headers, QueryParams, State
+
+
+class RequestSnapshot:
+    """
+    Cheap stand-in for ``Request`` passed to the log functions by
+    ``IncomingLogMiddleware``. It only keeps references to the ASGI scope,
+    the request state and the body bytes. When no body is given,
+    ``body()`` returns the bytes captured in ``state.body_capture``, which
+    are at most ``request_max_len`` long. Headers and query params are
+    decoded lazily on first access.
+    """
+
+    __slots__ = ("scope", "state", "_body", "_headers", "_query_params")
+
+    def __init__(
+        self, scope: dict, state: State, body: Optional[bytes] = None
+    ) -> None:
+        self.scope = scope
+        self.state = state
+        self._body = body
+        self._headers = None
+        self._query_params = None
+
+    @classmethod
+    def from_request(
+        cls, request, body: Optional[bytes] = None
+    ) -> "RequestSnapshot":
+        return cls(scope=request.scope, state=request.state, body=body)
+
+    @property
+    def headers(self) -> Headers:
+        if self._headers is None:
+            self._headers = Headers(scope=self.scope)
+        return self._headers
+
+    @property
+    def query_params(self) -> QueryParams:
+        if self._query_params is None:
+            self._query_params = QueryParams(
+                self.scope.get("query_string", b"")
+            )
+        return self._query_params
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            body_capture = getattr(self.state, "body_capture", None)
+            return b"" if body_capture is None else body_capture.body
+        return self._body
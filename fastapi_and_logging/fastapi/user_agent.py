@@ -0,0 +1,67 @@
+import collections
+import threading
+
+from user_agents.parsers import UserAgent, parse
+
+
+def get_user_agent_data(user_agent: UserAgent) -> dict:
+    return {
+        "browser": f"{user_agent.browser.family}:{user_agent.browser.version_string}",
+        "os": f"{user_agent.os.family}:{user_agent.os.version_string}",
+        "device": user_agent.device.family,
+    }
+
+
+class UserAgentCache:
+    """
+    Thread-safe LRU cache of parsed user agents keyed by the raw header.
+    A ``maxsize`` of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: collections.OrderedDict[
+            str, UserAgent
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, user_agent_string: str) -> UserAgent:
+        with self._lock:
+            user_agent = self._cache.get(user_agent_string)
+            if user_agent is not None:
+                self._cache.move_to_end(user_agent_string)
+                self.hits += 1
+                return user_agent
+            self.misses += 1
+
+        user_agent = parse(user_agent_string)
+        if self.maxsize > 0:
+            with self._lock:
+                self._cache[user_agent_string] = user_agent
+                if len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return user_agent
+
+    def add_user_agent_data(
+        self,
+        log_dict: dict,
+        user_agent_string: str,
+    ) -> dict:
+        log_dict.update(get_user_agent_data(self.parse(user_agent_string)))
+        return log_dict
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
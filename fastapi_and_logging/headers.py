@@ -0,0 +1,117 @@
+import re
+import threading
+import typing
+
+SENSITIVE_HEADERS = (
+    "authorization",
+    "proxy-authorization",
+    "cookie",
+    "set-cookie",
+    "x-api-key",
+    "x-auth-token",
+)
+
+_KEEP = 0
+_DROP = 1
+_MASK = 2
+
+HeaderName = typing.Union[str, bytes]
+HeaderItems = typing.Iterable[typing.Tuple[HeaderName, HeaderName]]
+
+
+def _compile(patterns: typing.Optional[typing.Iterable[str]]):
+    if not patterns:
+        return None
+    return re.compile(
+        "|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE
+    )
+
+
+class HeaderFilter:
+    """
+    Selects and masks the headers written to a log record.
+
+    - ``allow``: only these header names are kept (all when None).
+    - ``deny`` / ``deny_patterns``: header names or regexes that are dropped.
+    - ``mask`` / ``mask_patterns``: header names or regexes whose value is
+      replaced with ``mask_value``. Defaults to ``SENSITIVE_HEADERS``.
+
+    The rules are compiled into frozensets and a single regex each, and the
+    decision for every header name seen is cached, so filtering is one pass
+    over the raw header list with a dict lookup per header.
+    """
+
+    max_cache_size = 1024
+
+    def __init__(
+        self,
+        allow: typing.Optional[typing.Iterable[str]] = None,
+        deny: typing.Iterable[str] = (),
+        deny_patterns: typing.Optional[typing.Iterable[str]] = None,
+        mask: typing.Iterable[str] = SENSITIVE_HEADERS,
+        mask_patterns: typing.Optional[typing.Iterable[str]] = None,
+        mask_value: str = "***",
+    ) -> None:
+        self.allow = (
+            frozenset(name.lower() for name in allow)
+            if allow is not None
+            else None
+        )
+        self.deny = frozenset(name.lower() for name in deny)
+        self.deny_pattern = _compile(deny_patterns)
+        self.mask = frozenset(name.lower() for name in mask)
+        self.mask_pattern = _compile(mask_patterns)
+        self.mask_value = mask_value
+        self._cache: typing.Dict[HeaderName, typing.Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, headers: HeaderItems) -> dict:
+        """
+        Filter ``(name, value)`` pairs given as ``str`` or as the ``bytes``
+        of a raw ASGI/httpx header list. Later duplicates win, as with
+        ``dict(headers)``.
+        """
+        cache = self._cache
+        mask_value = self.mask_value
+        result = {}
+        for name, value in headers:
+            decision = cache.get(name)
+            if decision is None:
+                decision = self._decide(name)
+            action, key = decision
+            if action == _KEEP:
+                result[key] = (
+                    value.decode("latin-1")
+                    if isinstance(value, bytes)
+                    else value
+                )
+            elif action == _MASK:
+                result[key] = mask_value
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _decide(self, name: HeaderName) -> typing.Tuple[int, str]:
+        key = (
+            name.decode("latin-1") if isinstance(name, bytes) else name
+        ).lower()
+        if (
+            (self.allow is not None and key not in self.allow)
+            or key in self.deny
+            or (self.deny_pattern and self.deny_pattern.search(key))
+        ):
+            action = _DROP
+        elif key in self.mask or (
+            self.mask_pattern and self.mask_pattern.search(key)
+        ):
+            action = _MASK
+        else:
+            action = _KEEP
+        decision = (action, key)
+        # Header names are client controlled, so the cache is bounded.
+        if len(self._cache) < self.max_cache_size:
+            with self._lock:
+                self._cache[name] = decision
+        return decision
@@ -1,7 +1,36 @@
-from .aiohttp import AioHttpLogger
-from .httpx import HTTPXLogger
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .aiohttp import AioHttpLogger
+    from .httpx import HTTPXLogger
+    from .transport import AsyncLoggingTransport, LoggingTransport
+
+# Each client is imported on first access (PEP 562), so the httpx loggers
+# work without aiohttp installed and the other way around.
+_LAZY_ATTRIBUTES = {
+    "HTTPXLogger": ".httpx",
+    "AioHttpLogger": ".aiohttp",
+    "LoggingTransport": ".transport",
+    "AsyncLoggingTransport": ".transport",
+}
 
 __all__ = [
     "HTTPXLogger",
     "AioHttpLogger",
+    "LoggingTransport",
+    "AsyncLoggingTransport",
 ]
+
+
+def __getattr__(name: str) -> typing.Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
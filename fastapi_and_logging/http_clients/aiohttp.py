@@ -1,10 +1,113 @@
+import functools
+import time
 import typing
 
 import aiohttp
 import wrapt
+from aiohttp.streams import ChunkTupleAsyncStreamIterator
 
-from fastapi_and_logging.enums import LogPathEnum, LogTypeEnum
-from fastapi_and_logging.logging import get_apicall_logger
+from fastapi_and_logging.buffer import CappedBuffer
+from fastapi_and_logging.context import REQUEST_ID_HEADER, get_request_id
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.logging import (
+    apicall_formatter,
+    get_apicall_logger,
+    sink_manager,
+)
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.rotation import RotationPolicy
+from fastapi_and_logging.sampling import SamplingPolicy
+from fastapi_and_logging.writer import BatchWriter
+
+PHASES = {
+    aiohttp.TraceDnsResolveHostStartParams: "dns",
+    aiohttp.TraceDnsResolveHostEndParams: "dns",
+    aiohttp.TraceConnectionCreateStartParams: "connect",
+    aiohttp.TraceConnectionCreateEndParams: "connect",
+    aiohttp.TraceRequestHeadersSentParams: "wait",
+}
+
+
+class ResponseContentCapture(wrapt.ObjectProxy):
+    """
+    Wraps ``ClientResponse.content`` and copies at most ``capture.max_len``
+    bytes of the body as the caller reads it, with ``read()``, ``text()``,
+    ``json()`` or by streaming. ``on_complete`` is called once the body has
+    been read to the end, a read has failed, or the response has been
+    released or closed.
+    """
+
+    def __init__(
+        self,
+        content: aiohttp.StreamReader,
+        capture: CappedBuffer,
+        on_complete: typing.Callable[[], None],
+    ) -> None:
+        super().__init__(content)
+        self._self_capture = capture
+        self._self_on_complete = on_complete
+
+    async def _self_read(self, read: typing.Callable, *args) -> typing.Any:
+        try:
+            data = await read(*args)
+        except BaseException:
+            self._self_on_complete()
+            raise
+        self._self_copy(data[0] if isinstance(data, tuple) else data)
+        return data
+
+    def _self_copy(self, chunk: bytes) -> None:
+        if chunk:
+            self._self_capture._copy(chunk)
+        if self.__wrapped__.at_eof():
+            self._self_on_complete()
+
+    def _self_iter(self, iterator: typing.Any) -> typing.Any:
+        iterator.read_func = functools.partial(
+            self._self_read, iterator.read_func
+        )
+        return iterator
+
+    def read(self, n: int = -1) -> typing.Awaitable[bytes]:
+        return self._self_read(self.__wrapped__.read, n)
+
+    def readany(self) -> typing.Awaitable[bytes]:
+        return self._self_read(self.__wrapped__.readany)
+
+    def readline(self) -> typing.Awaitable[bytes]:
+        return self._self_read(self.__wrapped__.readline)
+
+    def readuntil(self, separator: bytes = b"\n") -> typing.Awaitable[bytes]:
+        return self._self_read(self.__wrapped__.readuntil, separator)
+
+    def readexactly(self, n: int) -> typing.Awaitable[bytes]:
+        return self._self_read(self.__wrapped__.readexactly, n)
+
+    def readchunk(self) -> typing.Awaitable[typing.Tuple[bytes, bool]]:
+        return self._self_read(self.__wrapped__.readchunk)
+
+    def read_nowait(self, n: int = -1) -> bytes:
+        data = self.__wrapped__.read_nowait(n)
+        self._self_copy(data)
+        return data
+
+    def iter_chunked(self, n: int) -> typing.Any:
+        return self._self_iter(self.__wrapped__.iter_chunked(n))
+
+    def iter_any(self) -> typing.Any:
+        return self._self_iter(self.__wrapped__.iter_any())
+
+    def iter_chunks(self) -> ChunkTupleAsyncStreamIterator:
+        return ChunkTupleAsyncStreamIterator(self)
+
+    def __aiter__(self) -> typing.Any:
+        return self._self_iter(self.__wrapped__.__aiter__())
+
+    def set_exception(self, *args, **kwargs) -> None:
+        # Called by ClientResponse.release() and close().
+        self.__wrapped__.set_exception(*args, **kwargs)
+        self._self_on_complete()
 
 
 class AioHttpLogger:
@@ -20,6 +123,12 @@ class AioHttpLogger:
         response_max_len: int = 5000,
         log_path: str = LogPathEnum.APICALL,
         log_type: LogTypeEnum = LogTypeEnum.FILE,
+        writer: typing.Optional[BatchWriter] = None,
+        sampling: typing.Optional[SamplingPolicy] = None,
+        header_filter: typing.Optional[HeaderFilter] = None,
+        request_id_header: typing.Optional[str] = REQUEST_ID_HEADER,
+        rotation: typing.Optional[RotationPolicy] = None,
+        metrics: typing.Optional[MetricsRegistry] = None,
     ) -> None:
         self.request_hook = request_hook or self.default_request_hook
         self.response_hook = response_hook or self.default_response_hook
@@ -27,43 +136,183 @@ class AioHttpLogger:
         self.response_max_len = response_max_len
         self.log_path = log_path
         self.log_type = log_type
+        self.sampling = sampling
+        self.header_filter = header_filter or HeaderFilter()
+        self.request_id_header = request_id_header
+        self.metrics = metrics
+        self.trace_config = self.build_trace_config()
+        sink_manager.register(
+            LoggerNameEnum.APICALL,
+            file_path=log_path,
+            log_type=log_type,
+            writer=writer,
+            rotation=rotation,
+            enqueue=True,
+            format=apicall_formatter,
+        )
         wrapt.wrap_function_wrapper(
             aiohttp.ClientSession, "__init__", self.init
         )
 
     def init(self, wrapped, instance, args, kwargs):
+        # The caller's trace configs are kept; ours is appended.
+        kwargs["trace_configs"] = [
+            *(kwargs.get("trace_configs") or ()),
+            self.trace_config,
+        ]
+        wrapped(*args, **kwargs)
+
+    def build_trace_config(self) -> aiohttp.TraceConfig:
         trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
         trace_config.on_request_start.append(self.request_hook)
+        trace_config.on_dns_resolvehost_start.append(self.on_phase_start)
+        trace_config.on_dns_resolvehost_end.append(self.on_phase_end)
+        trace_config.on_connection_create_start.append(self.on_phase_start)
+        trace_config.on_connection_create_end.append(self.on_phase_end)
+        trace_config.on_connection_reuseconn.append(
+            self.on_connection_reuseconn
+        )
+        trace_config.on_request_headers_sent.append(self.on_phase_start)
+        trace_config.on_request_chunk_sent.append(self.on_request_chunk_sent)
         trace_config.on_request_end.append(self.response_hook)
-        kwargs["trace_configs"] = [trace_config]
-        wrapped(*args, **kwargs)
+        return trace_config
+
+    async def on_request_start(self, session, trace_config_ctx, params):
+        trace_config_ctx.start_time = time.perf_counter()
+        trace_config_ctx.phase_start_times = {}
+        trace_config_ctx.timings = {}
+        trace_config_ctx.connection_reused = None
+        trace_config_ctx.request_capture = CappedBuffer(self.request_max_len)
+        trace_config_ctx.extra_data = None
+        request_id = get_request_id()
+        trace_request_ctx = trace_config_ctx.trace_request_ctx
+        if trace_request_ctx and trace_request_ctx.get("request_id"):
+            request_id = trace_request_ctx["request_id"]
+        trace_config_ctx.request_id = request_id
+        if (
+            request_id is not None
+            and self.request_id_header
+            and self.request_id_header not in params.headers
+        ):
+            params.headers[self.request_id_header] = str(request_id)
+
+    async def on_phase_start(self, session, trace_config_ctx, params):
+        trace_config_ctx.phase_start_times[
+            PHASES[type(params)]
+        ] = time.perf_counter()
+
+    async def on_phase_end(self, session, trace_config_ctx, params):
+        phase = PHASES[type(params)]
+        if phase == "connect":
+            trace_config_ctx.connection_reused = False
+        self._set_timing(trace_config_ctx, phase)
+
+    async def on_connection_reuseconn(self, session, trace_config_ctx, params):
+        trace_config_ctx.connection_reused = True
+
+    async def on_request_chunk_sent(self, session, trace_config_ctx, params):
+        trace_config_ctx.request_capture._copy(params.chunk)
 
     async def default_request_hook(self, session, trace_config_ctx, params):
         ...
 
+    def should_log(self, trace_config_ctx, params) -> bool:
+        """
+        Record the response in the metrics, if enabled, and decide whether
+        it is logged. Both happen once the response headers arrive.
+        """
+        if self.sampling is None and self.metrics is None:
+            return True
+        start_time = getattr(trace_config_ctx, "start_time", None)
+        duration = (
+            (time.perf_counter() - start_time) * 1000
+            if start_time is not None
+            else None
+        )
+        if self.metrics is not None:
+            request_capture = getattr(
+                trace_config_ctx, "request_capture", None
+            )
+            self.metrics.observe(
+                LoggerNameEnum.APICALL,
+                params.url.host,
+                params.response.status,
+                duration,
+                request_capture and request_capture.total_length,
+                params.response.content_length,
+            )
+        if self.sampling is None:
+            return True
+        return self.sampling.should_log(
+            params.url.host,
+            params.response.status,
+            duration,
+        )
+
     async def default_response_hook(self, session, trace_config_ctx, params):
+        self._set_timing(trace_config_ctx, "wait")
+        if not self.should_log(trace_config_ctx, params):
+            return
         response = params.response
-        request_data, request_id = {}, {}
+        request_data = None
         if trace_config_ctx.trace_request_ctx:
             request_data = trace_config_ctx.trace_request_ctx.pop(
                 "request_data", None
             )
-            request_id = trace_config_ctx.trace_request_ctx.pop(
-                "request_id",
-            )
-        response_data = await response.read()
-        extra_data = {
-            "request_id": request_id,
+            trace_config_ctx.trace_request_ctx.pop("request_id", None)
+        request_capture = trace_config_ctx.request_capture
+        if request_data is None:
+            request_data = request_capture.body
+        trace_config_ctx.response_capture = CappedBuffer(self.response_max_len)
+        trace_config_ctx.extra_data = {
+            "request_id": getattr(trace_config_ctx, "request_id", None),
             "method": response.method,
             "url": str(response.url),
             "status_code": response.status,
             "request_data": self._get_data(request_data, self.request_max_len),
-            "response_data": self._get_data(
-                response_data, self.response_max_len
-            ),
+            "request_size": request_capture.total_length,
+            "connection_reused": trace_config_ctx.connection_reused,
+            "timings": trace_config_ctx.timings,
             "trace_request_ctx": trace_config_ctx.trace_request_ctx,
-            "headers": dict(params.headers),
+            "headers": self.header_filter.filter(params.headers.items()),
         }
+        trace_config_ctx.response = response
+
+        # The body is never read here. The record is written once the
+        # caller has read the body to the end, which comes after the
+        # connection has been released, or when the caller releases the
+        # response without reading it, so what was read is always in the
+        # record. A response without a body is written now.
+        content = response.content
+        if content.at_eof():
+            self.emit(trace_config_ctx)
+        else:
+            response.content = ResponseContentCapture(
+                content,
+                trace_config_ctx.response_capture,
+                functools.partial(self.emit, trace_config_ctx),
+            )
+
+    def emit(self, trace_config_ctx) -> None:
+        """
+        Write the record of ``trace_config_ctx`` unless it was written.
+        """
+        extra_data = trace_config_ctx.extra_data
+        if extra_data is None:
+            return
+        trace_config_ctx.extra_data = None
+        response = trace_config_ctx.response
+        capture = trace_config_ctx.response_capture
+        extra_data["response_data"] = self._get_data(
+            capture.body, self.response_max_len
+        )
+        extra_data["response_size"] = max(
+            capture.total_length, response.content.total_bytes
+        )
+        extra_data["duration"] = (
+            time.perf_counter() - trace_config_ctx.start_time
+        ) * 1000
 
         get_apicall_logger(
             file_path=self.log_path,
@@ -71,6 +320,15 @@ class AioHttpLogger:
             extra_data=extra_data,
         )
 
+    @staticmethod
+    def _set_timing(trace_config_ctx, phase: str) -> None:
+        phase_start_times = getattr(trace_config_ctx, "phase_start_times", {})
+        phase_start_time = phase_start_times.pop(phase, None)
+        if phase_start_time is not None:
+            trace_config_ctx.timings[phase] = (
+                time.perf_counter() - phase_start_time
+            ) * 1000
+
     def _get_data(self, data: typing.Any, max_length: int):
         if data:
             data_length = len(str(data))
@@ -1,25 +1,55 @@
+import functools
+import inspect
+import time
 import typing
 from abc import ABC, abstractmethod
 
 import httpx
+import wrapt
 
-from fastapi_and_logging.enums import LogPathEnum, LogTypeEnum
-from fastapi_and_logging.logging import get_apicall_logger
+from fastapi_and_logging.buffer import CappedBuffer
+from fastapi_and_logging.context import REQUEST_ID_HEADER, get_request_id
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.logging import (
+    apicall_formatter,
+    get_apicall_logger,
+    sink_manager,
+)
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.rotation import RotationPolicy
+from fastapi_and_logging.sampling import SamplingPolicy
+from fastapi_and_logging.writer import BatchWriter
+
+from .stream import (
+    AsyncCaptureStream,
+    SyncCaptureStream,
+    decode_sample,
+    get_content_length,
+)
+from .transport import TransportInstrumentation
+
+START_TIME_EXTENSION = "fastapi_and_logging.start_time"
+REQUEST_ID_EXTENSION = "fastapi_and_logging.request_id"
 
 
 class HTTPXBaseClient(ABC):
     _request_hook: typing.Callable = None
     _response_hook: typing.Callable = None
-    _request_max_len: int = None
-    _response_max_len: int = None
+    _request_max_len: int = 5000
+    _response_max_len: int = 5000
     _log_path: str = LogPathEnum.APICALL
     _log_type: LogTypeEnum = LogTypeEnum.FILE
+    _sampling: SamplingPolicy = None
+    _header_filter: HeaderFilter = HeaderFilter()
+    _request_id_header: typing.Optional[str] = REQUEST_ID_HEADER
+    _metrics: typing.Optional[MetricsRegistry] = None
 
     def __init__(
         self,
         request_id: typing.Any = None,
-        request_max_len: int = _request_max_len,
-        response_max_len: int = _response_max_len,
+        request_max_len: int = None,
+        response_max_len: int = None,
         *args,
         **kwargs,
     ):
@@ -34,6 +64,100 @@ class HTTPXBaseClient(ABC):
     def request_hook(self, request: httpx.Request) -> None:
         pass
 
+    def prepare_request(self, request: httpx.Request) -> typing.Any:
+        """
+        Record the start time and the request ID (the client's own, or the
+        one of the incoming request being served) and propagate the ID in
+        the ``_request_id_header`` header.
+        """
+        request.extensions[START_TIME_EXTENSION] = time.perf_counter()
+        request_id = self.request_id or get_request_id()
+        request.extensions[REQUEST_ID_EXTENSION] = request_id
+        if (
+            request_id is not None
+            and self._request_id_header
+            and self._request_id_header not in request.headers
+        ):
+            request.headers[self._request_id_header] = str(request_id)
+        return request_id
+
+    def should_log(self, response: httpx.Response) -> bool:
+        """
+        Record the response in the metrics, if enabled, and decide whether
+        it is logged. Both happen once the response headers arrive.
+        """
+        if self._sampling is None and self._metrics is None:
+            return True
+        start_time = response.request.extensions.get(START_TIME_EXTENSION)
+        duration = (
+            (time.perf_counter() - start_time) * 1000
+            if start_time is not None
+            else None
+        )
+        if self._metrics is not None:
+            self._metrics.observe(
+                LoggerNameEnum.APICALL,
+                response.request.url.host,
+                response.status_code,
+                duration,
+                get_content_length(response.request.headers),
+                get_content_length(response.headers),
+            )
+        if self._sampling is None:
+            return True
+        return self._sampling.should_log(
+            response.request.url.host,
+            response.status_code,
+            duration,
+        )
+
+    def get_request_max_len(self) -> int:
+        return self.request_max_len or type(self)._request_max_len
+
+    def get_response_max_len(self) -> int:
+        return self.response_max_len or type(self)._response_max_len
+
+    def capture_content(self, response: httpx.Response) -> CappedBuffer:
+        """
+        Capture a body that was already loaded with the response, as done
+        for in-memory content.
+        """
+        capture = CappedBuffer(self.get_response_max_len())
+        capture._copy(response.content)
+        return capture
+
+    def build_extra_data(
+        self,
+        response: httpx.Response,
+        capture: CappedBuffer,
+    ) -> dict:
+        start_time = response.request.extensions.get(START_TIME_EXTENSION)
+        response_max_len = self.get_response_max_len()
+        body = decode_sample(
+            capture.body, response.headers.get("content-encoding", "")
+        )
+        return {
+            "request_id": response.request.extensions.get(
+                REQUEST_ID_EXTENSION, self.request_id
+            ),
+            "method": response.request.method,
+            "url": response.request.url,
+            "status_code": response.status_code,
+            "request_data": str(response.request.content)[
+                : self.get_request_max_len()
+            ],
+            "response_data": str(body)[:response_max_len],
+            "response_size": capture.total_length,
+            "duration": (
+                (time.perf_counter() - start_time) * 1000
+                if start_time is not None
+                else None
+            ),
+            "headers": self._header_filter.filter(
+                response.request.headers.raw
+            ),
+        }
+
     @abstractmethod
     def response_hook(self, response: httpx.Response) -> None:
         pass
@@ -41,30 +165,30 @@ class HTTPXBaseClient(ABC):
 
 class HTTPXClient(HTTPXBaseClient, httpx.Client):
     def request_hook(self, request: httpx.Request) -> None:
+        request_id = self.prepare_request(request)
         if callable(HTTPXClient._request_hook):
-            HTTPXClient._request_hook(request, self.request_id)
+            HTTPXClient._request_hook(request, request_id)
 
     def response_hook(self, response: httpx.Response) -> None:
-        request_max_len = (
-            self.request_max_len
-            if self.request_max_len
-            else HTTPXClient._request_max_len
-        )
-        response_max_len = (
-            self.response_max_len
-            if self.response_max_len
-            else HTTPXClient._response_max_len
+        if not self.should_log(response):
+            return
+        if response.is_closed:
+            self.log_response(response, self.capture_content(response))
+            return
+        # The record is written when the response is closed, after the
+        # caller has read (or streamed) the body.
+        response.stream = SyncCaptureStream(
+            response.stream,
+            self.get_response_max_len(),
+            functools.partial(self.log_response, response),
         )
 
-        extra_data = {
-            "request_id": self.request_id,
-            "method": response.request.method,
-            "url": response.request.url,
-            "status_code": response.status_code,
-            "request_data": str(response.request.content)[:request_max_len],
-            "response_data": str(response.read())[:response_max_len],
-            "headers": dict(response.request.headers),
-        }
+    def log_response(
+        self,
+        response: httpx.Response,
+        capture: SyncCaptureStream,
+    ) -> None:
+        extra_data = self.build_extra_data(response, capture)
 
         if callable(HTTPXClient._response_hook):
             HTTPXClient._response_hook(response, extra_data)
@@ -81,37 +205,37 @@ class HTTPXAsyncClient(HTTPXBaseClient, httpx.AsyncClient):
     _response_hook: typing.Callable[..., typing.Coroutine] = None
 
     async def request_hook(self, request: httpx.Request) -> None:
+        request_id = self.prepare_request(request)
         if callable(HTTPXAsyncClient._request_hook):
-            HTTPXAsyncClient._request_hook(request, self.request_id)
+            HTTPXAsyncClient._request_hook(request, request_id)
 
     async def response_hook(self, response: httpx.Response) -> None:
-        request_max_len = (
-            self.request_max_len
-            if self.request_max_len
-            else HTTPXClient._request_max_len
-        )
-        response_max_len = (
-            self.response_max_len
-            if self.response_max_len
-            else HTTPXClient._response_max_len
+        if not self.should_log(response):
+            return
+        if response.is_closed:
+            await self.log_response(response, self.capture_content(response))
+            return
+        response.stream = AsyncCaptureStream(
+            response.stream,
+            self.get_response_max_len(),
+            functools.partial(self.log_response, response),
         )
 
-        extra_data = {
-            "request_id": self.request_id,
-            "method": response.request.method,
-            "url": response.request.url,
-            "status_code": response.status_code,
-            "request_data": str(response.request.content)[:request_max_len],
-            "response_data": str(await response.aread())[:response_max_len],
-            "headers": dict(response.request.headers),
-        }
+    async def log_response(
+        self,
+        response: httpx.Response,
+        capture: AsyncCaptureStream,
+    ) -> None:
+        extra_data = self.build_extra_data(response, capture)
 
         if callable(HTTPXAsyncClient._response_hook):
-            HTTPXAsyncClient._response_hook(response, extra_data)
+            result = HTTPXAsyncClient._response_hook(response, extra_data)
+            if inspect.isawaitable(result):
+                await result
 
         get_apicall_logger(
-            file_path=HTTPXClient._log_path,
-            log_type=HTTPXClient._log_type,
+            file_path=HTTPXAsyncClient._log_path,
+            log_type=HTTPXAsyncClient._log_type,
             extra_data=extra_data,
         )
 
@@ -131,7 +255,41 @@ class HTTPXLogger:
         response_max_len: int = 5000,
         log_path: str = LogPathEnum.APICALL,
         log_type: LogTypeEnum = LogTypeEnum.FILE,
+        writer: typing.Optional[BatchWriter] = None,
+        sampling: typing.Optional[SamplingPolicy] = None,
+        header_filter: typing.Optional[HeaderFilter] = None,
+        instrument_transport: bool = False,
+        request_id_header: typing.Optional[str] = REQUEST_ID_HEADER,
+        rotation: typing.Optional[RotationPolicy] = None,
+        metrics: typing.Optional[MetricsRegistry] = None,
     ):
+        sink_manager.register(
+            LoggerNameEnum.APICALL,
+            file_path=log_path,
+            log_type=log_type,
+            writer=writer,
+            rotation=rotation,
+            enqueue=True,
+            format=apicall_formatter,
+        )
+        header_filter = header_filter or HeaderFilter()
+        if instrument_transport:
+            self.instrument_transport(
+                sync_client,
+                async_client,
+                TransportInstrumentation(
+                    request_max_len=request_max_len,
+                    response_max_len=response_max_len,
+                    log_path=log_path,
+                    log_type=log_type,
+                    sampling=sampling,
+                    header_filter=header_filter,
+                    request_id_header=request_id_header,
+                    metrics=metrics,
+                ),
+            )
+            return
+
         if sync_client:
             HTTPXClient._request_hook = request_hook
             HTTPXClient._response_hook = response_hook
@@ -139,6 +297,10 @@ class HTTPXLogger:
             HTTPXClient._response_max_len = response_max_len
             HTTPXClient._log_path = log_path
             HTTPXClient._log_type = log_type
+            HTTPXClient._sampling = sampling
+            HTTPXClient._header_filter = header_filter
+            HTTPXClient._request_id_header = request_id_header
+            HTTPXClient._metrics = metrics
             httpx.Client = HTTPXClient
 
         if async_client:
@@ -148,4 +310,52 @@ class HTTPXLogger:
             HTTPXAsyncClient._response_max_len = response_max_len
             HTTPXAsyncClient._log_path = log_path
             HTTPXAsyncClient._log_type = log_type
+            HTTPXAsyncClient._sampling = sampling
+            HTTPXAsyncClient._header_filter = header_filter
+            HTTPXAsyncClient._request_id_header = request_id_header
+            HTTPXAsyncClient._metrics = metrics
             httpx.AsyncClient = HTTPXAsyncClient
+
+    @staticmethod
+    def instrument_transport(
+        sync_client: bool,
+        async_client: bool,
+        instrumentation: TransportInstrumentation,
+    ) -> None:
+        """
+        Wrap the default httpx transports instead of replacing the client
+        classes, so clients created before setup (or imported with
+        ``from httpx import Client``) are logged as well. A previous
+        instrumentation is removed first, so a request is never logged
+        twice.
+        """
+        HTTPXLogger.uninstrument_transport()
+        if sync_client:
+            wrapt.wrap_function_wrapper(
+                httpx.HTTPTransport,
+                "handle_request",
+                instrumentation.wrap_request,
+            )
+        if async_client:
+            wrapt.wrap_function_wrapper(
+                httpx.AsyncHTTPTransport,
+                "handle_async_request",
+                instrumentation.wrap_async_request,
+            )
+
+    @staticmethod
+    def uninstrument_transport() -> None:
+        """
+        Restore the transport methods wrapped by ``instrument_transport``.
+        Wrappers installed by other libraries are left alone.
+        """
+        for transport_class, name in (
+            (httpx.HTTPTransport, "handle_request"),
+            (httpx.AsyncHTTPTransport, "handle_async_request"),
+        ):
+            method = vars(transport_class).get(name)
+            if isinstance(method, wrapt.FunctionWrapper) and isinstance(
+                getattr(method._self_wrapper, "__self__", None),
+                TransportInstrumentation,
+            ):
+                setattr(transport_class, name, method.__wrapped__)
@@ -0,0 +1,97 @@
+import typing
+import zlib
+
+import httpx
+
+from fastapi_and_logging.buffer import CappedBuffer
+
+
+def get_content_length(headers: typing.Mapping) -> typing.Optional[int]:
+    length = headers.get("content-length")
+    try:
+        return int(length) if length is not None else None
+    except ValueError:
+        return None
+
+
+def decode_sample(body: bytes, content_encoding: str) -> bytes:
+    """
+    Decompress the captured head of a gzip or deflate encoded body. Other
+    encodings, and heads that cannot be decoded, are returned unchanged.
+    """
+    wbits = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}.get(
+        content_encoding.strip().lower()
+    )
+    if wbits is None or not body:
+        return body
+    try:
+        return zlib.decompressobj(wbits).decompress(body)
+    except zlib.error:
+        return body
+
+
+class SyncCaptureStream(CappedBuffer, httpx.SyncByteStream):
+    """
+    Wraps the byte stream of an httpx response and copies at most
+    ``max_len`` bytes of it while the caller reads the body, so the log
+    never forces the body into memory. ``on_close`` is called with the
+    capture once the response is closed.
+    """
+
+    __slots__ = ("stream", "on_close", "closed")
+
+    def __init__(
+        self,
+        stream: httpx.SyncByteStream,
+        max_len: int,
+        on_close: typing.Callable[["SyncCaptureStream"], None],
+    ) -> None:
+        super().__init__(max_len)
+        self.stream = stream
+        self.on_close = on_close
+        self.closed = False
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        for chunk in self.stream:
+            self._copy(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            if not self.closed:
+                self.closed = True
+                self.on_close(self)
+
+
+class AsyncCaptureStream(CappedBuffer, httpx.AsyncByteStream):
+    """
+    Async counterpart of ``SyncCaptureStream``; ``on_close`` is awaited.
+    """
+
+    __slots__ = ("stream", "on_close", "closed")
+
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        max_len: int,
+        on_close: typing.Callable[..., typing.Coroutine],
+    ) -> None:
+        super().__init__(max_len)
+        self.stream = stream
+        self.on_close = on_close
+        self.closed = False
+
+    async def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            self._copy(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.closed:
+                self.closed = True
+                await self.on_close(self)
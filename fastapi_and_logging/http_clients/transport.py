@@ -0,0 +1,323 @@
+import functools
+import time
+import typing
+
+import httpx
+
+from fastapi_and_logging.buffer import CappedBuffer
+from fastapi_and_logging.context import REQUEST_ID_HEADER, get_request_id
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.headers import HeaderFilter
+from fastapi_and_logging.logging import (
+    apicall_formatter,
+    get_apicall_logger,
+    sink_manager,
+)
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.sampling import SamplingPolicy
+
+from .stream import (
+    AsyncCaptureStream,
+    SyncCaptureStream,
+    decode_sample,
+    get_content_length,
+)
+
+# httpcore trace events are named "<scope>.<phase>.<started|complete>".
+TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "connect_unix_socket": "connect",
+    "start_tls": "tls",
+    "receive_response_headers": "wait",
+}
+
+
+class ConnectionTrace:
+    """
+    httpcore ``trace`` extension recording the connect, TLS and wait
+    (request sent to response headers) phases in milliseconds. A request
+    sent over a pooled connection has no connect phase. A ``trace``
+    already set on the request is still called.
+    """
+
+    __slots__ = ("timings", "_started", "_trace")
+
+    def __init__(self, trace: typing.Optional[typing.Callable] = None):
+        self.timings: typing.Dict[str, float] = {}
+        self._started: typing.Dict[str, float] = {}
+        self._trace = trace
+
+    @property
+    def connection_reused(self) -> typing.Optional[bool]:
+        # None when the transport emits no trace events (e.g. mocks).
+        if not self.timings:
+            return None
+        return "connect" not in self.timings
+
+    def __call__(self, event_name: str, info: dict) -> None:
+        self.record(event_name)
+        if self._trace is not None:
+            self._trace(event_name, info)
+
+    def record(self, event_name: str) -> None:
+        name, _, stage = event_name.rpartition(".")
+        phase = TRACE_PHASES.get(name.rpartition(".")[2])
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[phase] = time.perf_counter()
+        elif stage == "complete" and phase in self._started:
+            self.timings[phase] = (
+                time.perf_counter() - self._started.pop(phase)
+            ) * 1000
+
+
+class AsyncConnectionTrace(ConnectionTrace):
+    __slots__ = ()
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        self.record(event_name)
+        if self._trace is not None:
+            await self._trace(event_name, info)
+
+
+class TransportInstrumentation:
+    """
+    Logs the requests going through an httpx transport: method, URL,
+    status, request and response sizes, a capped response sample, the
+    connection phases and whether a pooled connection was reused. The body
+    is captured while the caller reads it and the record is written when
+    the response is closed. Connection pooling is left to the wrapped
+    transport.
+    """
+
+    def __init__(
+        self,
+        request_max_len: int = 5000,
+        response_max_len: int = 5000,
+        log_path: str = LogPathEnum.APICALL,
+        log_type: LogTypeEnum = LogTypeEnum.FILE,
+        sampling: typing.Optional[SamplingPolicy] = None,
+        header_filter: typing.Optional[HeaderFilter] = None,
+        request_id_header: typing.Optional[str] = REQUEST_ID_HEADER,
+        metrics: typing.Optional[MetricsRegistry] = None,
+    ) -> None:
+        self.request_max_len = request_max_len
+        self.response_max_len = response_max_len
+        self.log_path = log_path
+        self.log_type = log_type
+        self.sampling = sampling
+        self.header_filter = header_filter or HeaderFilter()
+        self.request_id_header = request_id_header
+        self.metrics = metrics
+
+    def prepare_request(self, request: httpx.Request) -> typing.Optional[str]:
+        request_id = get_request_id()
+        if (
+            request_id is not None
+            and self.request_id_header
+            and self.request_id_header not in request.headers
+        ):
+            request.headers[self.request_id_header] = request_id
+        return request_id
+
+    def handle_request(
+        self,
+        handle_request: typing.Callable[[httpx.Request], httpx.Response],
+        request: httpx.Request,
+    ) -> httpx.Response:
+        request_id = self.prepare_request(request)
+        trace = ConnectionTrace(request.extensions.get("trace"))
+        request.extensions["trace"] = trace
+        start_time = time.perf_counter()
+        response = handle_request(request)
+        on_close = functools.partial(
+            self.log_response,
+            request,
+            response,
+            request_id,
+            trace,
+            start_time,
+        )
+        if response.is_closed:
+            on_close(self.capture_content(response))
+        else:
+            response.stream = SyncCaptureStream(
+                response.stream, self.response_max_len, on_close
+            )
+        return response
+
+    async def handle_async_request(
+        self,
+        handle_async_request: typing.Callable[..., typing.Coroutine],
+        request: httpx.Request,
+    ) -> httpx.Response:
+        request_id = self.prepare_request(request)
+        trace = AsyncConnectionTrace(request.extensions.get("trace"))
+        request.extensions["trace"] = trace
+        start_time = time.perf_counter()
+        response = await handle_async_request(request)
+        on_close = functools.partial(
+            self.log_response,
+            request,
+            response,
+            request_id,
+            trace,
+            start_time,
+        )
+        if response.is_closed:
+            on_close(self.capture_content(response))
+        else:
+            response.stream = AsyncCaptureStream(
+                response.stream, self.response_max_len, self.alog(on_close)
+            )
+        return response
+
+    def wrap_request(self, wrapped, instance, args, kwargs):
+        return self.handle_request(wrapped, *args, **kwargs)
+
+    def wrap_async_request(self, wrapped, instance, args, kwargs):
+        return self.handle_async_request(wrapped, *args, **kwargs)
+
+    @staticmethod
+    def alog(
+        on_close: typing.Callable[[CappedBuffer], None],
+    ) -> typing.Callable[..., typing.Coroutine]:
+        async def log(capture: CappedBuffer) -> None:
+            on_close(capture)
+
+        return log
+
+    def capture_content(self, response: httpx.Response) -> CappedBuffer:
+        capture = CappedBuffer(self.response_max_len)
+        capture._copy(response.content)
+        return capture
+
+    def get_request_data(
+        self, request: httpx.Request
+    ) -> typing.Tuple[typing.Optional[bytes], typing.Optional[int]]:
+        try:
+            content = request.content
+        except httpx.RequestNotRead:
+            # Streamed upload; only the declared length is known.
+            length = request.headers.get("content-length")
+            return None, int(length) if length is not None else None
+        return content[: self.request_max_len], len(content)
+
+    def log_response(
+        self,
+        request: httpx.Request,
+        response: httpx.Response,
+        request_id: typing.Optional[str],
+        trace: ConnectionTrace,
+        start_time: float,
+        capture: CappedBuffer,
+    ) -> None:
+        duration = (time.perf_counter() - start_time) * 1000
+        if self.metrics is not None:
+            self.metrics.observe(
+                LoggerNameEnum.APICALL,
+                request.url.host,
+                response.status_code,
+                duration,
+                get_content_length(request.headers),
+                capture.total_length,
+            )
+        if self.sampling is not None and not self.sampling.should_log(
+            request.url.host, response.status_code, duration
+        ):
+            return
+        request_data, request_size = self.get_request_data(request)
+        response_data = decode_sample(
+            capture.body, response.headers.get("content-encoding", "")
+        )
+        get_apicall_logger(
+            file_path=self.log_path,
+            log_type=self.log_type,
+            extra_data={
+                "request_id": request_id,
+                "method": request.method,
+                "url": str(request.url),
+                "status_code": response.status_code,
+                "request_data": (
+                    str(request_data)[: self.request_max_len]
+                    if request_data is not None
+                    else None
+                ),
+                "request_size": request_size,
+                "response_data": str(response_data)[: self.response_max_len],
+                "response_size": capture.total_length,
+                "duration": duration,
+                "connection_reused": trace.connection_reused,
+                "timings": trace.timings,
+                "headers": self.header_filter.filter(request.headers.raw),
+            },
+        )
+
+
+class LoggingTransport(httpx.BaseTransport):
+    """
+    Transport logging every request sent through ``transport`` (a new
+    ``httpx.HTTPTransport`` by default)::
+
+        httpx.Client(transport=LoggingTransport())
+    """
+
+    def __init__(
+        self,
+        transport: typing.Optional[httpx.BaseTransport] = None,
+        instrumentation: typing.Optional[TransportInstrumentation] = None,
+        **kwargs,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        if instrumentation is None:
+            instrumentation = TransportInstrumentation(**kwargs)
+            register_sink(instrumentation)
+        self.instrumentation = instrumentation
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.instrumentation.handle_request(
+            self.transport.handle_request, request
+        )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncLoggingTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of ``LoggingTransport`` wrapping an
+    ``httpx.AsyncHTTPTransport`` by default.
+    """
+
+    def __init__(
+        self,
+        transport: typing.Optional[httpx.AsyncBaseTransport] = None,
+        instrumentation: typing.Optional[TransportInstrumentation] = None,
+        **kwargs,
+    ) -> None:
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        if instrumentation is None:
+            instrumentation = TransportInstrumentation(**kwargs)
+            register_sink(instrumentation)
+        self.instrumentation = instrumentation
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        return await self.instrumentation.handle_async_request(
+            self.transport.handle_async_request, request
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def register_sink(instrumentation: TransportInstrumentation) -> None:
+    sink_manager.register(
+        LoggerNameEnum.APICALL,
+        file_path=instrumentation.log_path,
+        log_type=instrumentation.log_type,
+        enqueue=True,
+        format=apicall_formatter,
+    )
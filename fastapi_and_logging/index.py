@@ -0,0 +1,416 @@
+"""
+Sidecar indexes for the log files written by this package and queries
+joining the incoming, API-call and exception records of a request::
+
+    python -m fastapi_and_logging index incoming.log apicall.log
+    python -m fastapi_and_logging query --request-id <id>
+    python -m fastapi_and_logging query --since 2024-01-01T12:00 \\
+        --until 2024-01-01T12:05
+
+The index of ``incoming.log`` is ``incoming.log.idx``. It holds the
+request ID hashes of the records with their offsets, sorted so a lookup is
+a binary search over the memory-mapped index, and one offset range per
+minute of record time. It is updated incrementally as the log grows and
+rebuilt when the log was rotated or truncated.
+"""
+import array
+import bisect
+import datetime
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import typing
+
+from fastapi_and_logging.binary import (
+    READ_SIZE,
+    decode_frame_at,
+    decode_payload,
+    is_binary,
+    iter_frames,
+    loads_line,
+)
+from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"FALIDX1" + (b"<" if sys.byteorder == "little" else b">")
+# magic, inode, indexed size, binary, request ID entries, minute buckets
+INDEX_HEADER = struct.Struct("=8sQQQQQ")
+
+
+def hash_request_id(request_id: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(request_id.encode("utf-8"), digest_size=8).digest(),
+        "little",
+    )
+
+
+def get_record_time(record: dict) -> typing.Optional[float]:
+    """
+    Epoch time of a record: ``request_time`` of incoming records and
+    ``error_time`` of exception records. API-call records have none.
+    """
+    request_time = record.get("request_time")
+    if isinstance(request_time, (int, float)):
+        return float(request_time)
+    error_time = record.get("error_time")
+    if isinstance(error_time, str):
+        try:
+            return datetime.datetime.fromisoformat(error_time).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_time(value: str) -> float:
+    """
+    Epoch seconds or an ISO 8601 date/time in local time.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class _Hashes:
+    """
+    Sequence view of the hashes of interleaved ``(hash, offset)`` entries,
+    for ``bisect``.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: memoryview) -> None:
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries) // 2
+
+    def __getitem__(self, index: int) -> int:
+        return self.entries[index * 2]
+
+
+class LogIndex:
+    """
+    Index of one log file. ``update()`` builds or extends the sidecar file;
+    ``find()`` and ``between()`` read records through mmap.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        index_path: typing.Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.binary = False
+        self.buckets: typing.Dict[int, typing.List[int]] = {}
+        self._entries: typing.Optional[memoryview] = None
+        self._index_map: typing.Optional[mmap.mmap] = None
+        self._log_map: typing.Optional[mmap.mmap] = None
+
+    def __enter__(self) -> "LogIndex":
+        self.update()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._entries is not None:
+            self._entries.release()
+            self._entries = None
+        for mapped in (self._index_map, self._log_map):
+            if mapped is not None:
+                mapped.close()
+        self._index_map = self._log_map = None
+
+    def update(self) -> dict:
+        """
+        Index the records appended since the last update, or the whole
+        file if it was replaced. Returns ``{"indexed": ..., "records": ...}``
+        with the number of newly indexed records.
+        """
+        self.close()
+        stat = os.stat(self.path)
+        header = self._read_header()
+        if header is not None and (
+            header["inode"] != stat.st_ino or header["size"] > stat.st_size
+        ):
+            header = None
+
+        if header is None:
+            start = 0
+            entries = array.array("Q")
+            self.buckets = {}
+        else:
+            start = header["size"]
+            entries, self.buckets = self._load(header)
+        self.binary = self._is_binary() if start == 0 else header["binary"]
+
+        new_entries = array.array("Q")
+        end = start
+        for offset, length, record in self._scan(start):
+            end = offset + length
+            request_id = record.get("request_id")
+            if request_id:
+                new_entries.append(hash_request_id(str(request_id)))
+                new_entries.append(offset)
+            record_time = get_record_time(record)
+            if record_time is not None:
+                bucket = self.buckets.setdefault(
+                    int(record_time // 60), [offset, end]
+                )
+                bucket[0] = min(bucket[0], offset)
+                bucket[1] = max(bucket[1], end)
+
+        if end > start or header is None:
+            if new_entries:
+                entries = self._merge(entries, new_entries)
+            self._write(stat.st_ino, end, entries)
+        return {"indexed": end, "records": len(new_entries) // 2}
+
+    def find(self, request_id: str) -> typing.List[dict]:
+        """
+        Records with the given request ID, in file order.
+        """
+        self._open()
+        hashes = _Hashes(self._entries)
+        key = hash_request_id(request_id)
+        index = bisect.bisect_left(hashes, key)
+        offsets = []
+        while index < len(hashes) and hashes[index] == key:
+            offsets.append(self._entries[index * 2 + 1])
+            index += 1
+        records = [self._read_at(offset) for offset in sorted(offsets)]
+        # Different request IDs can share a hash.
+        return [
+            record
+            for record in records
+            if str(record.get("request_id")) == request_id
+        ]
+
+    def between(
+        self,
+        since: typing.Optional[float] = None,
+        until: typing.Optional[float] = None,
+    ) -> typing.Iterator[dict]:
+        """
+        Records whose time is in ``[since, until)``.
+        """
+        self._open()
+        first = None if since is None else int(since // 60)
+        last = None if until is None else int(until // 60)
+        ranges = sorted(
+            (start, end)
+            for minute, (start, end) in self.buckets.items()
+            if (first is None or minute >= first)
+            and (last is None or minute <= last)
+        )
+        merged: typing.List[typing.List[int]] = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        for start, end in merged:
+            for _offset, _, record in self._scan(start, end):
+                record_time = get_record_time(record)
+                if record_time is None:
+                    continue
+                if since is not None and record_time < since:
+                    continue
+                if until is not None and record_time >= until:
+                    continue
+                yield record
+
+    def _is_binary(self) -> bool:
+        with open(self.path, "rb") as file:
+            return is_binary(file)
+
+    def _scan(
+        self,
+        start: int,
+        end: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, int, dict]]:
+        """
+        ``(offset, length, record)`` of the complete records from ``start``.
+        """
+        with open(self.path, "rb", buffering=READ_SIZE) as file:
+            file.seek(start)
+            if self.binary:
+                for offset, encoding, payload in iter_frames(file, start):
+                    if end is not None and offset >= end:
+                        return
+                    yield (
+                        offset,
+                        len(payload) + 5,
+                        decode_payload(encoding, payload),
+                    )
+                return
+            offset = start
+            for line in file:
+                if not line.endswith(b"\n") or (
+                    end is not None and offset >= end
+                ):
+                    return
+                yield offset, len(line), loads_line(line)
+                offset += len(line)
+
+    def _read_at(self, offset: int) -> dict:
+        data = self._log_map
+        if self.binary:
+            return decode_frame_at(data, offset)
+        end = data.find(b"\n", offset)
+        return loads_line(data[offset:end])
+
+    def _open(self) -> None:
+        if self._index_map is not None:
+            return
+        header = self._read_header()
+        if header is None:
+            self.update()
+            header = self._read_header()
+        self.binary = header["binary"]
+        self.buckets = self._load_buckets(header)
+        with open(self.index_path, "rb") as file:
+            self._index_map = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        start = INDEX_HEADER.size
+        self._entries = memoryview(self._index_map)[
+            start : start + header["entries"] * 16
+        ].cast("Q")
+        if header["size"]:
+            with open(self.path, "rb") as file:
+                self._log_map = mmap.mmap(
+                    file.fileno(), header["size"], access=mmap.ACCESS_READ
+                )
+        else:
+            self._log_map = b""
+
+    def _read_header(self) -> typing.Optional[dict]:
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read(INDEX_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(data) < INDEX_HEADER.size:
+            return None
+        magic, inode, size, binary, entries, buckets = INDEX_HEADER.unpack(
+            data
+        )
+        if magic != INDEX_MAGIC:
+            return None
+        return {
+            "inode": inode,
+            "size": size,
+            "binary": bool(binary),
+            "entries": entries,
+            "buckets": buckets,
+        }
+
+    def _load(self, header: dict) -> typing.Tuple[array.array, dict]:
+        entries = array.array("Q")
+        with open(self.index_path, "rb") as file:
+            file.seek(INDEX_HEADER.size)
+            entries.fromfile(file, header["entries"] * 2)
+        return entries, self._load_buckets(header)
+
+    def _load_buckets(self, header: dict) -> dict:
+        buckets = array.array("q")
+        with open(self.index_path, "rb") as file:
+            file.seek(INDEX_HEADER.size + header["entries"] * 16)
+            buckets.fromfile(file, header["buckets"] * 3)
+        return {
+            buckets[index]: [buckets[index + 1], buckets[index + 2]]
+            for index in range(0, len(buckets), 3)
+        }
+
+    @staticmethod
+    def _merge(entries: array.array, new_entries: array.array) -> array.array:
+        pairs = sorted(
+            zip(
+                entries[0::2] + new_entries[0::2],
+                entries[1::2] + new_entries[1::2],
+            )
+        )
+        merged = array.array("Q", bytes(len(pairs) * 16))
+        merged[0::2] = array.array("Q", (pair[0] for pair in pairs))
+        merged[1::2] = array.array("Q", (pair[1] for pair in pairs))
+        return merged
+
+    def _write(self, inode: int, size: int, entries: array.array) -> None:
+        buckets = array.array("q")
+        for minute in sorted(self.buckets):
+            buckets.extend((minute, *self.buckets[minute]))
+        partial_path = self.index_path + ".part"
+        with open(partial_path, "wb") as file:
+            file.write(
+                INDEX_HEADER.pack(
+                    INDEX_MAGIC,
+                    inode,
+                    size,
+                    self.binary,
+                    len(entries) // 2,
+                    len(self.buckets),
+                )
+            )
+            entries.tofile(file)
+            buckets.tofile(file)
+        os.replace(partial_path, self.index_path)
+
+
+def query(
+    paths: typing.Dict[str, str],
+    request_id: typing.Optional[str] = None,
+    since: typing.Optional[float] = None,
+    until: typing.Optional[float] = None,
+) -> typing.Dict[str, typing.List[dict]]:
+    """
+    Records of the given logs (``{name: path}``) for a request ID, or for
+    a time window. Records of logs without record times (API calls) are
+    joined to the window by the request IDs of the other logs' records.
+    """
+    results: typing.Dict[str, typing.List[dict]] = {name: [] for name in paths}
+    indexes = {}
+    try:
+        for name, path in paths.items():
+            if os.path.exists(path):
+                indexes[name] = LogIndex(path)
+                indexes[name].update()
+        if since is None and until is None:
+            for name, index in indexes.items():
+                results[name] = index.find(request_id)
+            return results
+
+        request_ids = set()
+        for name, index in indexes.items():
+            if not index.buckets:
+                continue
+            for record in index.between(since, until):
+                if request_id and record.get("request_id") != request_id:
+                    continue
+                results[name].append(record)
+                if record.get("request_id"):
+                    request_ids.add(str(record["request_id"]))
+        for name, index in indexes.items():
+            if index.buckets:
+                continue
+            for found_id in sorted(request_ids):
+                results[name].extend(index.find(found_id))
+        return results
+    finally:
+        for index in indexes.values():
+            index.close()
+
+
+def get_default_paths(directory: str = ".") -> typing.Dict[str, str]:
+    return {
+        LoggerNameEnum.INCOMING: os.path.join(directory, LogPathEnum.INCOMING),
+        LoggerNameEnum.APICALL: os.path.join(directory, LogPathEnum.APICALL),
+        LoggerNameEnum.EXCEPTION: os.path.join(
+            directory, LogPathEnum.EXCEPTION
+        ),
+    }
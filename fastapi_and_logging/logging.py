@@ -1,23 +1,233 @@
-import json
+import functools
+import sys
+import threading
+import typing
 
 from loguru import logger
 
-from fastapi_and_logging.enums import LoggerNameEnum, LogPathEnum, LogTypeEnum
+from fastapi_and_logging.enums import (
+    LoggerNameEnum,
+    LogPathEnum,
+    LogTypeEnum,
+    SerializerEnum,
+)
+from fastapi_and_logging.network import NetworkTopic
+from fastapi_and_logging.rotation import RotationPolicy
+from fastapi_and_logging.serializers import BaseSerializer, get_serializer
+from fastapi_and_logging.writer import BatchWriter
+
+# A network sink is the writer's view of one logger's topic.
+WriterSink = typing.Union[BatchWriter, NetworkTopic]
+
+
+class SinkManager:
+    """
+    Keeps one loguru sink per (logger name, file path, log type).
+
+    Sinks are added the first time a key is seen and reused afterwards, so
+    emitting a record never reopens the log file or starts a new enqueue
+    worker. Records are routed to their sink by the ``name`` and
+    ``log_path`` values bound on the logger. File sinks can be backed by a
+    ``BatchWriter`` instead of loguru's own file handler.
+    """
+
+    def __init__(self) -> None:
+        self.serializer: BaseSerializer = get_serializer()
+        self._handlers: dict[tuple, int] = {}
+        self._loggers: dict[tuple, typing.Any] = {}
+        self._writers: dict[tuple, WriterSink] = {}
+        self._lock = threading.Lock()
+        self._default_handler_removed = False
+
+    @staticmethod
+    def get_key(name: str, file_path: str, log_type: LogTypeEnum) -> tuple:
+        if log_type == LogTypeEnum.CONSOLE:
+            file_path = None
+        return (str(name), file_path and str(file_path), str(log_type))
+
+    def register(
+        self,
+        name: str,
+        file_path: str,
+        log_type: LogTypeEnum = LogTypeEnum.FILE,
+        writer: typing.Optional[BatchWriter] = None,
+        rotation: typing.Optional[RotationPolicy] = None,
+        **kwargs,
+    ) -> int:
+        """
+        Add the sink for the given key unless it already exists. ``kwargs``
+        are passed to ``logger.add`` and only apply on first registration.
+        If ``writer`` is given, file records are handed to it instead of
+        being written by loguru; network sinks need a ``NetworkWriter``.
+        ``rotation`` applies to file sinks; a writer that has its own
+        rotation policy keeps it.
+        """
+        key = self.get_key(name, file_path, log_type)
+        handler_id = self._handlers.get(key)
+        if handler_id is not None:
+            return handler_id
+
+        with self._lock:
+            if key in self._handlers:
+                return self._handlers[key]
+            self._remove_default_handler()
+            if log_type == LogTypeEnum.CONSOLE:
+                kwargs.pop("format", None)
+                sink = sys.stderr
+            elif log_type == LogTypeEnum.NETWORK:
+                if writer is None:
+                    raise ValueError(
+                        "LogTypeEnum.NETWORK needs a NetworkWriter as writer"
+                    )
+                kwargs["enqueue"] = False
+                sink = writer.get_topic(name)
+                self._writers[key] = sink
+            elif writer is not None:
+                kwargs["enqueue"] = False
+                sink = writer
+                if writer.rotation is None:
+                    writer.rotation = rotation
+                self._writers[key] = writer
+            else:
+                sink = key[1]
+                if rotation is not None:
+                    kwargs.update(rotation.loguru_options(key[1]))
+            handler_id = logger.add(
+                sink,
+                filter=self._build_filter(key),
+                **kwargs,
+            )
+            self._loggers[key] = logger.bind(name=key[0], log_path=key[1])
+            self._handlers[key] = handler_id
+        return handler_id
+
+    def get_logger(
+        self,
+        name: str,
+        file_path: str,
+        log_type: LogTypeEnum = LogTypeEnum.FILE,
+        **kwargs,
+    ):
+        key = self.get_key(name, file_path, log_type)
+        bound_logger = self._loggers.get(key)
+        if bound_logger is None:
+            self.register(name, file_path, log_type, **kwargs)
+            bound_logger = self._loggers[key]
+        return bound_logger
+
+    def get_writer(
+        self,
+        name: str,
+        file_path: str,
+        log_type: LogTypeEnum = LogTypeEnum.FILE,
+    ) -> typing.Optional[WriterSink]:
+        """
+        ``BatchWriter`` of a file sink, or the ``NetworkTopic`` of a network
+        sink; ``None`` for loguru sinks.
+        """
+        return self._writers.get(self.get_key(name, file_path, log_type))
+
+    def set_serializer(
+        self,
+        backend: SerializerEnum = SerializerEnum.AUTO,
+    ) -> BaseSerializer:
+        self.serializer = get_serializer(backend)
+        return self.serializer
+
+    def remove(self, name: str, file_path: str, log_type: LogTypeEnum):
+        key = self.get_key(name, file_path, log_type)
+        with self._lock:
+            handler_id = self._handlers.pop(key, None)
+            self._loggers.pop(key, None)
+            self._writers.pop(key, None)
+        if handler_id is not None:
+            logger.remove(handler_id)
+
+    def remove_all(self) -> None:
+        with self._lock:
+            handler_ids = list(self._handlers.values())
+            self._handlers.clear()
+            self._loggers.clear()
+            self._writers.clear()
+        for handler_id in handler_ids:
+            logger.remove(handler_id)
+
+    def _remove_default_handler(self) -> None:
+        if self._default_handler_removed:
+            return
+        self._default_handler_removed = True
+        try:
+            logger.remove(0)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def _build_filter(key: tuple) -> typing.Callable:
+        name, log_path = key[0], key[1]
+
+        def sink_filter(record: dict) -> bool:
+            extra = record["extra"]
+            return (
+                extra.get("name") == name and extra.get("log_path") == log_path
+            )
+
+        return sink_filter
+
+
+sink_manager = SinkManager()
 
 
 def create_logger(name: str, file_path: str, **kwargs):
-    logger.remove()
-    logger.bind(name=name)
-    logger.add(file_path, **kwargs)
-    return logger
+    return sink_manager.get_logger(name, file_path, **kwargs)
 
 
-def incoming_formatter(record: dict):
-    record["extra"]["serialized"] = json.dumps(
-        record["extra"]["data"],
-        default=str,
-        ensure_ascii=False,
+def _serialize(record: dict) -> str:
+    return sink_manager.serializer.dumps(record["extra"]["data"]).decode(
+        "utf-8"
     )
+
+
+def _log(
+    name: LoggerNameEnum,
+    file_path: str,
+    enqueue: bool,
+    extra_data: typing.Optional[dict],
+    message: str,
+    format: typing.Callable,
+    default_format: typing.Callable,
+    log_type: LogTypeEnum,
+    processor: typing.Optional[typing.Callable[[dict], dict]] = None,
+) -> None:
+    if extra_data is None:
+        extra_data = {}
+    if log_type != LogTypeEnum.CONSOLE and format is default_format:
+        # Records for a BatchWriter or NetworkWriter sink skip loguru's
+        # formatting and are serialized straight to bytes on the writer
+        # thread.
+        writer = sink_manager.get_writer(name, file_path, log_type)
+        if writer is not None:
+            if processor is not None:
+                writer.write(functools.partial(processor, extra_data))
+            else:
+                writer.write(extra_data)
+            return
+    if processor is not None:
+        extra_data = processor(extra_data)
+    bound_logger = create_logger(
+        name=name,
+        file_path=file_path,
+        log_type=log_type,
+        enqueue=enqueue,
+        format=format,
+    )
+    if log_type != LogTypeEnum.CONSOLE:
+        bound_logger.bind(data=extra_data).info(message)
+    elif log_type == LogTypeEnum.CONSOLE:
+        bound_logger.info({"message": message, "data": extra_data})
+
+
+def incoming_formatter(record: dict):
+    record["extra"]["serialized"] = _serialize(record)
     return "{extra[serialized]}\n"
 
 
@@ -28,27 +238,27 @@ def get_incoming_logger(
     message: str = "Incoming Request",
     format=incoming_formatter,
     log_type: LogTypeEnum = LogTypeEnum.FILE,
+    processor: typing.Optional[typing.Callable[[dict], dict]] = None,
 ):
-    if extra_data is None:
-        extra_data = {}
-    if log_type == LogTypeEnum.FILE:
-        incoming_logger = create_logger(
-            name=LoggerNameEnum.INCOMING,
-            file_path=file_path,
-            enqueue=enqueue,
-            format=format,
-        )
-        incoming_logger.bind(data=extra_data).info(message)
-    elif log_type == LogTypeEnum.CONSOLE:
-        logger.info({"message": message, "data": extra_data})
+    """
+    ``processor`` receives ``extra_data`` and returns the record to write.
+    With a ``BatchWriter`` sink it runs on the writer thread.
+    """
+    _log(
+        name=LoggerNameEnum.INCOMING,
+        file_path=file_path,
+        enqueue=enqueue,
+        extra_data=extra_data,
+        message=message,
+        format=format,
+        default_format=incoming_formatter,
+        log_type=log_type,
+        processor=processor,
+    )
 
 
 def apicall_formatter(record: dict):
-    record["extra"]["serialized"] = json.dumps(
-        record["extra"]["data"],
-        default=str,
-        ensure_ascii=False,
-    )
+    record["extra"]["serialized"] = _serialize(record)
     return "{extra[serialized]}\n"
 
 
@@ -60,26 +270,20 @@ def get_apicall_logger(
     format=apicall_formatter,
     log_type: LogTypeEnum = LogTypeEnum.FILE,
 ):
-    if extra_data is None:
-        extra_data = {}
-    if log_type == LogTypeEnum.FILE:
-        apicall_logger = create_logger(
-            name=LoggerNameEnum.APICALL,
-            file_path=file_path,
-            enqueue=enqueue,
-            format=format,
-        )
-        apicall_logger.bind(data=extra_data).info(message)
-    elif log_type == LogTypeEnum.CONSOLE:
-        logger.info({"message": message, "data": extra_data})
+    _log(
+        name=LoggerNameEnum.APICALL,
+        file_path=file_path,
+        enqueue=enqueue,
+        extra_data=extra_data,
+        message=message,
+        format=format,
+        default_format=apicall_formatter,
+        log_type=log_type,
+    )
 
 
 def exception_formatter(record: dict):
-    record["extra"]["serialized"] = json.dumps(
-        record["extra"]["data"],
-        default=str,
-        ensure_ascii=False,
-    )
+    record["extra"]["serialized"] = _serialize(record)
     return "{extra[serialized]}\n"
 
 
@@ -91,15 +295,13 @@ def get_exception_logger(
     format=exception_formatter,
     log_type: LogTypeEnum = LogTypeEnum.FILE,
 ):
-    if extra_data is None:
-        extra_data = {}
-    if log_type == LogTypeEnum.FILE:
-        error_logger = create_logger(
-            name=LoggerNameEnum.EXCEPTION,
-            file_path=file_path,
-            enqueue=enqueue,
-            format=format,
-        )
-        error_logger.bind(data=extra_data).info(message)
-    elif log_type == LogTypeEnum.CONSOLE:
-        logger.info({"message": message, "data": extra_data})
+    _log(
+        name=LoggerNameEnum.EXCEPTION,
+        file_path=file_path,
+        enqueue=enqueue,
+        extra_data=extra_data,
+        message=message,
+        format=format,
+        default_format=exception_formatter,
+        log_type=log_type,
+    )
@@ -0,0 +1,391 @@
+"""
+In-process request metrics: per-endpoint and per-upstream-host latency
+histograms, status code counters and body size summaries, exported in the
+Prometheus text format::
+
+    metrics = MetricsRegistry()
+    FastAPIIncomingLog(app, metrics=metrics, metrics_path="/metrics")
+    HTTPXLogger(metrics=metrics)
+"""
+import math
+import os
+import threading
+import typing
+
+from fastapi_and_logging.enums import LoggerNameEnum
+
+# Upper bounds in seconds of the exported histogram buckets.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Log-linear (HDR-style) histogram of durations in microseconds. Each
+    power of two is split into ``2 ** significant_bits`` buckets, so
+    recorded values keep a relative precision of ``2 ** -significant_bits``
+    whatever their magnitude. Only buckets that were hit are stored.
+    """
+
+    __slots__ = ("significant_bits", "counts", "count", "sum", "max")
+
+    def __init__(self, significant_bits: int = 7) -> None:
+        self.significant_bits = significant_bits
+        self.counts: typing.Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        shift = value.bit_length() - self.significant_bits
+        if shift > 0:
+            index = (shift << self.significant_bits) | (value >> shift)
+        else:
+            index = value
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def get_upper_bound(self, index: int) -> int:
+        """
+        Largest value recorded in bucket ``index``.
+        """
+        shift = index >> self.significant_bits
+        if not shift:
+            return index
+        mantissa = index & ((1 << self.significant_bits) - 1)
+        return ((mantissa + 1) << shift) - 1
+
+    def merge(self, other: "Histogram") -> None:
+        counts = self.counts
+        for index, count in dict(other.counts).items():
+            counts[index] = counts.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def iter_buckets(self) -> typing.Iterator[typing.Tuple[int, int]]:
+        """
+        ``(upper bound, count)`` of the buckets that were hit, ascending.
+        """
+        for index in sorted(self.counts):
+            yield self.get_upper_bound(index), self.counts[index]
+
+    def get_quantile(self, quantile: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for upper_bound, count in self.iter_buckets():
+            seen += count
+            if seen >= rank:
+                return min(upper_bound, self.max)
+        return self.max
+
+
+class Series:
+    """
+    Metrics of one endpoint or upstream host.
+    """
+
+    __slots__ = (
+        "duration",
+        "statuses",
+        "request_size_sum",
+        "request_size_count",
+        "response_size_sum",
+        "response_size_count",
+    )
+
+    def __init__(self, significant_bits: int) -> None:
+        self.duration = Histogram(significant_bits)
+        self.statuses: typing.Dict[int, int] = {}
+        self.request_size_sum = 0
+        self.request_size_count = 0
+        self.response_size_sum = 0
+        self.response_size_count = 0
+
+    def merge(self, other: "Series") -> None:
+        self.duration.merge(other.duration)
+        statuses = self.statuses
+        for status_code, count in dict(other.statuses).items():
+            statuses[status_code] = statuses.get(status_code, 0) + count
+        self.request_size_sum += other.request_size_sum
+        self.request_size_count += other.request_size_count
+        self.response_size_sum += other.response_size_sum
+        self.response_size_count += other.response_size_count
+
+
+class MetricsRegistry:
+    """
+    Aggregates request metrics in memory.
+
+    Every thread records into its own shard, so ``observe`` takes no lock;
+    shards are merged when the metrics are collected. Durations are in
+    milliseconds, as in the log records, and are exported in seconds with
+    the histogram ``buckets`` and summary ``quantiles``.
+    """
+
+    def __init__(
+        self,
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+        quantiles: typing.Sequence[float] = DEFAULT_QUANTILES,
+        significant_bits: int = 7,
+        namespace: str = "fastapi_and_logging",
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.quantiles = tuple(quantiles)
+        self.significant_bits = significant_bits
+        self.namespace = namespace
+        self._local = threading.local()
+        self._shards: typing.List[dict] = []
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def observe(
+        self,
+        kind: LoggerNameEnum,
+        name: typing.Optional[str],
+        status_code: typing.Optional[int],
+        duration: typing.Optional[float],
+        request_size: typing.Optional[int] = None,
+        response_size: typing.Optional[int] = None,
+    ) -> None:
+        """
+        Record one request. ``kind`` is ``LoggerNameEnum.INCOMING`` (``name``
+        is the route name) or ``LoggerNameEnum.APICALL`` (``name`` is the
+        upstream host).
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        key = (kind, name)
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = Series(self.significant_bits)
+        if duration is not None:
+            series.duration.record(int(duration * 1000))
+        statuses = series.statuses
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+        if request_size is not None:
+            series.request_size_sum += request_size
+            series.request_size_count += 1
+        if response_size is not None:
+            series.response_size_sum += response_size
+            series.response_size_count += 1
+
+    def collect(self) -> typing.Dict[tuple, Series]:
+        """
+        Merged series by ``(kind, name)``.
+        """
+        with self._lock:
+            shards = list(self._shards)
+        merged: typing.Dict[tuple, Series] = {}
+        for shard in shards:
+            for key, series in dict(shard).items():
+                total = merged.get(key)
+                if total is None:
+                    total = merged[key] = Series(self.significant_bits)
+                total.merge(series)
+        return merged
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shards = []
+            self._local = threading.local()
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines: typing.List[str] = []
+        collected = sorted(
+            self.collect().items(),
+            key=lambda item: (item[0][0], item[0][1] or ""),
+        )
+        for kind, prefix, label in (
+            (LoggerNameEnum.INCOMING, "http_server", "endpoint"),
+            (LoggerNameEnum.APICALL, "http_client", "host"),
+        ):
+            series = [
+                (name, value)
+                for (key, name), value in collected
+                if key == kind
+            ]
+            if series:
+                self._render_series(
+                    lines, f"{self.namespace}_{prefix}", label, series
+                )
+        return "\n".join(lines) + "\n"
+
+    def asgi_app(self) -> "MetricsApp":
+        """
+        ASGI app serving ``render()``::
+
+            app.mount("/metrics", metrics.asgi_app())
+        """
+        return MetricsApp(self)
+
+    def _after_fork(self) -> None:
+        # Another thread may have held the lock when the process forked.
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _new_shard(self) -> dict:
+        shard: dict = {}
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def _render_series(
+        self,
+        lines: typing.List[str],
+        prefix: str,
+        label: str,
+        series: typing.List[typing.Tuple[str, Series]],
+    ) -> None:
+        name = f"{prefix}_requests_total"
+        lines.append(f"# HELP {name} Requests by {label} and status code.")
+        lines.append(f"# TYPE {name} counter")
+        for value, item in series:
+            for status_code, count in sorted(
+                item.statuses.items(), key=lambda status: status[0] or 0
+            ):
+                labels = format_labels({label: value, "status": status_code})
+                lines.append(f"{name}{labels} {count}")
+
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Request duration by {label}.")
+        lines.append(f"# TYPE {name} histogram")
+        for value, item in series:
+            histogram = item.duration
+            buckets = histogram.iter_buckets()
+            pending = next(buckets, None)
+            cumulative = 0
+            for bound in self.buckets:
+                limit = bound * 1e6
+                while pending is not None and pending[0] <= limit:
+                    cumulative += pending[1]
+                    pending = next(buckets, None)
+                labels = format_labels(
+                    {label: value, "le": format_float(bound)}
+                )
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = format_labels({label: value, "le": "+Inf"})
+            lines.append(f"{name}_bucket{labels} {histogram.count}")
+            labels = format_labels({label: value})
+            lines.append(f"{name}_sum{labels} {histogram.sum / 1e6}")
+            lines.append(f"{name}_count{labels} {histogram.count}")
+
+        name = f"{prefix}_request_latency_seconds"
+        lines.append(f"# HELP {name} Request duration quantiles by {label}.")
+        lines.append(f"# TYPE {name} summary")
+        for value, item in series:
+            histogram = item.duration
+            for quantile in self.quantiles:
+                labels = format_labels(
+                    {label: value, "quantile": format_float(quantile)}
+                )
+                seconds = histogram.get_quantile(quantile) / 1e6
+                lines.append(f"{name}{labels} {seconds}")
+            labels = format_labels({label: value})
+            lines.append(f"{name}_sum{labels} {histogram.sum / 1e6}")
+            lines.append(f"{name}_count{labels} {histogram.count}")
+
+        for kind in ("request", "response"):
+            name = f"{prefix}_{kind}_size_bytes"
+            lines.append(f"# HELP {name} Body sizes by {label}.")
+            lines.append(f"# TYPE {name} summary")
+            for value, item in series:
+                labels = format_labels({label: value})
+                total = getattr(item, f"{kind}_size_sum")
+                count = getattr(item, f"{kind}_size_count")
+                lines.append(f"{name}_sum{labels} {total}")
+                lines.append(f"{name}_count{labels} {count}")
+
+
+class MetricsApp:
+    """
+    ASGI app serving the metrics of a ``MetricsRegistry`` to ``GET`` and
+    ``HEAD`` requests; other methods get a 405.
+    """
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        method = scope.get("method", "GET")
+        if method not in ("GET", "HEAD"):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 405,
+                    "headers": [
+                        (b"allow", b"GET, HEAD"),
+                        (b"content-length", b"0"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        body = self.registry.render().encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", CONTENT_TYPE.encode("latin-1")),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"" if method == "HEAD" else body,
+            }
+        )
+
+
+def format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def format_labels(labels: dict) -> str:
+    return (
+        "{"
+        + ",".join(
+            f'{key}="{escape_label(value)}"' for key, value in labels.items()
+        )
+        + "}"
+    )
+
+
+def escape_label(value: typing.Any) -> str:
+    if value is None:
+        return ""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
@@ -0,0 +1,463 @@
+"""
+Network sink: records are sent in compressed batches over one persistent
+TCP connection to a log collector::
+
+    writer = NetworkWriter("collector.internal", 9500, spill_path="spill.bin")
+    FastAPIIncomingLog(app, log_type=LogTypeEnum.NETWORK, writer=writer)
+    HTTPXLogger(log_type=LogTypeEnum.NETWORK, writer=writer)
+
+The protocol is Kafka-like: every batch is one frame per topic (the
+logger name), ``>IIBH`` payload length, record count, compression and
+topic length, followed by the topic and the JSON-lines payload, which is
+zlib-compressed unless the compression level is 0. The collector answers
+every frame with the ``>I`` number of records it accepted. ``LogCollector``
+implements the collector side for tests and benchmarks::
+
+    python -m fastapi_and_logging collect --port 9500 --dir logs
+"""
+import collections
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+import typing
+import zlib
+
+from fastapi_and_logging.enums import OverflowPolicyEnum
+from fastapi_and_logging.serializers import BaseSerializer
+from fastapi_and_logging.shards import get_shard_path
+from fastapi_and_logging.writer import BatchWriter
+
+FRAME_HEADER = struct.Struct(">IIBH")
+ACK = struct.Struct(">I")
+UNCOMPRESSED = 0
+ZLIB = 1
+
+
+def encode_frame(
+    topic: str,
+    lines: typing.List[bytes],
+    compression_level: int = 6,
+) -> bytes:
+    payload = b"".join(lines)
+    compression = UNCOMPRESSED
+    if compression_level:
+        payload = zlib.compress(payload, compression_level)
+        compression = ZLIB
+    topic_bytes = topic.encode("utf-8")
+    return (
+        FRAME_HEADER.pack(
+            len(payload), len(lines), compression, len(topic_bytes)
+        )
+        + topic_bytes
+        + payload
+    )
+
+
+def iter_frames(data: bytes) -> typing.Iterator[typing.Tuple[int, bytes]]:
+    """
+    ``(records, frame)`` of the complete frames in ``data``.
+    """
+    offset = 0
+    while len(data) - offset >= FRAME_HEADER.size:
+        length, records, _, topic_length = FRAME_HEADER.unpack_from(
+            data, offset
+        )
+        end = offset + FRAME_HEADER.size + topic_length + length
+        if end > len(data):
+            return
+        yield records, data[offset:end]
+        offset = end
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        data += chunk
+    return bytes(data)
+
+
+class NetworkTopic:
+    """
+    Sink of one logger on a shared ``NetworkWriter``.
+    """
+
+    __slots__ = ("writer", "name")
+
+    def __init__(self, writer: "NetworkWriter", name: str) -> None:
+        self.writer = writer
+        self.name = name
+
+    def write(self, message: typing.Any) -> bool:
+        return self.writer.write((self.name, message))
+
+
+class NetworkWriter(BatchWriter):
+    """
+    ``BatchWriter`` that sends its batches to a log collector instead of
+    writing them to a file. Queueing, batching and the overflow policy are
+    those of ``BatchWriter``, so logging never waits for the network unless
+    ``overflow_policy`` is ``BLOCK``.
+
+    The worker thread keeps one connection open and reconnects when it
+    breaks. A batch that cannot be sent after ``retries`` attempts goes to
+    ``spill_path`` (up to ``max_spill_size`` bytes, then batches are
+    dropped) and for the next ``reconnect_interval`` seconds batches go
+    straight to the spill file; it is sent first once the collector is
+    back. Delivery is at least once: a batch whose acknowledgement was lost
+    is sent again. Forked children spill to ``<name>.<pid><suffix>``.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        overflow_policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        serializer: typing.Optional[BaseSerializer] = None,
+        compression_level: int = 6,
+        timeout: float = 5.0,
+        retries: int = 3,
+        retry_backoff: float = 0.1,
+        reconnect_interval: float = 1.0,
+        spill_path: typing.Optional[str] = None,
+        max_spill_size: int = 64 * 1024 * 1024,
+        topic: str = "default",
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.compression_level = compression_level
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.reconnect_interval = reconnect_interval
+        self.spill_path = spill_path
+        self.max_spill_size = max_spill_size
+        self.topic = topic
+        self.spilled = 0
+        self.retried = 0
+        self.connections = 0
+        self._socket: typing.Optional[socket.socket] = None
+        self._down_until = 0.0
+        self._pid = os.getpid()
+        super().__init__(
+            file_path=f"{host}:{port}",
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_queue_size,
+            overflow_policy=overflow_policy,
+            serializer=serializer,
+        )
+
+    @property
+    def path(self) -> typing.Optional[str]:
+        """
+        Spill file of this process.
+        """
+        if self.spill_path is None or os.getpid() == self._pid:
+            return self.spill_path
+        return get_shard_path(self.spill_path, os.getpid())
+
+    def get_topic(self, name: str) -> NetworkTopic:
+        return NetworkTopic(self, str(name))
+
+    def get_stats(self) -> dict:
+        return {
+            **super().get_stats(),
+            "spilled": self.spilled,
+            "retried": self.retried,
+            "connections": self.connections,
+            "spill_size": self._get_spill_size(),
+        }
+
+    def _after_fork(self) -> None:
+        # The child must not write to the parent's connection.
+        self._socket = None
+        self._down_until = 0.0
+        self.spilled = 0
+        self.retried = 0
+        self.connections = 0
+        super()._after_fork()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch, closed = self._next_batch()
+                if batch:
+                    self._deliver(*self._encode_batch(batch))
+                elif self._get_spill_size() and not self._is_down():
+                    self._deliver([], 0)
+                if closed:
+                    # One last attempt, so a stopped writer does not leave
+                    # the spill file behind when the collector is back.
+                    if self._get_spill_size():
+                        self._down_until = 0.0
+                        self._deliver([], 0)
+                    break
+        finally:
+            self._disconnect()
+
+    def _encode_batch(
+        self,
+        batch: list,
+    ) -> typing.Tuple[typing.List[bytes], int]:
+        """
+        Frames of ``batch`` and the number of records in them. Records that
+        fail to encode are counted as failed and left out.
+        """
+        topics: typing.Dict[str, typing.List[bytes]] = {}
+        records = 0
+        for item in batch:
+            if isinstance(item, tuple):
+                topic, record = item
+            else:
+                topic, record = self.topic, item
+            try:
+                line = self._encode(record)
+            except Exception:
+                self.failed += 1
+                traceback.print_exc()
+                continue
+            topics.setdefault(topic, []).append(line)
+            records += 1
+        frames = [
+            encode_frame(topic, lines, self.compression_level)
+            for topic, lines in topics.items()
+        ]
+        return frames, records
+
+    def _deliver(self, frames: typing.List[bytes], records: int) -> None:
+        if not self._is_down():
+            for attempt in range(self.retries + 1):
+                try:
+                    self._send_spill()
+                    if frames:
+                        self._send(frames)
+                        self.written += records
+                        self.batches += 1
+                    return
+                except OSError:
+                    self._disconnect()
+                    if attempt < self.retries:
+                        self.retried += 1
+                        time.sleep(self.retry_backoff * 2**attempt)
+            self._down_until = time.monotonic() + self.reconnect_interval
+        if frames:
+            self._spill(frames, records)
+
+    def _is_down(self) -> bool:
+        return time.monotonic() < self._down_until
+
+    def _connect(self) -> socket.socket:
+        if self._socket is None:
+            sock = socket.create_connection(
+                (self.host, self.port), timeout=self.timeout
+            )
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socket = sock
+            self.connections += 1
+        return self._socket
+
+    def _disconnect(self) -> None:
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
+
+    def _send(self, frames: typing.List[bytes]) -> None:
+        sock = self._connect()
+        sock.sendall(b"".join(frames))
+        for _ in frames:
+            recv_exactly(sock, ACK.size)
+
+    def _get_spill_size(self) -> int:
+        path = self.path
+        if path is None:
+            return 0
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _spill(self, frames: typing.List[bytes], records: int) -> None:
+        data = b"".join(frames)
+        path = self.path
+        size = self._get_spill_size() + len(data)
+        if path is None or size > self.max_spill_size:
+            self.dropped += records
+            return
+        try:
+            with open(path, "ab") as file:
+                file.write(data)
+        except OSError:
+            self.dropped += records
+            traceback.print_exc()
+            return
+        self.spilled += records
+
+    def _send_spill(self) -> None:
+        if not self._get_spill_size():
+            return
+        path = self.path
+        with open(path, "rb") as file:
+            data = file.read()
+        frames = list(iter_frames(data))
+        sent = 0
+        try:
+            for start in range(0, len(frames), 64):
+                chunk = frames[start : start + 64]
+                self._send([frame for _, frame in chunk])
+                sent += len(chunk)
+        finally:
+            # Drop the acknowledged frames from the spill file, so they are
+            # neither sent nor counted again after a failure.
+            self.written += sum(records for records, _ in frames[:sent])
+            if sent == len(frames):
+                os.remove(path)
+            elif sent:
+                partial_path = path + ".part"
+                with open(partial_path, "wb") as file:
+                    file.writelines(frame for _, frame in frames[sent:])
+                os.replace(partial_path, path)
+
+
+class LogCollector:
+    """
+    Minimal TCP collector for ``NetworkWriter``, for tests, benchmarks and
+    local development. Counts the records received per topic, keeps them
+    if ``keep_records`` is set and appends them to ``<directory>/<topic>.log``
+    if ``directory`` is given. It can be stopped and started again on the
+    same port to simulate an outage.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        directory: typing.Optional[str] = None,
+        keep_records: bool = False,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.keep_records = keep_records
+        self.counts: typing.Counter[str] = collections.Counter()
+        self.records: typing.List[typing.Tuple[str, bytes]] = []
+        self.frames = 0
+        self.bytes_received = 0
+        self._server: typing.Optional[socketserver.ThreadingTCPServer] = None
+        self._connections: typing.Set[socket.socket] = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "LogCollector":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def start(self) -> "LogCollector":
+        collector = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                collector._handle(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever,
+            name=f"fastapi-and-logging-collector:{self.port}",
+            daemon=True,
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop listening and drop the open connections.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        finally:
+            self.stop()
+
+    def _handle(self, connection: socket.socket) -> None:
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            while True:
+                try:
+                    header = recv_exactly(connection, FRAME_HEADER.size)
+                except (ConnectionError, OSError):
+                    return
+                (
+                    length,
+                    records,
+                    compression,
+                    topic_length,
+                ) = FRAME_HEADER.unpack(header)
+                body = recv_exactly(connection, topic_length + length)
+                topic = body[:topic_length].decode("utf-8")
+                payload = body[topic_length:]
+                if compression == ZLIB:
+                    payload = zlib.decompress(payload)
+                self._store(topic, records, payload, len(header) + len(body))
+                connection.sendall(ACK.pack(records))
+        except (ConnectionError, OSError):
+            return
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+
+    def _store(
+        self,
+        topic: str,
+        records: int,
+        payload: bytes,
+        size: int,
+    ) -> None:
+        with self._lock:
+            self.counts[topic] += records
+            self.frames += 1
+            self.bytes_received += size
+            if self.keep_records:
+                self.records.extend(
+                    (topic, line) for line in payload.splitlines()
+                )
+            if self.directory is not None:
+                path = os.path.join(self.directory, f"{topic}.log")
+                with open(path, "ab") as file:
+                    file.write(payload)
@@ -0,0 +1,147 @@
+import itertools
+import os
+import random
+import re
+import threading
+import time
+import typing
+import uuid
+
+from fastapi_and_logging.enums import RequestIdEnum
+
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Crockford base32 for 10 bits at a time: two characters per lookup.
+_ULID_PAIRS = tuple(a + b for a in ULID_ALPHABET for b in ULID_ALPHABET)
+# Incoming IDs are written to the log as is, so only plain tokens are used.
+_VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:@/+=-]{1,128}")
+
+
+def uuid4_request_id() -> str:
+    return str(uuid.uuid4())
+
+
+class MonotonicClock:
+    """
+    Millisecond timestamp plus a per-process sequence number that is
+    increased for IDs created within the same millisecond (or while the
+    wall clock goes backwards), so IDs sort in creation order.
+    """
+
+    def __init__(self, sequence_bits: int) -> None:
+        self.max_sequence = (1 << sequence_bits) - 1
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next(self, first_sequence_bits: int) -> typing.Tuple[int, int]:
+        """
+        Next (millisecond, sequence) pair. A new millisecond starts the
+        sequence at a random value of ``first_sequence_bits`` bits.
+        """
+        ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if ms > self._last_ms:
+                self._last_ms = ms
+                self._sequence = random.getrandbits(first_sequence_bits)
+            elif self._sequence < self.max_sequence:
+                self._sequence += 1
+            else:
+                # Sequence exhausted: borrow the next millisecond.
+                self._last_ms += 1
+                self._sequence = random.getrandbits(first_sequence_bits)
+            return self._last_ms, self._sequence
+
+
+class UUID7Generator:
+    """
+    Time-ordered UUIDv7 strings (RFC 9562), using the 12-bit ``rand_a``
+    field as a monotonic counter within a millisecond.
+    """
+
+    def __init__(self) -> None:
+        self.clock = MonotonicClock(12)
+
+    def __call__(self) -> str:
+        # Start below 2048 so at least 2048 IDs fit in each millisecond.
+        ms, sequence = self.clock.next(11)
+        value = (
+            ms << 80
+            | 0x7 << 76
+            | sequence << 64
+            | 0b10 << 62
+            | random.getrandbits(62)
+        )
+        hex_value = f"{value:032x}"
+        return (
+            f"{hex_value[:8]}-{hex_value[8:12]}-{hex_value[12:16]}"
+            f"-{hex_value[16:20]}-{hex_value[20:]}"
+        )
+
+
+class ULIDGenerator:
+    """
+    Monotonic ULIDs: a 48-bit millisecond timestamp and 80 random bits
+    that are incremented for IDs created within the same millisecond.
+    """
+
+    def __init__(self) -> None:
+        # One bit of headroom keeps the increments from overflowing.
+        self.clock = MonotonicClock(80)
+
+    def __call__(self) -> str:
+        ms, randomness = self.clock.next(79)
+        value = ms << 80 | randomness
+        pairs = _ULID_PAIRS
+        return "".join(
+            [pairs[(value >> shift) & 0x3FF] for shift in range(120, -1, -10)]
+        )
+
+
+class CounterGenerator:
+    """
+    ``<prefix>-<counter>`` IDs: a random per-process prefix and a hex
+    counter. The cheapest strategy, but the IDs are not time-ordered. The
+    prefix and counter are renewed in forked worker processes.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self) -> None:
+        self.prefix = os.urandom(6).hex()
+        self._counter = itertools.count(1)
+
+    def __call__(self) -> str:
+        return f"{self.prefix}-{next(self._counter):x}"
+
+
+REQUEST_ID_BUILDERS: typing.Dict[RequestIdEnum, typing.Callable[[], str]] = {
+    RequestIdEnum.UUID4: uuid4_request_id,
+    RequestIdEnum.UUID7: UUID7Generator(),
+    RequestIdEnum.ULID: ULIDGenerator(),
+    RequestIdEnum.COUNTER: CounterGenerator(),
+}
+
+
+def get_request_id_builder(
+    strategy: RequestIdEnum = RequestIdEnum.UUID4,
+) -> typing.Callable[[], str]:
+    return REQUEST_ID_BUILDERS[RequestIdEnum(strategy)]
+
+
+def get_header_request_id(
+    headers: typing.Iterable[typing.Tuple[bytes, bytes]],
+    header: bytes,
+) -> typing.Optional[str]:
+    """
+    Value of ``header`` (a lowercase header name) in a raw ASGI header
+    list, if it is a plain token of at most 128 characters.
+    """
+    for name, value in headers:
+        if name == header:
+            if _VALID_REQUEST_ID.fullmatch(value):
+                return value.decode("latin-1")
+            return None
+    return None
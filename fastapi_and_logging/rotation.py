@@ -0,0 +1,259 @@
+import atexit
+import datetime
+import glob
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import traceback
+import typing
+
+from fastapi_and_logging.enums import CompressionEnum
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {
+    CompressionEnum.GZIP: ".gz",
+    CompressionEnum.ZSTD: ".zst",
+}
+
+
+def get_rotated_path(file_path: str, rotated_at: float) -> str:
+    """
+    ``logs/incoming.log`` -> ``logs/incoming.20261018T115844123456.log``.
+    Rotated names sort by rotation time and are never reused, so a tailer
+    can find the file it was reading by name after a rotation.
+    """
+    root, suffix = os.path.splitext(file_path)
+    stamp = datetime.datetime.fromtimestamp(rotated_at).strftime(
+        "%Y%m%dT%H%M%S%f"
+    )
+    path = f"{root}.{stamp}{suffix}"
+    index = 0
+    while os.path.exists(path) or any(
+        os.path.exists(path + extension)
+        for extension in COMPRESSION_SUFFIXES.values()
+    ):
+        index += 1
+        path = f"{root}.{stamp}-{index}{suffix}"
+    return path
+
+
+def find_rotated(file_path: str) -> typing.List[str]:
+    """
+    Rotated (and compressed) files of ``file_path``, oldest first. Names
+    are ordered by rotation time and then by their ``-N`` suffix, which
+    does not sort as text.
+    """
+    root, suffix = os.path.splitext(file_path)
+    pattern = re.compile(
+        re.escape(os.path.basename(root))
+        + r"\.(\d{8}T\d{12})(?:-(\d+))?"
+        + re.escape(suffix)
+        + r"(?:\.gz|\.zst)?"
+    )
+    rotated = []
+    for path in glob.glob(f"{glob.escape(root)}.*{glob.escape(suffix)}*"):
+        match = pattern.fullmatch(os.path.basename(path))
+        if match is not None:
+            stamp, index = match.groups()
+            rotated.append(((stamp, int(index or 0)), path))
+    return [path for _, path in sorted(rotated)]
+
+
+class RotationPolicy:
+    """
+    When to rotate a log file and what to do with rotated files.
+
+    - ``max_bytes``: rotate once the file reaches this size.
+    - ``interval``: rotate every ``interval`` seconds.
+    - ``max_files``: keep at most this many rotated files.
+    - ``max_age``: delete rotated files older than this many seconds.
+    - ``compression``: compress rotated files with gzip or zstd (``AUTO``
+      picks zstd when ``zstandard`` is installed), or keep them as is.
+
+    The active file keeps its name; a rotated file is renamed with its
+    rotation time (see ``get_rotated_path``). Compression and retention
+    run on a background thread, never on the thread writing records.
+    """
+
+    def __init__(
+        self,
+        max_bytes: typing.Optional[int] = None,
+        interval: typing.Optional[float] = None,
+        max_files: typing.Optional[int] = None,
+        max_age: typing.Optional[float] = None,
+        compression: typing.Optional[CompressionEnum] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.max_files = max_files
+        self.max_age = max_age
+        if compression == CompressionEnum.AUTO:
+            compression = (
+                CompressionEnum.ZSTD if zstandard else CompressionEnum.GZIP
+            )
+        if compression == CompressionEnum.ZSTD and zstandard is None:
+            raise ImportError("zstandard is not installed")
+        self.compression = compression
+
+    def create_rotator(self) -> "Rotator":
+        return Rotator(self)
+
+    def rotated(self, file_path: str, rotated_path: str) -> None:
+        """
+        Hand a rotated file to the background compressor.
+        """
+        compressor.submit(self, file_path, rotated_path)
+
+    def loguru_options(self, file_path: str) -> dict:
+        """
+        ``logger.add`` options applying this policy to a loguru file sink.
+        """
+
+        def compression(path: str) -> None:
+            # Called by loguru right after it renamed the active file.
+            rotated_path = get_rotated_path(file_path, time.time())
+            os.rename(path, rotated_path)
+            self.rotated(file_path, rotated_path)
+
+        return {
+            "rotation": self.create_rotator(),
+            "compression": compression,
+        }
+
+
+class Rotator:
+    """
+    Rotation state of one file: the next time-based rollover.
+    """
+
+    __slots__ = ("policy", "rollover_at")
+
+    def __init__(self, policy: RotationPolicy) -> None:
+        self.policy = policy
+        self.rollover_at = None
+
+    def should_rotate(self, size: int) -> bool:
+        policy = self.policy
+        if policy.interval is not None:
+            now = time.time()
+            if self.rollover_at is None:
+                self.rollover_at = now + policy.interval
+            elif now >= self.rollover_at:
+                self.rollover_at = now + policy.interval
+                return size > 0
+        return policy.max_bytes is not None and size >= policy.max_bytes
+
+    def __call__(self, message, file) -> bool:
+        # loguru's rotation callback.
+        return self.should_rotate(file.tell())
+
+
+class Compressor:
+    """
+    Background thread compressing rotated files and applying retention.
+    A file that fails is counted as ``failed`` and reported on stderr; the
+    thread keeps running.
+    """
+
+    def __init__(self) -> None:
+        self.processed = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get_stats(self) -> dict:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+    def submit(
+        self,
+        policy: RotationPolicy,
+        file_path: str,
+        rotated_path: str,
+    ) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name="fastapi-and-logging-compressor",
+                        daemon=True,
+                    )
+                    self._thread.start()
+                    atexit.register(self.stop)
+        self._queue.put((policy, file_path, rotated_path))
+
+    def stop(self, timeout: typing.Optional[float] = 5.0) -> None:
+        """
+        Finish pending work, waiting at most ``timeout`` seconds. Files left
+        uncompressed are still valid logs and count for retention.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            policy, file_path, rotated_path = item
+            try:
+                if policy.compression is not None:
+                    compress(rotated_path, policy.compression)
+                apply_retention(file_path, policy)
+            except OSError:
+                self.failed += 1
+                traceback.print_exc()
+            else:
+                self.processed += 1
+
+
+def compress(path: str, compression: CompressionEnum) -> str:
+    target = path + COMPRESSION_SUFFIXES[compression]
+    partial_path = target + ".part"
+    with open(path, "rb") as source, open(partial_path, "wb") as raw:
+        if compression == CompressionEnum.ZSTD:
+            zstandard.ZstdCompressor().copy_stream(source, raw)
+        else:
+            with gzip.GzipFile(
+                filename=os.path.basename(path),
+                mode="wb",
+                fileobj=raw,
+                compresslevel=6,
+            ) as output:
+                shutil.copyfileobj(source, output, 1024 * 1024)
+    os.replace(partial_path, target)
+    os.remove(path)
+    return target
+
+
+def apply_retention(file_path: str, policy: RotationPolicy) -> None:
+    rotated = find_rotated(file_path)
+    expired = []
+    if policy.max_files is not None and len(rotated) > policy.max_files:
+        expired = rotated[: len(rotated) - policy.max_files]
+        rotated = rotated[len(expired) :]
+    if policy.max_age is not None:
+        deadline = time.time() - policy.max_age
+        expired += [
+            path for path in rotated if os.path.getmtime(path) < deadline
+        ]
+    for path in expired:
+        os.remove(path)
+
+
+compressor = Compressor()
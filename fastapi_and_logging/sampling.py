@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+import typing
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing ``rate`` records per second with
+    bursts of up to ``capacity`` records.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "_lock")
+
+    def __init__(self, rate: float, capacity: typing.Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.updated_at) * self.rate,
+            )
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class SamplingPolicy:
+    """
+    Decides whether a record is written once the status code and duration
+    are known, before the body is read or the record is built and
+    serialized.
+
+    - ``rate``: probability of keeping a record (1.0 keeps everything).
+    - ``endpoint_rates``: per-key rates overriding ``rate``. The key is the
+      route name for incoming logs and the upstream host for API calls.
+    - ``always_log_status``: records with a status code at or above this
+      value are always kept.
+    - ``slow_threshold``: records slower than this many milliseconds are
+      always kept.
+    - ``rate_limit``/``burst``: token bucket limit in records per second,
+      applied per key after probabilistic sampling.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        endpoint_rates: typing.Optional[typing.Dict[str, float]] = None,
+        always_log_status: typing.Optional[int] = 500,
+        slow_threshold: typing.Optional[float] = None,
+        rate_limit: typing.Optional[float] = None,
+        burst: typing.Optional[float] = None,
+    ) -> None:
+        self.rate = rate
+        self.endpoint_rates = endpoint_rates or {}
+        self.always_log_status = always_log_status
+        self.slow_threshold = slow_threshold
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.sampled_in = 0
+        self.sampled_out = 0
+        self._counters: typing.Dict[str, typing.List[int]] = {}
+        self._buckets: typing.Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def should_log(
+        self,
+        key: typing.Optional[str],
+        status_code: typing.Optional[int] = None,
+        duration: typing.Optional[float] = None,
+    ) -> bool:
+        decision = self._decide(key, status_code, duration)
+        with self._lock:
+            counters = self._counters.get(key)
+            if counters is None:
+                counters = self._counters[key] = [0, 0]
+            if decision:
+                self.sampled_in += 1
+                counters[0] += 1
+            else:
+                self.sampled_out += 1
+                counters[1] += 1
+        return decision
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "sampled_in": self.sampled_in,
+                "sampled_out": self.sampled_out,
+                "keys": {
+                    str(key): {"sampled_in": value[0], "sampled_out": value[1]}
+                    for key, value in self._counters.items()
+                },
+            }
+
+    def _decide(
+        self,
+        key: typing.Optional[str],
+        status_code: typing.Optional[int],
+        duration: typing.Optional[float],
+    ) -> bool:
+        if (
+            self.always_log_status is not None
+            and status_code is not None
+            and status_code >= self.always_log_status
+        ):
+            return True
+        if (
+            self.slow_threshold is not None
+            and duration is not None
+            and duration >= self.slow_threshold
+        ):
+            return True
+
+        rate = self.endpoint_rates.get(key, self.rate)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return False
+
+        if self.rate_limit is not None:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                with self._lock:
+                    bucket = self._buckets.setdefault(
+                        key, TokenBucket(self.rate_limit, self.burst)
+                    )
+            return bucket.acquire()
+        return True
@@ -0,0 +1,100 @@
+import json
+import typing
+from abc import ABC, abstractmethod
+
+from fastapi_and_logging.enums import SerializerEnum
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+_json_encode = json.JSONEncoder(default=str, ensure_ascii=False).encode
+
+
+class BaseSerializer(ABC):
+    name: SerializerEnum
+
+    @abstractmethod
+    def dumps(self, data: typing.Any) -> bytes:
+        pass
+
+    def dumps_line(self, data: typing.Any) -> bytes:
+        return self.dumps(data) + b"\n"
+
+
+class JSONSerializer(BaseSerializer):
+    name = SerializerEnum.JSON
+
+    def dumps(self, data: typing.Any) -> bytes:
+        # Reusing one encoder avoids building a new one on every
+        # ``json.dumps(..., default=str)`` call.
+        return _json_encode(data).encode("utf-8")
+
+
+class OrjsonSerializer(BaseSerializer):
+    name = SerializerEnum.ORJSON
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_NON_STR_KEYS
+        self._line_option = self._option | orjson.OPT_APPEND_NEWLINE
+
+    def dumps(self, data: typing.Any) -> bytes:
+        try:
+            return self._dumps(data, default=str, option=self._option)
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits, which the stdlib encoder accepts
+            return _json_encode(data).encode("utf-8")
+
+    def dumps_line(self, data: typing.Any) -> bytes:
+        try:
+            return self._dumps(data, default=str, option=self._line_option)
+        except orjson.JSONEncodeError:
+            return _json_encode(data).encode("utf-8") + b"\n"
+
+
+class MsgspecSerializer(BaseSerializer):
+    name = SerializerEnum.MSGSPEC
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self._encode = msgspec.json.Encoder(enc_hook=str).encode
+
+    def dumps(self, data: typing.Any) -> bytes:
+        try:
+            return self._encode(data)
+        except (TypeError, ValueError, OverflowError):
+            return _json_encode(data).encode("utf-8")
+
+
+SERIALIZERS = {
+    SerializerEnum.JSON: JSONSerializer,
+    SerializerEnum.ORJSON: OrjsonSerializer,
+    SerializerEnum.MSGSPEC: MsgspecSerializer,
+}
+
+
+def get_serializer(
+    backend: SerializerEnum = SerializerEnum.AUTO,
+) -> BaseSerializer:
+    """
+    Return a serializer for the given backend. ``SerializerEnum.AUTO`` picks
+    orjson, then msgspec, and falls back to the standard library.
+    """
+    if backend != SerializerEnum.AUTO:
+        return SERIALIZERS[backend]()
+    if orjson is not None:
+        return OrjsonSerializer()
+    if msgspec is not None:
+        return MsgspecSerializer()
+    return JSONSerializer()
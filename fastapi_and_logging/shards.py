@@ -0,0 +1,200 @@
+"""
+Per-process log shards written by ``BatchWriter(shard_by_pid=True)`` and a
+tool to merge them back into one file::
+
+    python -m fastapi_and_logging.shards incoming.log --remove
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import re
+import typing
+
+from fastapi_and_logging.binary import (
+    FRAME_HEADER,
+    decode_payload,
+    is_binary,
+    iter_frames,
+)
+
+
+def get_shard_path(file_path: str, pid: int) -> str:
+    """
+    ``logs/incoming.log`` -> ``logs/incoming.<pid>.log``.
+    """
+    root, suffix = os.path.splitext(file_path)
+    return f"{root}.{pid}{suffix}"
+
+
+def find_shards(file_path: str) -> typing.Dict[int, str]:
+    """
+    Shard files of ``file_path`` by process ID.
+    """
+    root, suffix = os.path.splitext(file_path)
+    pattern = re.compile(
+        re.escape(os.path.basename(root)) + r"\.(\d+)" + re.escape(suffix)
+    )
+    shards = {}
+    for path in glob.glob(f"{glob.escape(root)}.*{glob.escape(suffix)}"):
+        match = pattern.fullmatch(os.path.basename(path))
+        if match:
+            shards[int(match.group(1))] = path
+    return dict(sorted(shards.items()))
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_lines(path: str, stats: dict) -> typing.Iterator[bytes]:
+    """
+    Complete lines of a shard. A last line without a newline was cut short
+    by a process that died mid-write and is counted in ``stats["torn"]``.
+    """
+    with open(path, "rb") as file:
+        for line in file:
+            if line.endswith(b"\n"):
+                stats["records"] += 1
+                yield line
+            else:
+                stats["torn"] += 1
+
+
+def read_frames(path: str, stats: dict) -> typing.Iterator[bytes]:
+    """
+    Complete frames of a binary shard (see ``fastapi_and_logging.binary``).
+    A last frame cut short is counted in ``stats["torn"]``.
+    """
+    end = 0
+    with open(path, "rb") as file:
+        for offset, encoding, payload in iter_frames(file):
+            end = offset + FRAME_HEADER.size + len(payload)
+            stats["records"] += 1
+            yield FRAME_HEADER.pack(len(payload), encoding) + payload
+    if end < os.path.getsize(path):
+        stats["torn"] += 1
+
+
+def get_format(path: str) -> typing.Optional[str]:
+    """
+    ``"binary"`` or ``"json"``, or ``None`` for a missing or empty file.
+    """
+    try:
+        with open(path, "rb") as file:
+            if not file.peek(1):
+                return None
+            return "binary" if is_binary(file) else "json"
+    except FileNotFoundError:
+        return None
+
+
+def get_sort_value(record: bytes, binary: bool, sort_key: str) -> typing.Any:
+    if binary:
+        _, encoding = FRAME_HEADER.unpack_from(record)
+        data = decode_payload(encoding, record[FRAME_HEADER.size :])
+    else:
+        data = json.loads(record)
+    return data.get(sort_key) or 0
+
+
+def merge_shards(
+    file_path: str,
+    output: typing.Optional[str] = None,
+    sort_key: typing.Optional[str] = None,
+    include_live: bool = False,
+    remove: bool = False,
+) -> dict:
+    """
+    Append the shards of ``file_path`` to ``output`` (``file_path`` by
+    default). Shards of processes that are still running are skipped
+    unless ``include_live`` is set. With ``sort_key`` the records are
+    merged in the order of that field (e.g. ``request_time``), assuming
+    each shard is already in that order; otherwise shards are appended one
+    after another. JSON-lines shards are merged line by line and binary
+    shards frame by frame; shards and output must all be in one format.
+    With ``remove`` the merged shards are deleted once the output has been
+    written and synced. Shards with a torn last record are never deleted
+    and are listed in ``stats["incomplete"]``.
+    """
+    shards = [
+        path
+        for pid, path in find_shards(file_path).items()
+        if include_live or not is_running(pid)
+    ]
+    output = output or file_path
+    formats = {get_format(path) for path in [*shards, output]} - {None}
+    if len(formats) > 1:
+        raise ValueError(
+            "cannot merge binary and JSON-lines files: "
+            + ", ".join([*shards, output])
+        )
+    binary = formats == {"binary"}
+    read = read_frames if binary else read_lines
+
+    shard_stats = {path: {"records": 0, "torn": 0} for path in shards}
+    readers = [read(path, shard_stats[path]) for path in shards]
+    if sort_key is None:
+        records = (record for reader in readers for record in reader)
+    else:
+        records = heapq.merge(
+            *readers,
+            key=lambda record: get_sort_value(record, binary, sort_key),
+        )
+
+    with open(output, "ab") as file:
+        file.writelines(records)
+        file.flush()
+        os.fsync(file.fileno())
+
+    stats = {
+        "shards": len(shards),
+        "records": sum(item["records"] for item in shard_stats.values()),
+        "torn": sum(item["torn"] for item in shard_stats.values()),
+        "incomplete": [
+            path for path, item in shard_stats.items() if item["torn"]
+        ],
+    }
+    if remove:
+        for path in shards:
+            if path not in stats["incomplete"]:
+                os.remove(path)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m fastapi_and_logging.shards",
+        description="Merge per-process log shards into one file.",
+    )
+    parser.add_argument("file_path", help="log path given to the writer")
+    parser.add_argument("-o", "--output", help="defaults to file_path")
+    parser.add_argument("--sort-key", help="record field to merge by")
+    parser.add_argument(
+        "--include-live",
+        action="store_true",
+        help="also merge shards of running processes",
+    )
+    parser.add_argument(
+        "--remove", action="store_true", help="delete merged shards"
+    )
+    args = parser.parse_args()
+    stats = merge_shards(
+        args.file_path,
+        output=args.output,
+        sort_key=args.sort_key,
+        include_live=args.include_live,
+        remove=args.remove,
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import atexit
+import collections
+import os
+import threading
+import time
+import traceback
+import typing
+import weakref
+
+from fastapi_and_logging.enums import OverflowPolicyEnum
+from fastapi_and_logging.rotation import RotationPolicy, get_rotated_path
+from fastapi_and_logging.serializers import BaseSerializer, get_serializer
+from fastapi_and_logging.shards import get_shard_path
+
+Record = typing.Union[str, bytes, dict, typing.Callable[[], typing.Any]]
+
+# Writers to restart in forked children. One module-level fork hook walks
+# this set; a hook per writer would keep every writer alive.
+_writers: "weakref.WeakSet[BatchWriter]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for writer in list(_writers):
+        writer._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class BatchWriter:
+    """
+    Background file writer used as a loguru sink.
+
+    Records are appended to a bounded in-memory queue and a worker thread
+    writes them in batches, with one buffered write per batch. A batch is
+    flushed once ``batch_size`` records are queued or ``flush_interval``
+    seconds have passed. When the queue is full, ``overflow_policy``
+    decides whether the oldest or the newest record is dropped, or whether
+    the caller blocks until there is room. Dict records are serialized by
+    ``serializer`` on the worker thread; callables are called there first
+    and must return the record to write. A record that fails to encode, or
+    a batch that fails to write, is counted as ``failed`` and reported on
+    stderr; the worker thread keeps running.
+
+    With ``shard_by_pid`` every process writes its own
+    ``<name>.<pid><suffix>`` file, so worker processes of one server never
+    share a file (see ``fastapi_and_logging.shards`` to merge them). The
+    writer restarts in forked children, which leave the parent's queued
+    records to the parent.
+
+    With ``rotation`` the worker thread checks the file after each batch
+    and, when the policy says so, renames it and opens a new one. Rotated
+    files are compressed and pruned on a separate background thread.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        overflow_policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        buffer_size: int = 1024 * 1024,
+        serializer: typing.Optional[BaseSerializer] = None,
+        shard_by_pid: bool = False,
+        rotation: typing.Optional[RotationPolicy] = None,
+    ) -> None:
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.buffer_size = buffer_size
+        self.serializer = serializer or get_serializer()
+        self.shard_by_pid = shard_by_pid
+        self.rotation = rotation
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue: typing.Deque[Record] = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._start()
+        atexit.register(self.stop)
+        _writers.add(self)
+
+    @property
+    def path(self) -> str:
+        if self.shard_by_pid:
+            return get_shard_path(self.file_path, os.getpid())
+        return self.file_path
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> dict:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "queued": len(self._queue),
+        }
+
+    def write(self, message: Record) -> bool:
+        """
+        Queue one record. Returns False if the record was dropped.
+        """
+        with self._condition:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == OverflowPolicyEnum.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.overflow_policy == OverflowPolicyEnum.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    while (
+                        len(self._queue) >= self.max_queue_size
+                        and not self._closed
+                    ):
+                        self._condition.wait()
+                    if self._closed:
+                        self.dropped += 1
+                        return False
+            self._queue.append(message)
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def stop(self) -> None:
+        """
+        Write everything still queued and stop the worker thread.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        atexit.unregister(self.stop)
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"fastapi-and-logging-writer:{self.file_path}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives in the child.
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        if not self._closed:
+            self._start()
+
+    def _next_batch(self) -> typing.Tuple[list, bool]:
+        with self._condition:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            size = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(size)]
+            closed = self._closed and not self._queue
+            self._condition.notify_all()
+        return batch, closed
+
+    def _run(self) -> None:
+        path = self.path
+        rotator = None
+        file = open(path, "ab", buffering=self.buffer_size)
+        size = os.fstat(file.fileno()).st_size
+        try:
+            while True:
+                batch, closed = self._next_batch()
+                encoded = self._encode_records(batch)
+                if encoded:
+                    data = b"".join(encoded)
+                    try:
+                        file.write(data)
+                        file.flush()
+                    except OSError:
+                        self.failed += len(encoded)
+                        traceback.print_exc()
+                    else:
+                        size += len(data)
+                        self.written += len(encoded)
+                        self.batches += 1
+                # The policy may be set after the thread started (see
+                # ``SinkManager.register``).
+                if rotator is None and self.rotation is not None:
+                    rotator = self.rotation.create_rotator()
+                if rotator is not None and rotator.should_rotate(size):
+                    file.close()
+                    rotated_path = get_rotated_path(path, time.time())
+                    try:
+                        os.rename(path, rotated_path)
+                    except OSError:
+                        # Keep writing to the same file; rotation is
+                        # tried again after the next batch.
+                        traceback.print_exc()
+                    else:
+                        self.rotation.rotated(path, rotated_path)
+                    file = open(path, "ab", buffering=self.buffer_size)
+                    size = os.fstat(file.fileno()).st_size
+                if closed:
+                    break
+        finally:
+            file.close()
+
+    def _encode_records(self, batch: list) -> typing.List[bytes]:
+        """
+        Encoded records of ``batch``, without those whose processor or
+        serializer raised, so one bad record does not lose the batch.
+        """
+        encoded = []
+        for record in batch:
+            try:
+                encoded.append(self._encode(record))
+            except Exception:
+                self.failed += 1
+                traceback.print_exc()
+        return encoded
+
+    def _encode(self, record: Record) -> bytes:
+        if callable(record):
+            record = record()
+        if isinstance(record, bytes):
+            return record
+        if isinstance(record, str):
+            return record.encode("utf-8")
+        return self.serializer.dumps_line(record)
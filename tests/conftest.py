@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from fastapi_and_logging import sink_manager
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    yield str(tmp_path / "incoming.log")
+    sink_manager.remove_all()
+
+
+@pytest.fixture
+def read_log():
+    """
+    Returns a function flushing the registered sinks and reading the JSON
+    records of a log file.
+    """
+
+    def read(path: str) -> list:
+        sink_manager.remove_all()
+        with open(path) as file:
+            return [json.loads(line) for line in file]
+
+    return read
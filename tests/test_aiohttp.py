@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from fastapi_and_logging import sink_manager
+from fastapi_and_logging.context import REQUEST_ID_HEADER, set_request_id
+
+aiohttp = pytest.importorskip("aiohttp")
+web = pytest.importorskip("aiohttp.web")
+
+BODY = b"0123456789" * 10
+
+
+@pytest.fixture(scope="module")
+def apicall_log_path(tmp_path_factory):
+    from fastapi_and_logging.http_clients import AioHttpLogger
+
+    path = str(tmp_path_factory.mktemp("aiohttp") / "apicall.log")
+    # The logger wraps ClientSession for the rest of the process.
+    AioHttpLogger(log_path=path, response_max_len=15)
+    yield path
+    sink_manager.remove_all()
+
+
+async def serve(client_code) -> None:
+    async def handler(request):
+        return web.Response(body=BODY)
+
+    async def echo_request_id(request):
+        return web.Response(text=request.headers.get(REQUEST_ID_HEADER, ""))
+
+    app = web.Application()
+    app.router.add_get("/body", handler)
+    app.router.add_get("/request-id", echo_request_id)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            await client_code(session, f"http://127.0.0.1:{port}/body")
+    finally:
+        await runner.cleanup()
+
+
+async def read_after_release(session, url) -> None:
+    async with session.get(url) as response:
+        # The connection is released before the body is read.
+        await asyncio.sleep(0.05)
+        await response.read()
+
+
+async def stream(session, url) -> None:
+    async with session.get(url) as response:
+        async for _ in response.content.iter_chunked(7):
+            pass
+
+
+async def discard(session, url) -> None:
+    async with session.get(url):
+        pass
+
+
+@pytest.mark.parametrize(
+    "client_code, read",
+    [(read_after_release, True), (stream, True), (discard, False)],
+)
+def test_record_is_written_after_the_body_is_read(
+    apicall_log_path, client_code, read, read_log
+):
+    open(apicall_log_path, "w").close()
+    asyncio.run(serve(client_code))
+
+    (record,) = read_log(apicall_log_path)
+    # Only the first response_max_len characters are kept.
+    assert len(record["response_data"]) <= 15
+    assert ("0123456789" in record["response_data"]) is read
+    assert record["response_size"] == len(BODY)
+
+
+async def send_request_ids(session, url) -> None:
+    url = url.replace("/body", "/request-id")
+    set_request_id("incoming")
+    async with session.get(url) as response:
+        assert await response.text() == "incoming"
+    context = {"request_id": "explicit"}
+    async with session.get(url, trace_request_ctx=context) as response:
+        assert await response.text() == "explicit"
+
+
+def test_request_id_is_propagated(apicall_log_path, read_log):
+    open(apicall_log_path, "w").close()
+    asyncio.run(serve(send_request_ids))
+
+    records = read_log(apicall_log_path)
+    assert [record["request_id"] for record in records] == [
+        "incoming",
+        "explicit",
+    ]
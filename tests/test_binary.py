@@ -0,0 +1,152 @@
+import gzip
+import json
+import sys
+
+import pytest
+
+from fastapi_and_logging import __main__ as cli
+from fastapi_and_logging.binary import (
+    FRAME_HEADER,
+    JSON,
+    MSGPACK,
+    BinarySerializer,
+    decode_payload,
+    iter_frames,
+    read_records,
+)
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.serializers import JSONSerializer
+
+pytest.importorskip("msgpack")
+
+RECORDS = [
+    {
+        "request_id": "a",
+        "endpoint": "items",
+        "path": "/items/1",
+        "status_code": 200,
+        "query": {"page": "1"},
+        "duration": 1.5,
+        "extra_field": [1, 2],
+    },
+    {"request_id": "b", "status_code": 500, "big": 2**70},
+    {},
+]
+
+
+def write_binary(path, records, name=LoggerNameEnum.INCOMING) -> None:
+    serializer = BinarySerializer(name)
+    with open(path, "wb") as file:
+        for record in records:
+            file.write(serializer.dumps_line(record))
+
+
+def write_json(path, records) -> None:
+    with open(path, "wb") as file:
+        for record in records:
+            file.write(JSONSerializer().dumps_line(record))
+
+
+def run_cli(monkeypatch, *args: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["fastapi_and_logging", *args])
+    cli.main()
+
+
+@pytest.mark.parametrize("name", [LoggerNameEnum.INCOMING, None])
+def test_records_round_trip(tmp_path, name):
+    path = tmp_path / "incoming.bin"
+    write_binary(path, RECORDS, name)
+
+    assert list(read_records(str(path))) == RECORDS
+
+
+def test_integers_over_64_bits_fall_back_to_json():
+    serializer = BinarySerializer(LoggerNameEnum.INCOMING)
+    frames = [serializer.dumps({"size": size}) for size in (2**63, 2**70)]
+
+    assert [FRAME_HEADER.unpack_from(frame)[1] for frame in frames] == [
+        MSGPACK,
+        JSON,
+    ]
+    for frame, size in zip(frames, (2**63, 2**70)):
+        encoding = FRAME_HEADER.unpack_from(frame)[1]
+        record = decode_payload(encoding, frame[FRAME_HEADER.size :])
+        assert record == {"size": size}
+
+
+def test_frames_hold_values_without_schema_keys():
+    frame = BinarySerializer(LoggerNameEnum.INCOMING).dumps(
+        {"request_id": "a", "status_code": 200}
+    )
+    length, encoding = FRAME_HEADER.unpack_from(frame)
+
+    assert length == len(frame) - FRAME_HEADER.size
+    assert b"request_id" not in frame
+    assert decode_payload(encoding, frame[FRAME_HEADER.size :]) == {
+        "request_id": "a",
+        "status_code": 200,
+    }
+
+
+def test_torn_last_frame_is_skipped(tmp_path):
+    path = tmp_path / "incoming.bin"
+    write_binary(path, RECORDS[:2])
+    with open(path, "ab") as file:
+        file.write(BinarySerializer().dumps({"torn": True})[:-3])
+
+    with open(path, "rb") as file:
+        assert len(list(iter_frames(file))) == 2
+    assert list(read_records(str(path))) == RECORDS[:2]
+
+
+def test_read_records_reads_json_lines_and_gzip(tmp_path):
+    path = tmp_path / "incoming.log.gz"
+    with gzip.open(path, "wb") as file:
+        for record in RECORDS:
+            file.write(json.dumps(record).encode() + b"\n")
+
+    assert list(read_records(str(path))) == RECORDS
+
+
+def test_convert_json_to_binary_and_back(tmp_path, monkeypatch):
+    source = tmp_path / "incoming.log"
+    binary = tmp_path / "incoming.bin"
+    back = tmp_path / "back.log"
+    write_json(source, RECORDS)
+
+    run_cli(monkeypatch, "convert", str(source), "-o", str(binary))
+    with open(binary, "rb") as file:
+        assert file.read(1) != b"{"
+    run_cli(monkeypatch, "convert", str(binary), "-o", str(back))
+
+    assert list(read_records(str(back))) == RECORDS
+
+
+def test_convert_filters_with_where(tmp_path, monkeypatch):
+    source = tmp_path / "incoming.log"
+    output = tmp_path / "errors.bin"
+    write_json(source, RECORDS)
+
+    run_cli(
+        monkeypatch,
+        "convert",
+        str(source),
+        "-o",
+        str(output),
+        "--where",
+        "status_code=500",
+    )
+
+    assert [record["request_id"] for record in read_records(str(output))] == [
+        "b"
+    ]
+
+
+def test_cat_prints_json_lines(tmp_path, monkeypatch, capsysbinary):
+    path = tmp_path / "incoming.bin"
+    write_binary(path, RECORDS)
+
+    run_cli(monkeypatch, "cat", str(path), "--limit", "2")
+
+    lines = capsysbinary.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS[:2]
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.fastapi.capture import ResponseCapture
+
+
+def test_response_capture_records_time_to_first_byte():
+    capture = ResponseCapture(4, start_time=100.0)
+    capture.capture({"type": "http.response.start", "status": 200})
+    assert capture.time_to_first_byte is None
+
+    capture.capture({"type": "http.response.body", "body": b"hello"})
+    capture.capture({"type": "http.response.body", "body": b" world"})
+
+    assert capture.body == b"hell"
+    assert capture.total_length == 11
+    assert capture.time_to_first_byte > 0
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_bodies_are_truncated_in_the_record(
+    log_path, use_middleware, read_log
+):
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app,
+        log_path=log_path,
+        request_max_len=4,
+        response_max_len=5,
+        use_middleware=use_middleware,
+    )
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return PlainTextResponse(await request.body())
+
+    TestClient(app).post("/echo", content=b"0123456789")
+    (record,) = read_log(log_path)
+
+    assert record["request"] == "0123"
+    assert record["request_size"] == 10
+    assert record["response"] == "01234"
+    assert record["response_size"] == 10
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_streamed_response_is_logged_when_finished(
+    log_path, use_middleware, read_log
+):
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app,
+        log_path=log_path,
+        response_max_len=6,
+        use_middleware=use_middleware,
+    )
+
+    async def chunks():
+        for _ in range(4):
+            yield b"chunk"
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    response = TestClient(app).get("/stream")
+    (record,) = read_log(log_path)
+
+    assert response.content == b"chunk" * 4
+    assert record["response"] == "chunkc"
+    assert record["response_size"] == 20
+    assert record["time_to_first_byte"] >= 0
@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.context import (
+    REQUEST_ID_HEADER,
+    get_request_id,
+    request_id_context,
+    set_request_id,
+)
+from fastapi_and_logging.fastapi.exception import ExceptionLogger
+from fastapi_and_logging.http_clients import (
+    AsyncLoggingTransport,
+    LoggingTransport,
+)
+
+
+def echo_request_id(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200, json={"request_id": request.headers.get(REQUEST_ID_HEADER)}
+    )
+
+
+@pytest.fixture
+def apicall_log_path(tmp_path):
+    return str(tmp_path / "apicall.log")
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_request_id_reaches_outgoing_calls(
+    log_path, apicall_log_path, read_log, use_middleware
+):
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=use_middleware)
+    sync_client = httpx.Client(
+        transport=LoggingTransport(
+            httpx.MockTransport(echo_request_id), log_path=apicall_log_path
+        )
+    )
+    async_client = httpx.AsyncClient(
+        transport=AsyncLoggingTransport(
+            httpx.MockTransport(echo_request_id), log_path=apicall_log_path
+        )
+    )
+
+    @app.get("/sync")
+    def sync_endpoint():
+        # Runs in a worker thread, which gets a copy of the context.
+        return sync_client.get("http://upstream/").json()
+
+    @app.get("/async")
+    async def async_endpoint():
+        return (await async_client.get("http://upstream/")).json()
+
+    client = TestClient(app)
+    forwarded = [
+        client.get(path).json()["request_id"] for path in ("/sync", "/async")
+    ]
+
+    incoming = [record["request_id"] for record in read_log(log_path)]
+    apicall = [record["request_id"] for record in read_log(apicall_log_path)]
+    assert forwarded == incoming == apicall
+    assert len(set(incoming)) == 2
+
+
+def test_exception_records_carry_the_request_id(
+    log_path, read_log, monkeypatch
+):
+    monkeypatch.setattr(ExceptionLogger, "exception_handlers", {})
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path)
+    exception_logger = ExceptionLogger(app, log_path=log_path + ".exc")
+    written = []
+    exception_logger.write = written.append
+
+    @app.get("/missing")
+    def missing():
+        raise HTTPException(status_code=404, detail="gone")
+
+    @app.get("/fail")
+    def fail():
+        raise ValueError("boom")
+
+    client = TestClient(app, raise_server_exceptions=False)
+    client.get("/missing")
+    client.get("/fail")
+
+    incoming = [record["request_id"] for record in read_log(log_path)]
+    assert [record["request_id"] for record in written] == incoming
+    assert all(incoming)
+
+
+def test_request_id_does_not_leak_between_tasks():
+    async def serve(request_id: str) -> list:
+        set_request_id(request_id)
+        await asyncio.sleep(0)
+        return get_request_id()
+
+    async def main():
+        return await asyncio.gather(serve("a"), serve("b"))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert get_request_id() is None
+
+
+def test_existing_header_is_not_overwritten(apicall_log_path, read_log):
+    client = httpx.Client(
+        transport=LoggingTransport(
+            httpx.MockTransport(echo_request_id), log_path=apicall_log_path
+        )
+    )
+    token = set_request_id("incoming")
+    try:
+        response = client.get(
+            "http://upstream/", headers={REQUEST_ID_HEADER: "explicit"}
+        )
+    finally:
+        request_id_context.reset(token)
+
+    assert response.json() == {"request_id": "explicit"}
+    (record,) = read_log(apicall_log_path)
+    assert record["request_id"] == "incoming"
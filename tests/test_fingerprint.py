@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import sink_manager
+from fastapi_and_logging.fastapi.exception import ExceptionLogger
+from fastapi_and_logging.fastapi.fingerprint import (
+    ExceptionAggregator,
+    ExceptionFingerprinter,
+)
+
+
+def fail(value: int) -> None:
+    if value:
+        raise ValueError(f"first {value}")
+    raise ValueError("second")
+
+
+def fail_elsewhere() -> None:
+    raise ValueError("elsewhere")
+
+
+def catch(function, *args) -> BaseException:
+    try:
+        function(*args)
+    except BaseException as exc:
+        return exc
+    raise AssertionError("no exception")
+
+
+@pytest.fixture
+def aggregator():
+    records = []
+    aggregator = ExceptionAggregator(records.append, window=3600)
+    aggregator.records = records
+    yield aggregator
+    aggregator.stop()
+
+
+def test_fingerprint_ignores_message_and_line():
+    fingerprinter = ExceptionFingerprinter()
+
+    assert fingerprinter.fingerprint(
+        catch(fail, 1), "items"
+    ) == fingerprinter.fingerprint(catch(fail, 0), "items")
+
+
+def test_fingerprint_depends_on_endpoint_function_and_type():
+    fingerprinter = ExceptionFingerprinter()
+    fingerprint, _ = fingerprinter.fingerprint(catch(fail, 1), "items")
+
+    for exc, endpoint in (
+        (catch(fail, 1), "users"),
+        (catch(fail_elsewhere), "items"),
+        (catch(lambda: 1 / 0), "items"),
+    ):
+        assert fingerprint != fingerprinter.fingerprint(exc, endpoint)[0]
+
+
+def test_first_traceback_is_kept_per_fingerprint():
+    fingerprinter = ExceptionFingerprinter()
+    fingerprint, traceback = fingerprinter.fingerprint(catch(fail, 1))
+
+    assert "in fail" in traceback
+    assert fingerprinter.fingerprint(catch(fail, 0)) == (
+        fingerprint,
+        traceback,
+    )
+    assert fingerprinter.get_traceback(fingerprint) == traceback
+    fingerprinter.clear()
+    assert fingerprinter.get_traceback(fingerprint) is None
+
+
+def test_traceback_survives_concurrent_clears():
+    fingerprinter = ExceptionFingerprinter()
+    fingerprinter.max_cache_size = 1
+    stop = threading.Event()
+
+    def clear():
+        while not stop.is_set():
+            fingerprinter.clear()
+
+    thread = threading.Thread(target=clear)
+    thread.start()
+    try:
+        for index in range(2000):
+            exc = catch(fail, 1) if index % 2 else catch(fail_elsewhere)
+            fingerprint, traceback = fingerprinter.fingerprint(exc)
+            assert fingerprint and traceback
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_repeats_are_aggregated(aggregator):
+    records = [
+        {
+            "fingerprint": "abc",
+            "request_id": f"req-{index}",
+            "error_time": f"t{index}",
+        }
+        for index in range(8)
+    ]
+
+    assert aggregator.add(records[0])
+    assert not any(aggregator.add(record) for record in records[1:])
+    assert aggregator.flush() == 1
+
+    (record,) = aggregator.records
+    assert record["count"] == 7
+    assert record["first_seen"] == "t1"
+    assert record["last_seen"] == "t7"
+    assert record["request_ids"] == [f"req-{index}" for index in range(1, 6)]
+    # The window starts again after a flush.
+    assert aggregator.add(records[0])
+
+
+def test_records_without_fingerprint_and_extra_groups_pass(aggregator):
+    aggregator.max_groups = 1
+
+    assert aggregator.add({"error_message": "no fingerprint"})
+    assert aggregator.add({"fingerprint": "a"})
+    assert aggregator.add({"fingerprint": "b"})
+    assert aggregator.add({"fingerprint": "b"})
+    assert not aggregator.add({"fingerprint": "a"})
+    assert aggregator.flush() == 1
+
+
+def test_exception_logger_writes_the_first_and_aggregates_the_rest(
+    tmp_path, monkeypatch
+):
+    # Handlers are registered on the class; keep them out of other tests.
+    monkeypatch.setattr(ExceptionLogger, "exception_handlers", {})
+    app = FastAPI()
+    logger = ExceptionLogger(
+        app, log_path=str(tmp_path / "exception.log"), aggregate_window=3600
+    )
+    written = []
+    logger.write = written.append
+    logger.aggregator.emit = written.append
+
+    @app.get("/fail")
+    def endpoint():
+        fail(1)
+
+    client = TestClient(app, raise_server_exceptions=False)
+    for _ in range(3):
+        assert client.get("/fail").status_code == 500
+    logger.aggregator.stop()
+    sink_manager.remove_all()
+
+    first, aggregate = written
+    assert first["exception"] == "ValueError"
+    assert "in fail" in first["traceback"]
+    assert aggregate["fingerprint"] == first["fingerprint"]
+    assert aggregate["count"] == 2
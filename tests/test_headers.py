@@ -0,0 +1,75 @@
+from fastapi_and_logging.headers import HeaderFilter
+
+
+def test_sensitive_headers_are_masked_by_default():
+    headers = [
+        ("Authorization", "Bearer secret"),
+        ("Cookie", "session=1"),
+        ("Content-Type", "application/json"),
+    ]
+
+    assert HeaderFilter().filter(headers) == {
+        "authorization": "***",
+        "cookie": "***",
+        "content-type": "application/json",
+    }
+
+
+def test_raw_asgi_headers_are_decoded():
+    headers = [(b"x-api-key", b"secret"), (b"accept", b"*/*")]
+
+    assert HeaderFilter().filter(headers) == {
+        "x-api-key": "***",
+        "accept": "*/*",
+    }
+
+
+def test_allowlist_drops_other_headers_and_still_masks():
+    header_filter = HeaderFilter(allow=["Accept", "authorization"])
+    headers = [
+        ("accept", "*/*"),
+        ("authorization", "secret"),
+        ("user-agent", "test"),
+    ]
+
+    assert header_filter.filter(headers) == {
+        "accept": "*/*",
+        "authorization": "***",
+    }
+
+
+def test_deny_and_patterns():
+    header_filter = HeaderFilter(
+        deny=["x-drop"],
+        deny_patterns=[r"^x-internal-"],
+        mask=(),
+        mask_patterns=[r"token"],
+        mask_value="<hidden>",
+    )
+    headers = [
+        ("x-drop", "1"),
+        ("X-Internal-Trace", "2"),
+        ("x-csrf-token", "3"),
+        ("authorization", "4"),
+    ]
+
+    assert header_filter.filter(headers) == {
+        "x-csrf-token": "<hidden>",
+        "authorization": "4",
+    }
+
+
+def test_later_duplicates_win():
+    headers = [("accept", "a"), ("Accept", "b")]
+
+    assert HeaderFilter().filter(headers) == {"accept": "b"}
+
+
+def test_decision_cache_is_bounded():
+    header_filter = HeaderFilter()
+    header_filter.max_cache_size = 2
+    header_filter.filter([(f"x-{index}", "1") for index in range(5)])
+
+    assert len(header_filter._cache) == 2
+    header_filter.clear()
+    assert not header_filter._cache
@@ -0,0 +1,102 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+
+from fastapi_and_logging.http_clients import HTTPXLogger
+from fastapi_and_logging.http_clients.httpx import (
+    HTTPXAsyncClient,
+    HTTPXClient,
+)
+
+BODY = b"0123456789" * 100
+
+
+def chunks():
+    for index in range(0, len(BODY), 100):
+        yield BODY[index : index + 100]
+
+
+async def async_chunks():
+    for chunk in chunks():
+        yield chunk
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/stream":
+        return httpx.Response(200, content=chunks())
+    if request.url.path == "/async-stream":
+        return httpx.Response(200, content=async_chunks())
+    if request.url.path == "/gzip":
+        return httpx.Response(
+            200,
+            content=gzip.compress(BODY),
+            headers={"content-encoding": "gzip"},
+        )
+    return httpx.Response(200, content=BODY)
+
+
+@pytest.fixture
+def records(log_path, monkeypatch):
+    # HTTPXLogger replaces the httpx client classes; put them back after.
+    monkeypatch.setattr(httpx, "Client", httpx.Client)
+    monkeypatch.setattr(httpx, "AsyncClient", httpx.AsyncClient)
+    records = []
+    HTTPXLogger(
+        log_path=log_path,
+        response_max_len=15,
+        response_hook=lambda response, data: records.append(data),
+    )
+    return records
+
+
+def test_streamed_response_is_logged_when_closed(records):
+    client = HTTPXClient(transport=httpx.MockTransport(handler))
+    with client.stream("GET", "http://upstream/stream") as response:
+        received = response.iter_bytes()
+        body = next(received)
+        assert records == []
+        body += b"".join(received)
+
+    (record,) = records
+    assert body == BODY
+    assert record["response_size"] == len(BODY)
+    assert len(record["response_data"]) <= 15
+    assert "0123456789" in record["response_data"]
+
+
+def test_read_response_is_logged_once(records, log_path, read_log):
+    with HTTPXClient(transport=httpx.MockTransport(handler)) as client:
+        response = client.get("http://upstream/items")
+        response.read()
+
+    assert response.content == BODY
+    (record,) = read_log(log_path)
+    assert record["status_code"] == 200
+    assert record["response_size"] == len(BODY)
+
+
+def test_gzip_head_is_decoded(records):
+    with HTTPXClient(transport=httpx.MockTransport(handler)) as client:
+        client.get("http://upstream/gzip")
+
+    (record,) = records
+    assert "0123456789" in record["response_data"]
+
+
+def test_async_stream_is_logged_when_closed(records):
+    async def fetch() -> bytes:
+        client = HTTPXAsyncClient(transport=httpx.MockTransport(handler))
+        url = "http://upstream/async-stream"
+        async with client.stream("GET", url) as response:
+            received = response.aiter_bytes()
+            body = await received.__anext__()
+            assert records == []
+            body += b"".join([chunk async for chunk in received])
+        await client.aclose()
+        return body
+
+    assert asyncio.run(fetch()) == BODY
+    (record,) = records
+    assert record["response_size"] == len(BODY)
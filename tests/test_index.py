@@ -0,0 +1,160 @@
+import datetime
+import importlib.util
+import os
+
+import pytest
+
+from fastapi_and_logging.binary import BinarySerializer
+from fastapi_and_logging.enums import LoggerNameEnum
+from fastapi_and_logging.index import INDEX_SUFFIX, LogIndex, query
+from fastapi_and_logging.serializers import JSONSerializer
+
+START = 1_700_000_000.0
+
+requires_msgpack = pytest.mark.skipif(
+    importlib.util.find_spec("msgpack") is None, reason="requires msgpack"
+)
+
+
+def incoming(index: int) -> dict:
+    return {
+        "request_id": f"req-{index % 5}",
+        "path": f"/items/{index}",
+        "status_code": 200,
+        "request_time": START + index * 30,
+    }
+
+
+def write(path, records, binary: bool = False) -> None:
+    serializer = (
+        BinarySerializer(LoggerNameEnum.INCOMING)
+        if binary
+        else JSONSerializer()
+    )
+    with open(path, "ab") as file:
+        for record in records:
+            file.write(serializer.dumps_line(record))
+
+
+@pytest.mark.parametrize(
+    "binary", [False, pytest.param(True, marks=requires_msgpack)]
+)
+def test_find_returns_the_records_of_a_request_id(tmp_path, binary):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(index) for index in range(20)], binary)
+
+    with LogIndex(path) as index:
+        records = index.find("req-3")
+        missing = index.find("req-9")
+
+    assert [record["path"] for record in records] == [
+        "/items/3",
+        "/items/8",
+        "/items/13",
+        "/items/18",
+    ]
+    assert missing == []
+    assert os.path.exists(path + INDEX_SUFFIX)
+
+
+@pytest.mark.parametrize(
+    "binary", [False, pytest.param(True, marks=requires_msgpack)]
+)
+def test_between_returns_records_in_the_window(tmp_path, binary):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(index) for index in range(20)], binary)
+
+    with LogIndex(path) as index:
+        records = list(index.between(START + 60, START + 150))
+
+    assert [record["path"] for record in records] == [
+        "/items/2",
+        "/items/3",
+        "/items/4",
+    ]
+
+
+def test_update_indexes_only_appended_records(tmp_path):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(index) for index in range(10)])
+    assert LogIndex(path).update()["records"] == 10
+
+    write(path, [incoming(index) for index in range(10, 12)])
+    index = LogIndex(path)
+    assert index.update()["records"] == 2
+    assert len(index.find("req-0")) == 3
+    index.close()
+
+
+def test_replaced_log_is_reindexed(tmp_path):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(index) for index in range(10)])
+    LogIndex(path).update()
+
+    os.remove(path)
+    write(path, [incoming(index) for index in range(3)])
+    index = LogIndex(path)
+    assert index.update()["records"] == 3
+    assert [record["path"] for record in index.find("req-1")] == ["/items/1"]
+    index.close()
+
+
+def test_incomplete_last_line_is_indexed_once_complete(tmp_path):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(0)])
+    with open(path, "ab") as file:
+        file.write(b'{"request_id": "req-1"')
+    index = LogIndex(path)
+    assert index.update()["records"] == 1
+
+    with open(path, "ab") as file:
+        file.write(b', "request_time": 1700000030.0}\n')
+    assert index.update()["records"] == 1
+    assert len(index.find("req-1")) == 1
+    index.close()
+
+
+def test_query_joins_the_logs_of_a_request(tmp_path):
+    paths = {
+        LoggerNameEnum.INCOMING: str(tmp_path / "incoming.log"),
+        LoggerNameEnum.APICALL: str(tmp_path / "apicall.log"),
+        LoggerNameEnum.EXCEPTION: str(tmp_path / "exception.log"),
+    }
+    write(paths[LoggerNameEnum.INCOMING], [incoming(0), incoming(1)])
+    write(
+        paths[LoggerNameEnum.APICALL],
+        [
+            {"request_id": "req-0", "url": "http://upstream/a"},
+            {"request_id": "req-1", "url": "http://upstream/b"},
+        ],
+    )
+    error_time = datetime.datetime.fromtimestamp(START + 30)
+    write(
+        paths[LoggerNameEnum.EXCEPTION],
+        [{"request_id": "req-1", "error_time": str(error_time)}],
+    )
+
+    by_id = query(paths, request_id="req-1")
+    by_time = query(paths, since=START + 20, until=START + 40)
+
+    for results in (by_id, by_time):
+        assert [r["path"] for r in results[LoggerNameEnum.INCOMING]] == [
+            "/items/1"
+        ]
+        assert [r["url"] for r in results[LoggerNameEnum.APICALL]] == [
+            "http://upstream/b"
+        ]
+        assert len(results[LoggerNameEnum.EXCEPTION]) == 1
+
+
+def test_query_skips_missing_logs(tmp_path):
+    path = str(tmp_path / "incoming.log")
+    write(path, [incoming(0)])
+
+    results = query(
+        {"incoming": path, "apicall": str(tmp_path / "missing.log")},
+        request_id="req-0",
+    )
+
+    assert len(results["incoming"]) == 1
+    assert results["apicall"] == []
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code: str, missing=()) -> None:
+    """
+    Run ``code`` in a fresh interpreter in which the ``missing`` modules
+    cannot be imported.
+    """
+    setup = "import sys\n" + "".join(
+        f"sys.modules[{name!r}] = None\n" for name in missing
+    )
+    subprocess.run(
+        [sys.executable, "-c", setup + textwrap.dedent(code)],
+        cwd=ROOT,
+        check=True,
+    )
+
+
+def test_package_import_does_not_import_the_frameworks():
+    run(
+        """
+        import fastapi_and_logging
+
+        for name in ("fastapi", "loguru", "httpx", "aiohttp", "user_agents"):
+            assert name not in sys.modules, name
+        assert "BatchWriter" in dir(fastapi_and_logging)
+        fastapi_and_logging.FastAPIIncomingLog
+        assert "fastapi" in sys.modules
+        """
+    )
+
+
+def test_unknown_attribute_raises_attribute_error():
+    run(
+        """
+        import fastapi_and_logging
+
+        try:
+            fastapi_and_logging.missing
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError
+        """
+    )
+
+
+def test_httpx_logger_works_without_aiohttp():
+    run(
+        """
+        from fastapi_and_logging.http_clients import HTTPXLogger
+
+        try:
+            from fastapi_and_logging.http_clients import AioHttpLogger
+        except ImportError:
+            pass
+        else:
+            raise AssertionError
+        """,
+        missing=["aiohttp"],
+    )
+
+
+def test_aiohttp_logger_works_without_httpx():
+    run(
+        """
+        from fastapi_and_logging.http_clients import AioHttpLogger
+        """,
+        missing=["httpx"],
+    )
+
+
+def test_optional_serializers_and_compression_fall_back():
+    run(
+        """
+        from fastapi_and_logging import (
+            BinarySerializer,
+            CompressionEnum,
+            RotationPolicy,
+            SerializerEnum,
+            get_serializer,
+        )
+        from fastapi_and_logging.binary import JSON, decode_payload
+
+        assert get_serializer().name == SerializerEnum.JSON
+        assert decode_payload(JSON, b'[0, 0, {"a": 1}]') == {"a": 1}
+        try:
+            BinarySerializer()
+        except ImportError:
+            pass
+        else:
+            raise AssertionError
+        policy = RotationPolicy(compression=CompressionEnum.AUTO)
+        assert policy.compression == CompressionEnum.GZIP
+        for backend in (SerializerEnum.ORJSON, SerializerEnum.MSGSPEC):
+            try:
+                get_serializer(backend)
+            except ImportError:
+                pass
+            else:
+                raise AssertionError(backend)
+        try:
+            RotationPolicy(compression=CompressionEnum.ZSTD)
+        except ImportError:
+            pass
+        else:
+            raise AssertionError
+        """,
+        missing=["orjson", "msgspec", "msgpack", "zstandard"],
+    )
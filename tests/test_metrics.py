@@ -0,0 +1,43 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def client(log_path):
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app,
+        log_path=log_path,
+        metrics=MetricsRegistry(),
+        metrics_path="/metrics",
+    )
+
+    @app.get("/items")
+    def items():
+        return []
+
+    return TestClient(app)
+
+
+def test_metrics_are_served_to_get_and_head(client):
+    client.get("/items")
+    response = client.get("/metrics")
+    head = client.head("/metrics")
+
+    assert response.status_code == 200
+    assert 'endpoint="items"' in response.text
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == response.headers["content-length"]
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_other_methods_get_405(client, method):
+    response = client.request(method, "/metrics")
+
+    assert response.status_code == 405
+    assert response.headers["allow"] == "GET, HEAD"
@@ -0,0 +1,105 @@
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.fastapi import LoggingRoute
+
+
+def test_unmatched_request_is_logged(log_path, read_log):
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=True)
+
+    response = TestClient(app).get("/missing?page=2")
+    (record,) = read_log(log_path)
+
+    assert response.status_code == 404
+    assert record["status_code"] == 404
+    assert record["endpoint"] is None
+    assert record["path"] == "/missing"
+    assert record["query"] == {"page": "2"}
+    assert record["request_id"]
+
+
+def test_mounted_application_is_logged(log_path, read_log):
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=True)
+    sub_app = FastAPI()
+
+    @sub_app.get("/items")
+    def items():
+        return ["a"]
+
+    app.mount("/sub", sub_app)
+    TestClient(app).get("/sub/items")
+    (record,) = read_log(log_path)
+
+    assert record["status_code"] == 200
+    assert record["endpoint"] == "items"
+    assert record["response"] == ["a"]
+
+
+def test_static_file_is_logged(log_path, read_log, tmp_path):
+    directory = tmp_path / "static"
+    directory.mkdir()
+    (directory / "hello.txt").write_bytes(b"hello world")
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app, log_path=log_path, use_middleware=True, response_max_len=5
+    )
+    app.mount("/static", StaticFiles(directory=str(directory)))
+
+    response = TestClient(app).get("/static/hello.txt")
+    (record,) = read_log(log_path)
+
+    assert response.content == b"hello world"
+    assert record["status_code"] == 200
+    assert record["response"] == "hello"
+    assert record["response_size"] == 11
+
+
+@pytest.mark.parametrize("use_middleware, logged", [(False, 0), (True, 1)])
+def test_routes_declared_before_setup(
+    log_path, read_log, use_middleware, logged
+):
+    app = FastAPI()
+
+    @app.get("/early")
+    def early():
+        return {}
+
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=use_middleware)
+    TestClient(app).get("/early")
+
+    assert len(read_log(log_path)) == logged
+
+
+def test_logging_route_does_not_log_twice(log_path, read_log):
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=True)
+    router = APIRouter(route_class=LoggingRoute)
+
+    @router.get("/items")
+    def items():
+        return []
+
+    app.include_router(router)
+    TestClient(app).get("/items")
+
+    (record,) = read_log(log_path)
+    assert record["endpoint"] == "items"
+
+
+def test_request_state_is_shared_with_the_endpoint(log_path, read_log):
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=True)
+
+    @app.get("/items")
+    def items(request: Request):
+        return {"request_id": request.state.request_id}
+
+    response = TestClient(app).get("/items")
+    (record,) = read_log(log_path)
+
+    assert response.json()["request_id"] == record["request_id"]
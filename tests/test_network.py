@@ -0,0 +1,122 @@
+import json
+import os
+import time
+
+import pytest
+
+from fastapi_and_logging.network import (
+    LogCollector,
+    NetworkWriter,
+    encode_frame,
+    iter_frames,
+)
+
+
+def wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def collector():
+    collector = LogCollector(keep_records=True).start()
+    yield collector
+    collector.stop()
+
+
+def create_writer(port: int, **kwargs) -> NetworkWriter:
+    options = {
+        "batch_size": 10,
+        "flush_interval": 0.01,
+        "retries": 0,
+        "retry_backoff": 0.01,
+        "reconnect_interval": 0.05,
+        "timeout": 1.0,
+        **kwargs,
+    }
+    return NetworkWriter("127.0.0.1", port, **options)
+
+
+@pytest.mark.parametrize("compression_level", [0, 6])
+def test_frames_round_trip(compression_level):
+    lines = [b'{"index": 0}\n', b'{"index": 1}\n']
+    data = encode_frame("incoming", lines, compression_level) * 2
+
+    assert [records for records, _ in iter_frames(data)] == [2, 2]
+
+
+def test_records_are_delivered_per_topic(collector):
+    writer = create_writer(collector.port)
+    incoming = writer.get_topic("incoming")
+    apicall = writer.get_topic("apicall")
+    for index in range(25):
+        incoming.write({"index": index})
+    apicall.write({"url": "http://upstream"})
+    writer.stop()
+
+    assert collector.counts == {"incoming": 25, "apicall": 1}
+    indexes = [
+        json.loads(line)["index"]
+        for topic, line in collector.records
+        if topic == "incoming"
+    ]
+    assert indexes == list(range(25))
+    assert writer.get_stats()["written"] == 26
+
+
+def test_unencodable_record_is_counted_as_failed(collector, capsys):
+    writer = create_writer(collector.port)
+    topic = writer.get_topic("incoming")
+    topic.write({"index": 0})
+    topic.write(lambda: 1 / 0)
+    topic.write({"index": 1})
+    writer.stop()
+
+    assert collector.total == 2
+    assert writer.get_stats()["failed"] == 1
+    assert "ZeroDivisionError" in capsys.readouterr().err
+
+
+def test_records_are_spilled_and_replayed_once(tmp_path):
+    collector = LogCollector(keep_records=True).start()
+    port = collector.port
+    collector.stop()
+    spill_path = str(tmp_path / "spill.bin")
+    writer = create_writer(port, spill_path=spill_path)
+    topic = writer.get_topic("incoming")
+    for index in range(30):
+        topic.write({"index": index})
+    wait_for(lambda: writer.get_stats()["spilled"] == 30)
+    assert os.path.getsize(spill_path) > 0
+
+    collector.start()
+    try:
+        wait_for(lambda: collector.total == 30)
+        writer.stop()
+    finally:
+        collector.stop()
+
+    stats = writer.get_stats()
+    assert stats["written"] == 30
+    assert stats["spill_size"] == 0
+    assert not os.path.exists(spill_path)
+    assert sorted(
+        json.loads(line)["index"] for _, line in collector.records
+    ) == list(range(30))
+
+
+def test_records_over_max_spill_size_are_dropped(tmp_path):
+    collector = LogCollector().start()
+    port = collector.port
+    collector.stop()
+    writer = create_writer(
+        port, spill_path=str(tmp_path / "spill.bin"), max_spill_size=1
+    )
+    writer.get_topic("incoming").write({"index": 0})
+    writer.stop()
+
+    assert writer.get_stats()["dropped"] == 1
+    assert writer.get_stats()["spilled"] == 0
@@ -0,0 +1,154 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.enums import LogTypeEnum
+from fastapi_and_logging.fastapi import LoggingRoute, log_policy
+from fastapi_and_logging.metrics import MetricsRegistry
+from fastapi_and_logging.network import LogCollector, NetworkWriter
+from fastapi_and_logging.writer import BatchWriter
+
+
+def create_app(log_path: str, use_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path, use_middleware=use_middleware)
+    router = APIRouter(
+        route_class=LoggingRoute.with_policy(
+            capture_response_body=False,
+            request_max_len=3,
+            headers=["x-keep"],
+        )
+    )
+
+    @router.post("/items")
+    async def create_item(item: dict):
+        return {"name": "x" * 100}
+
+    @app.get("/health")
+    @log_policy(enabled=False)
+    def health():
+        return "ok"
+
+    app.include_router(router)
+    return app
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_policy_applies_once(log_path, use_middleware, read_log):
+    client = TestClient(create_app(log_path, use_middleware))
+    client.post(
+        "/items",
+        json={"name": "value"},
+        headers={"x-keep": "1", "x-drop": "2"},
+    )
+    client.get("/health")
+
+    (record,) = read_log(log_path)
+    assert record["path"] == "/items"
+    assert record["request"] == '{"n'
+    assert record["response"] == ""
+    assert record["headers"] == {"x-keep": "1"}
+
+
+def test_middleware_logs_unmatched_requests_with_defaults(log_path, read_log):
+    client = TestClient(create_app(log_path, use_middleware=True))
+    client.get("/missing")
+
+    (record,) = read_log(log_path)
+    assert record["status_code"] == 404
+    assert record["response"] == {"detail": "Not Found"}
+
+
+def test_routes_built_before_setup_use_its_configuration(log_path, read_log):
+    app = FastAPI()
+    router = APIRouter(route_class=LoggingRoute)
+
+    @router.post("/items")
+    async def create_item(item: dict):
+        return item
+
+    app.include_router(router)
+    metrics = MetricsRegistry()
+    FastAPIIncomingLog(
+        app, log_path=log_path, request_max_len=3, metrics=metrics
+    )
+    client = TestClient(app)
+    client.post("/items", json={"name": "value"})
+    # A new configuration is picked up by the cached route policy.
+    FastAPIIncomingLog(app, log_path=log_path, request_max_len=5)
+    client.post("/items", json={"name": "value"})
+
+    first, second = read_log(log_path)
+    assert first["request"] == '{"n'
+    assert second["request"] == '{"nam'
+    assert 'endpoint="create_item"' in metrics.render()
+
+
+def test_route_log_path_gets_its_own_file(log_path, read_log, tmp_path):
+    route_log_path = str(tmp_path / "items.log")
+    app = FastAPI()
+    FastAPIIncomingLog(app, log_path=log_path)
+
+    @app.get("/items")
+    @log_policy(log_path=route_log_path)
+    def items():
+        return []
+
+    @app.get("/other")
+    def other():
+        return []
+
+    client = TestClient(app)
+    client.get("/items")
+    client.get("/other")
+
+    (record,) = read_log(route_log_path)
+    assert record["path"] == "/items"
+    assert [record["path"] for record in read_log(log_path)] == ["/other"]
+
+
+def route_with_log_path(router, tmp_path) -> None:
+    @router.get("/items")
+    @log_policy(log_path=str(tmp_path / "items.log"))
+    def items():
+        return []
+
+
+@pytest.mark.parametrize("declared_before_setup", [False, True])
+def test_route_log_path_is_rejected_with_a_writer(
+    log_path, tmp_path, declared_before_setup
+):
+    app = FastAPI()
+    router = APIRouter(route_class=LoggingRoute)
+    writer = BatchWriter(log_path)
+    try:
+        if declared_before_setup:
+            route_with_log_path(app, tmp_path)
+            with pytest.raises(ValueError, match="writer"):
+                FastAPIIncomingLog(app, log_path=log_path, writer=writer)
+        else:
+            FastAPIIncomingLog(app, log_path=log_path, writer=writer)
+            with pytest.raises(ValueError, match="writer"):
+                route_with_log_path(router, tmp_path)
+    finally:
+        writer.stop()
+        LoggingRoute.writer = None
+
+
+def test_route_log_path_is_rejected_for_network_logs(log_path, tmp_path):
+    collector = LogCollector().start()
+    writer = NetworkWriter("127.0.0.1", collector.port, retries=0)
+    app = FastAPI()
+    router = APIRouter(route_class=LoggingRoute)
+    try:
+        FastAPIIncomingLog(
+            app, log_type=LogTypeEnum.NETWORK, writer=writer, log_path=log_path
+        )
+        with pytest.raises(ValueError, match="log_path"):
+            route_with_log_path(router, tmp_path)
+    finally:
+        writer.stop()
+        collector.stop()
+        LoggingRoute.writer = None
+        LoggingRoute.log_type = LogTypeEnum.FILE
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.requests import Request as StarletteRequest
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.fastapi import LoggingRoute, get_request_data
+from fastapi_and_logging.fastapi.capture import RequestBodyCapture
+
+
+def test_request_body_capture_keeps_the_head_and_counts_everything():
+    messages = [
+        {"type": "http.request", "body": b"abc", "more_body": True},
+        {"type": "http.request", "body": b"defgh", "more_body": False},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def read_all(capture):
+        while not capture.complete:
+            await capture()
+
+    capture = RequestBodyCapture(receive, 5)
+    asyncio.run(read_all(capture))
+
+    assert capture.body == b"abcde"
+    assert capture.truncated
+    assert capture.total_length == 8
+
+
+def test_request_body_capture_under_the_limit_is_not_truncated():
+    async def receive():
+        return {"type": "http.request", "body": b"abc"}
+
+    capture = RequestBodyCapture(receive, 5)
+    asyncio.run(capture())
+
+    assert capture.body == b"abc"
+    assert not capture.truncated
+    assert capture.complete
+
+
+def test_zero_max_len_copies_nothing():
+    async def receive():
+        return {"type": "http.request", "body": b"abc"}
+
+    capture = RequestBodyCapture(receive, 0)
+    asyncio.run(capture())
+
+    assert capture.body == b""
+    assert capture.total_length == 3
+
+
+def create_app(log_path: str, use_middleware: bool, **kwargs) -> FastAPI:
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app, log_path=log_path, use_middleware=use_middleware, **kwargs
+    )
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    return app
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+@pytest.mark.parametrize(
+    "content, logged",
+    [
+        (b'{"name": "a"}', {"name": "a"}),
+        (b"plain text", "plain text"),
+        (b"\xff\xfe", "\ufffd\ufffd"),
+        (b"", ""),
+    ],
+)
+def test_request_body_is_decoded(
+    log_path, read_log, use_middleware, content, logged
+):
+    client = TestClient(create_app(log_path, use_middleware))
+    client.post("/upload", content=content)
+
+    (record,) = read_log(log_path)
+    assert record["request"] == logged
+    assert record["request_size"] == len(content)
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_streamed_upload_is_read_by_the_endpoint_and_capped_in_the_log(
+    log_path, read_log, use_middleware
+):
+    client = TestClient(
+        create_app(log_path, use_middleware, request_max_len=8)
+    )
+
+    def chunks():
+        for _ in range(100):
+            yield b'{"a": 1}'
+
+    response = client.post("/upload", content=chunks())
+    (record,) = read_log(log_path)
+
+    assert response.json() == {"size": 800}
+    # A truncated JSON body is kept as text.
+    assert record["request"] == '{"a": 1}'
+    assert record["request_size"] == 800
+
+
+def test_get_request_data_reads_the_body_without_a_capture(monkeypatch):
+    monkeypatch.setattr(LoggingRoute, "request_max_len", 3)
+
+    async def receive():
+        return {"type": "http.request", "body": b'{"name": "a"}'}
+
+    request = StarletteRequest({"type": "http", "headers": []}, receive)
+
+    assert asyncio.run(get_request_data(request)) == '{"n'
@@ -0,0 +1,153 @@
+import time
+import uuid
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging import request_id as request_id_module
+from fastapi_and_logging.enums import RequestIdEnum
+from fastapi_and_logging.request_id import (
+    ULID_ALPHABET,
+    CounterGenerator,
+    MonotonicClock,
+    ULIDGenerator,
+    UUID7Generator,
+    get_header_request_id,
+    get_request_id_builder,
+)
+
+
+def decode_ulid(value: str) -> int:
+    number = 0
+    for character in value:
+        number = number * 32 + ULID_ALPHABET.index(character)
+    return number
+
+
+def test_uuid7_layout():
+    before = time.time_ns() // 1_000_000
+    value = uuid.UUID(UUID7Generator()())
+    after = time.time_ns() // 1_000_000
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert before <= value.int >> 80 <= after
+
+
+def test_ulid_layout():
+    before = time.time_ns() // 1_000_000
+    value = ULIDGenerator()()
+    after = time.time_ns() // 1_000_000
+
+    assert len(value) == 26
+    assert set(value) <= set(ULID_ALPHABET)
+    # 26 characters hold 130 bits; the top two are always zero.
+    assert value[0] in "01234567"
+    assert before <= decode_ulid(value) >> 80 <= after
+
+
+@pytest.mark.parametrize("generator", [UUID7Generator, ULIDGenerator])
+def test_ids_sort_in_creation_order(generator):
+    build = generator()
+    ids = [build() for _ in range(5000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_clock_stays_monotonic_when_time_goes_back(monkeypatch):
+    now = iter([5_000_000_000, 4_000_000_000, 4_000_000_000, 6_000_000_000])
+    monkeypatch.setattr(request_id_module.time, "time_ns", lambda: next(now))
+    clock = MonotonicClock(12)
+    pairs = [clock.next(11) for _ in range(4)]
+
+    assert pairs == sorted(pairs)
+    assert [ms for ms, _ in pairs[:3]] == [5000, 5000, 5000]
+    assert pairs[3][0] == 6000
+
+
+def test_exhausted_sequence_borrows_the_next_millisecond(monkeypatch):
+    monkeypatch.setattr(request_id_module.time, "time_ns", lambda: 10**9)
+    clock = MonotonicClock(2)
+    pairs = [clock.next(1) for _ in range(10)]
+
+    assert pairs == sorted(pairs)
+    assert len(set(pairs)) == 10
+    assert pairs[-1][0] > 1000
+
+
+def test_counter_ids_and_reset():
+    generator = CounterGenerator()
+    prefix = generator.prefix
+
+    assert [generator(), generator()] == [f"{prefix}-1", f"{prefix}-2"]
+    generator.reset()
+    assert generator.prefix != prefix
+    assert generator() == f"{generator.prefix}-1"
+
+
+def test_builders_are_picked_by_strategy():
+    assert isinstance(get_request_id_builder("ulid"), ULIDGenerator)
+    assert isinstance(
+        get_request_id_builder(RequestIdEnum.UUID7), UUID7Generator
+    )
+    with pytest.raises(ValueError):
+        get_request_id_builder("sequential")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (b"abc-123", "abc-123"),
+        (b"trace:1/2+3=@.x_y", "trace:1/2+3=@.x_y"),
+        (b"a" * 128, "a" * 128),
+        (b"a" * 129, None),
+        (b"", None),
+        (b"has space", None),
+        (b"line\nbreak", None),
+        (b'"quoted"', None),
+    ],
+)
+def test_header_request_id_validation(value, expected):
+    headers = [(b"accept", b"*/*"), (b"x-request-id", value)]
+
+    assert get_header_request_id(headers, b"x-request-id") == expected
+
+
+def test_missing_header_gives_none():
+    assert (
+        get_header_request_id([(b"accept", b"*/*")], b"x-request-id") is None
+    )
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_incoming_request_id_is_reused_when_valid(
+    log_path, read_log, use_middleware
+):
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app,
+        log_path=log_path,
+        request_id_strategy=RequestIdEnum.ULID,
+        request_id_from_header="X-Request-ID",
+        use_middleware=use_middleware,
+    )
+
+    @app.get("/items")
+    def items(request: Request):
+        return request.state.request_id
+
+    client = TestClient(app)
+    reused = client.get("/items", headers={"x-request-id": "upstream-1"})
+    rejected = client.get("/items", headers={"x-request-id": "bad id"})
+    built = client.get("/items")
+
+    assert reused.json() == "upstream-1"
+    assert len(rejected.json()) == len(built.json()) == 26
+    assert [record["request_id"] for record in read_log(log_path)] == [
+        reused.json(),
+        rejected.json(),
+        built.json(),
+    ]
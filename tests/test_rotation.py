@@ -0,0 +1,189 @@
+import gzip
+import os
+import time
+
+from fastapi_and_logging.enums import CompressionEnum
+from fastapi_and_logging.rotation import (
+    Compressor,
+    RotationPolicy,
+    apply_retention,
+    compress,
+    compressor,
+    find_rotated,
+    get_rotated_path,
+)
+from fastapi_and_logging.writer import BatchWriter
+
+
+def touch(path, content: bytes = b"", mtime: float = None) -> str:
+    with open(path, "wb") as file:
+        file.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_rotated_path_has_the_rotation_time_and_is_unique(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    rotated_at = time.mktime((2026, 10, 18, 11, 58, 44, 0, 0, -1))
+
+    first = get_rotated_path(file_path, rotated_at)
+    assert os.path.basename(first) == "incoming.20261018T115844000000.log"
+    touch(first + ".gz")
+    second = get_rotated_path(file_path, rotated_at)
+    assert os.path.basename(second) == ("incoming.20261018T115844000000-1.log")
+
+
+def test_find_rotated_lists_only_rotated_files_oldest_first(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    touch(file_path)
+    newer = touch(tmp_path / "incoming.20261018T120000000000.log.gz")
+    older = touch(tmp_path / "incoming.20261018T110000000000.log")
+    touch(tmp_path / "incoming.log.idx")
+    touch(tmp_path / "apicall.20261018T110000000000.log")
+
+    assert find_rotated(file_path) == [older, newer]
+
+
+def test_find_rotated_orders_collisions_by_number(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    stamp = "incoming.20261018T110000000000"
+    names = [f"{stamp}-10.log", f"{stamp}-2.log.gz", f"{stamp}.log"]
+    names += [f"{stamp}-1.log", "incoming.20261018T100000000000-3.log"]
+    for name in names:
+        touch(tmp_path / name)
+
+    assert [os.path.basename(path) for path in find_rotated(file_path)] == [
+        "incoming.20261018T100000000000-3.log",
+        f"{stamp}.log",
+        f"{stamp}-1.log",
+        f"{stamp}-2.log.gz",
+        f"{stamp}-10.log",
+    ]
+
+
+def test_rotator_rotates_on_size_and_interval():
+    rotator = RotationPolicy(max_bytes=100).create_rotator()
+    assert not rotator.should_rotate(99)
+    assert rotator.should_rotate(100)
+
+    rotator = RotationPolicy(interval=60).create_rotator()
+    assert not rotator.should_rotate(10)
+    rotator.rollover_at = time.time() - 1
+    assert rotator.should_rotate(10)
+    # An empty file is not rotated, but the next rollover is scheduled.
+    rotator.rollover_at = time.time() - 1
+    assert not rotator.should_rotate(0)
+    assert rotator.rollover_at > time.time()
+
+
+def test_retention_keeps_max_files(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    paths = [
+        touch(tmp_path / f"incoming.20261018T1{index}0000000000.log")
+        for index in range(4)
+    ]
+
+    apply_retention(file_path, RotationPolicy(max_files=2))
+
+    assert find_rotated(file_path) == paths[2:]
+
+
+def test_retention_removes_files_older_than_max_age(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    old = touch(
+        tmp_path / "incoming.20261018T100000000000.log",
+        mtime=time.time() - 3600,
+    )
+    new = touch(tmp_path / "incoming.20261018T110000000000.log")
+
+    apply_retention(file_path, RotationPolicy(max_age=60))
+
+    assert not os.path.exists(old)
+    assert find_rotated(file_path) == [new]
+
+
+def test_compress_gzip_replaces_the_file(tmp_path):
+    path = touch(tmp_path / "incoming.20261018T100000000000.log", b"x" * 100)
+
+    target = compress(path, CompressionEnum.GZIP)
+
+    assert target == path + ".gz"
+    assert not os.path.exists(path)
+    with gzip.open(target) as file:
+        assert file.read() == b"x" * 100
+
+
+def test_batch_writer_rotates_and_compresses(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    writer = BatchWriter(
+        file_path,
+        batch_size=1,
+        flush_interval=0.01,
+        rotation=RotationPolicy(
+            max_bytes=10,
+            max_files=2,
+            compression=CompressionEnum.GZIP,
+        ),
+    )
+    # One record per batch; every second record fills a file.
+    for index in range(7):
+        writer.write(b"%d-record\n" % index)
+    writer.stop()
+    compressor.stop()
+
+    rotated = find_rotated(file_path)
+    assert len(rotated) == 2
+    assert all(path.endswith(".gz") for path in rotated)
+    with gzip.open(rotated[0]) as file:
+        assert file.read() == b"2-record\n3-record\n"
+    with gzip.open(rotated[1]) as file:
+        assert file.read() == b"4-record\n5-record\n"
+    with open(file_path, "rb") as file:
+        assert file.read() == b"6-record\n"
+
+
+def test_failed_rename_keeps_the_writer_running(tmp_path, monkeypatch, capsys):
+    file_path = str(tmp_path / "incoming.log")
+    rename = os.rename
+    calls = []
+
+    def failing_rename(source, target):
+        calls.append(target)
+        if len(calls) == 1:
+            raise PermissionError("file is locked")
+        rename(source, target)
+
+    monkeypatch.setattr(os, "rename", failing_rename)
+    writer = BatchWriter(
+        file_path,
+        batch_size=1,
+        flush_interval=0.01,
+        rotation=RotationPolicy(max_bytes=10),
+    )
+    for index in range(3):
+        writer.write(b"%d-record\n" % index)
+    writer.stop()
+    compressor.stop()
+
+    assert writer.get_stats()["written"] == 3
+    assert "file is locked" in capsys.readouterr().err
+    # The rotation is tried again after the next batch.
+    (rotated,) = find_rotated(file_path)
+    with open(rotated, "rb") as file:
+        assert file.read() == b"0-record\n1-record\n2-record\n"
+    assert os.path.getsize(file_path) == 0
+
+
+def test_compressor_counts_failures(tmp_path, capsys):
+    file_path = str(tmp_path / "incoming.log")
+    policy = RotationPolicy(compression=CompressionEnum.GZIP)
+    rotated = touch(tmp_path / "incoming.20261018T110000000000.log", b"x")
+    worker = Compressor()
+    worker.submit(policy, file_path, rotated)
+    worker.submit(policy, file_path, str(tmp_path / "missing.log"))
+    worker.stop()
+
+    assert worker.get_stats() == {"processed": 1, "failed": 1, "queued": 0}
+    assert "missing.log" in capsys.readouterr().err
+    assert find_rotated(file_path) == [rotated + ".gz"]
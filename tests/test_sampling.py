@@ -0,0 +1,75 @@
+from fastapi_and_logging import sampling
+from fastapi_and_logging.sampling import SamplingPolicy, TokenBucket
+
+
+def rewind(bucket: TokenBucket, seconds: float) -> None:
+    bucket.updated_at -= seconds
+
+
+def test_token_bucket_allows_a_burst_then_refills():
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+    rewind(bucket, 0.5)
+    assert bucket.acquire()
+    assert not bucket.acquire()
+    rewind(bucket, 10)
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_bucket_capacity_defaults_to_rate():
+    assert TokenBucket(rate=5).capacity == 5
+    assert TokenBucket(rate=0.5).capacity == 1
+
+
+def test_rate_zero_drops_and_rate_one_keeps():
+    assert not SamplingPolicy(rate=0).should_log("route", 200, 1.0)
+    assert SamplingPolicy(rate=1).should_log("route", 200, 1.0)
+
+
+def test_rate_is_applied_with_random(monkeypatch):
+    policy = SamplingPolicy(rate=0.25)
+    monkeypatch.setattr(sampling.random, "random", lambda: 0.2)
+    assert policy.should_log("route")
+    monkeypatch.setattr(sampling.random, "random", lambda: 0.3)
+    assert not policy.should_log("route")
+
+
+def test_errors_and_slow_requests_are_always_kept():
+    policy = SamplingPolicy(rate=0, slow_threshold=100)
+
+    assert policy.should_log("route", 500, 1.0)
+    assert policy.should_log("route", 200, 150.0)
+    assert not policy.should_log("route", 404, 1.0)
+
+
+def test_endpoint_rates_override_rate():
+    policy = SamplingPolicy(rate=0, endpoint_rates={"health": 1})
+
+    assert policy.should_log("health", 200)
+    assert not policy.should_log("items", 200)
+
+
+def test_rate_limit_uses_one_bucket_per_key():
+    policy = SamplingPolicy(rate_limit=1, burst=2)
+
+    assert [policy.should_log("a") for _ in range(3)] == [True, True, False]
+    assert policy.should_log("b")
+    rewind(policy._buckets["a"], 1)
+    assert policy.should_log("a")
+
+
+def test_stats_count_decisions_per_key():
+    policy = SamplingPolicy(rate=0, endpoint_rates={"health": 1})
+    policy.should_log("health")
+    policy.should_log("items")
+    policy.should_log("items")
+
+    assert policy.get_stats() == {
+        "sampled_in": 1,
+        "sampled_out": 2,
+        "keys": {
+            "health": {"sampled_in": 1, "sampled_out": 0},
+            "items": {"sampled_in": 0, "sampled_out": 2},
+        },
+    }
@@ -0,0 +1,73 @@
+import json
+import uuid
+
+import pytest
+
+from fastapi_and_logging.enums import SerializerEnum
+from fastapi_and_logging.serializers import (
+    JSONSerializer,
+    get_serializer,
+    msgspec,
+    orjson,
+)
+
+
+class Custom:
+    def __str__(self) -> str:
+        return "custom"
+
+
+RECORD = {
+    "request_id": "abc",
+    "status_code": 200,
+    "duration": 1.25,
+    "cached": False,
+    "missing": None,
+    "query": {"page": "1"},
+    "items": [1, "two", 3.0],
+    "unicode": "héllo ✓",
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "custom": Custom(),
+    1: "integer key",
+    "big": 2**70,
+}
+
+
+def get_backends() -> list:
+    backends = [SerializerEnum.JSON]
+    if orjson is not None:
+        backends.append(SerializerEnum.ORJSON)
+    if msgspec is not None:
+        backends.append(SerializerEnum.MSGSPEC)
+    return backends
+
+
+@pytest.mark.parametrize("backend", get_backends())
+def test_backends_produce_the_same_record(backend):
+    expected = json.loads(JSONSerializer().dumps(RECORD))
+    serializer = get_serializer(backend)
+
+    assert serializer.name == backend
+    assert json.loads(serializer.dumps(RECORD)) == expected
+
+
+@pytest.mark.parametrize("backend", get_backends())
+def test_dumps_line_appends_one_newline(backend):
+    line = get_serializer(backend).dumps_line(RECORD)
+
+    assert line.endswith(b"\n")
+    assert line.count(b"\n") == 1
+    assert json.loads(line) == json.loads(JSONSerializer().dumps(RECORD))
+
+
+def test_auto_prefers_orjson():
+    serializer = get_serializer()
+
+    if orjson is not None:
+        assert serializer.name == SerializerEnum.ORJSON
+    else:
+        assert serializer.name != SerializerEnum.ORJSON
+
+
+def test_json_serializer_keeps_non_ascii():
+    assert JSONSerializer().dumps({"name": "✓"}) == ('{"name": "✓"}'.encode())
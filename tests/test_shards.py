@@ -0,0 +1,140 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+from fastapi_and_logging.binary import BinarySerializer, read_records
+from fastapi_and_logging.shards import (
+    find_shards,
+    get_shard_path,
+    merge_shards,
+)
+from fastapi_and_logging.writer import BatchWriter
+
+requires_msgpack = pytest.mark.skipif(
+    importlib.util.find_spec("msgpack") is None, reason="requires msgpack"
+)
+
+
+def write_shard(file_path: str, pid: int, records, binary=False) -> str:
+    path = get_shard_path(file_path, pid)
+    serializer = BinarySerializer() if binary else None
+    with open(path, "ab") as file:
+        for record in records:
+            if serializer is not None:
+                file.write(serializer.dumps_line(record))
+            else:
+                file.write(json.dumps(record).encode() + b"\n")
+    return path
+
+
+def test_shard_paths(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    second = write_shard(file_path, 20, [])
+    first = write_shard(file_path, 3, [])
+    (tmp_path / "incoming.log.idx").touch()
+    (tmp_path / "incoming.abc.log").touch()
+
+    assert os.path.basename(first) == "incoming.3.log"
+    assert find_shards(file_path) == {3: first, 20: second}
+
+
+def test_batch_writer_writes_its_own_shard(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    writer = BatchWriter(file_path, shard_by_pid=True)
+    writer.write({"index": 0})
+    writer.stop()
+
+    assert find_shards(file_path) == {
+        os.getpid(): get_shard_path(file_path, os.getpid())
+    }
+
+
+def test_merge_appends_shards_and_removes_them(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    write_shard(file_path, 1, [{"index": 0}, {"index": 1}])
+    write_shard(file_path, 2, [{"index": 2}])
+
+    stats = merge_shards(file_path, include_live=True, remove=True)
+
+    assert stats == {"shards": 2, "records": 3, "torn": 0, "incomplete": []}
+    assert [record["index"] for record in read_records(file_path)] == [
+        0,
+        1,
+        2,
+    ]
+    assert find_shards(file_path) == {}
+
+
+def test_merge_by_sort_key(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    write_shard(file_path, 1, [{"time": 1}, {"time": 4}])
+    write_shard(file_path, 2, [{"time": 2}, {"time": 3}])
+
+    merge_shards(file_path, sort_key="time", include_live=True)
+
+    assert [record["time"] for record in read_records(file_path)] == [
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_shards_of_running_processes_are_skipped(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    live = write_shard(file_path, os.getpid(), [{"index": 0}])
+
+    stats = merge_shards(file_path, remove=True)
+
+    assert stats["shards"] == 0
+    assert os.path.exists(live)
+
+
+def test_torn_shard_is_kept(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    torn = write_shard(file_path, 1, [{"index": 0}])
+    with open(torn, "ab") as file:
+        file.write(b'{"index": ')
+    write_shard(file_path, 2, [{"index": 1}])
+
+    stats = merge_shards(file_path, include_live=True, remove=True)
+
+    assert stats["records"] == 2
+    assert stats["torn"] == 1
+    assert stats["incomplete"] == [torn]
+    assert find_shards(file_path) == {1: torn}
+
+
+@requires_msgpack
+def test_binary_shards_are_merged_frame_by_frame(tmp_path):
+    file_path = str(tmp_path / "incoming.bin")
+    write_shard(file_path, 1, [{"time": 1}, {"time": 3}], binary=True)
+    torn = write_shard(file_path, 2, [{"time": 2}], binary=True)
+    with open(torn, "ab") as file:
+        file.write(BinarySerializer().dumps({"time": 4})[:-2])
+
+    stats = merge_shards(
+        file_path, sort_key="time", include_live=True, remove=True
+    )
+
+    assert stats["records"] == 3
+    assert stats["incomplete"] == [torn]
+    assert [record["time"] for record in read_records(file_path)] == [
+        1,
+        2,
+        3,
+    ]
+
+
+@requires_msgpack
+def test_mixed_formats_are_refused(tmp_path):
+    file_path = str(tmp_path / "incoming.log")
+    json_shard = write_shard(file_path, 1, [{"index": 0}])
+    binary_shard = write_shard(file_path, 2, [{"index": 1}], binary=True)
+
+    with pytest.raises(ValueError):
+        merge_shards(file_path, include_live=True, remove=True)
+    assert os.path.exists(json_shard)
+    assert os.path.exists(binary_shard)
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from fastapi_and_logging import sink_manager
+from fastapi_and_logging.enums import LoggerNameEnum, LogTypeEnum
+from fastapi_and_logging.logging import (
+    get_apicall_logger,
+    get_incoming_logger,
+    incoming_formatter,
+)
+from fastapi_and_logging.writer import BatchWriter
+
+
+def test_sink_is_added_once_per_key(log_path, read_log):
+    handlers = len(sink_manager._handlers)
+    for index in range(20):
+        get_incoming_logger(file_path=log_path, extra_data={"index": index})
+
+    assert len(sink_manager._handlers) == handlers + 1
+    handler_id = sink_manager.register(LoggerNameEnum.INCOMING, log_path)
+    assert sink_manager.register(LoggerNameEnum.INCOMING, log_path) == (
+        handler_id
+    )
+    assert [record["index"] for record in read_log(log_path)] == list(
+        range(20)
+    )
+
+
+def test_records_are_routed_by_name_and_path(tmp_path, log_path, read_log):
+    apicall_path = str(tmp_path / "apicall.log")
+    other_path = str(tmp_path / "other.log")
+    get_incoming_logger(file_path=log_path, extra_data={"to": "incoming"})
+    get_incoming_logger(file_path=other_path, extra_data={"to": "other"})
+    get_apicall_logger(file_path=apicall_path, extra_data={"to": "apicall"})
+    sink_manager.remove_all()
+
+    assert read_log(log_path) == [{"to": "incoming"}]
+    assert read_log(other_path) == [{"to": "other"}]
+    assert read_log(apicall_path) == [{"to": "apicall"}]
+
+
+def test_writer_sink_receives_the_records(log_path):
+    writer = BatchWriter(log_path, flush_interval=0.01)
+    sink_manager.register(
+        LoggerNameEnum.INCOMING,
+        file_path=log_path,
+        writer=writer,
+        format=incoming_formatter,
+    )
+    get_incoming_logger(file_path=log_path, extra_data={"index": 0})
+    writer.stop()
+
+    assert sink_manager.get_writer(LoggerNameEnum.INCOMING, log_path) is (
+        writer
+    )
+    with open(log_path) as file:
+        assert [json.loads(line) for line in file] == [{"index": 0}]
+
+
+def test_removed_sink_is_added_again(log_path, read_log):
+    get_incoming_logger(file_path=log_path, extra_data={"index": 0})
+    sink_manager.remove(LoggerNameEnum.INCOMING, log_path, LogTypeEnum.FILE)
+    key = sink_manager.get_key(
+        LoggerNameEnum.INCOMING, log_path, LogTypeEnum.FILE
+    )
+    assert key not in sink_manager._handlers
+
+    get_incoming_logger(file_path=log_path, extra_data={"index": 1})
+    assert [record["index"] for record in read_log(log_path)] == [0, 1]
+
+
+def test_console_sinks_ignore_the_path():
+    assert sink_manager.get_key(
+        LoggerNameEnum.INCOMING, "a.log", LogTypeEnum.CONSOLE
+    ) == sink_manager.get_key(
+        LoggerNameEnum.INCOMING, "b.log", LogTypeEnum.CONSOLE
+    )
+
+
+def test_network_sink_needs_a_writer(log_path):
+    with pytest.raises(ValueError, match="NetworkWriter"):
+        sink_manager.register(
+            LoggerNameEnum.INCOMING, log_path, LogTypeEnum.NETWORK
+        )
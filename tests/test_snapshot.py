@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import State
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.fastapi import RequestSnapshot
+from fastapi_and_logging.fastapi.capture import RequestBodyCapture
+
+
+async def read_body(request) -> str:
+    return (await request.body()).decode()
+
+
+@pytest.mark.parametrize("use_middleware", [False, True])
+def test_custom_get_request_data_reads_the_captured_body(
+    log_path, use_middleware, read_log
+):
+    app = FastAPI()
+    FastAPIIncomingLog(
+        app,
+        log_path=log_path,
+        get_request_data=read_body,
+        use_middleware=use_middleware,
+    )
+
+    @app.post("/items")
+    async def items(request: Request):
+        return {"size": len(await request.body())}
+
+    response = TestClient(app).post("/items", content=b'{"name": "a"}')
+    (record,) = read_log(log_path)
+
+    assert response.json() == {"size": 13}
+    assert record["request"] == '{"name": "a"}'
+
+
+def test_snapshot_body_falls_back_to_the_capture():
+    async def receive():
+        return {"type": "http.request", "body": b"0123456789"}
+
+    state = State()
+    state.body_capture = RequestBodyCapture(receive, 4)
+    asyncio.run(state.body_capture())
+    scope = {"type": "http", "headers": [], "query_string": b""}
+
+    assert asyncio.run(RequestSnapshot(scope, state).body()) == b"0123"
+    assert asyncio.run(RequestSnapshot(scope, State()).body()) == b""
+    assert asyncio.run(RequestSnapshot(scope, state, b"raw").body()) == b"raw"
+
+
+def test_snapshot_decodes_headers_and_query_params_lazily():
+    scope = {
+        "type": "http",
+        "headers": [(b"user-agent", b"test")],
+        "query_string": b"page=2",
+    }
+    snapshot = RequestSnapshot(scope, State())
+
+    assert snapshot._headers is None
+    assert snapshot.headers["user-agent"] == "test"
+    assert snapshot.query_params["page"] == "2"
+    assert snapshot.headers is snapshot.headers
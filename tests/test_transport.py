@@ -0,0 +1,108 @@
+import asyncio
+import http.server
+import threading
+
+import httpx
+import pytest
+
+from fastapi_and_logging.http_clients import (
+    AsyncLoggingTransport,
+    HTTPXLogger,
+    LoggingTransport,
+)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/items"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def instrument(log_path):
+    def instrument(**kwargs):
+        HTTPXLogger(log_path=log_path, instrument_transport=True, **kwargs)
+
+    yield instrument
+    HTTPXLogger.uninstrument_transport()
+
+
+def test_logging_transport_records_phases_and_reuse(url, log_path, read_log):
+    with httpx.Client(transport=LoggingTransport(log_path=log_path)) as client:
+        client.get(url)
+        client.get(url)
+
+    first, second = read_log(log_path)
+    assert first["connection_reused"] is False
+    assert set(first["timings"]) == {"connect", "wait"}
+    assert second["connection_reused"] is True
+    assert set(second["timings"]) == {"wait"}
+    assert all(value >= 0 for value in first["timings"].values())
+    assert first["status_code"] == 200
+    assert '{"ok": true}' in first["response_data"]
+    assert first["response_size"] == 12
+
+
+def test_async_logging_transport(url, log_path, read_log):
+    async def send():
+        transport = AsyncLoggingTransport(log_path=log_path)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(url)
+
+    asyncio.run(send())
+
+    (record,) = read_log(log_path)
+    assert record["connection_reused"] is False
+    assert "wait" in record["timings"]
+
+
+def test_instrumenting_twice_logs_each_request_once(
+    url, log_path, read_log, instrument
+):
+    instrument()
+    instrument()
+    with httpx.Client() as client:
+        client.get(url)
+
+    async def send():
+        async with httpx.AsyncClient() as client:
+            await client.get(url)
+
+    asyncio.run(send())
+
+    assert len(read_log(log_path)) == 2
+
+
+def test_uninstrument_restores_the_transports(url, log_path, instrument):
+    handle_request = vars(httpx.HTTPTransport)["handle_request"]
+    handle_async_request = vars(httpx.AsyncHTTPTransport)[
+        "handle_async_request"
+    ]
+    instrument()
+    assert vars(httpx.HTTPTransport)["handle_request"] is not handle_request
+    HTTPXLogger.uninstrument_transport()
+
+    assert vars(httpx.HTTPTransport)["handle_request"] is handle_request
+    assert (
+        vars(httpx.AsyncHTTPTransport)["handle_async_request"]
+        is handle_async_request
+    )
@@ -0,0 +1,108 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_and_logging import FastAPIIncomingLog
+from fastapi_and_logging.fastapi.user_agent import UserAgentCache
+
+FIREFOX = (
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:120.0) "
+    "Gecko/20100101 Firefox/120.0"
+)
+CHROME = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+CURL = "curl/8.4.0"
+
+
+def test_repeated_user_agents_are_hits():
+    cache = UserAgentCache(maxsize=4)
+    first = cache.parse(FIREFOX)
+
+    assert cache.parse(FIREFOX) is first
+    assert first.browser.family == "Firefox"
+    assert cache.get_stats() == {
+        "hits": 1,
+        "misses": 1,
+        "size": 1,
+        "maxsize": 4,
+    }
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserAgentCache(maxsize=2)
+    firefox = cache.parse(FIREFOX)
+    cache.parse(CHROME)
+    # Firefox is used again, so Chrome is the one evicted by curl.
+    cache.parse(FIREFOX)
+    cache.parse(CURL)
+
+    assert cache.parse(FIREFOX) is firefox
+    assert cache.get_stats()["misses"] == 3
+    cache.parse(CHROME)
+    assert cache.get_stats()["misses"] == 4
+    assert cache.get_stats()["size"] == 2
+
+
+def test_zero_maxsize_disables_the_cache():
+    cache = UserAgentCache(maxsize=0)
+    cache.parse(FIREFOX)
+    cache.parse(FIREFOX)
+
+    assert cache.get_stats() == {
+        "hits": 0,
+        "misses": 2,
+        "size": 0,
+        "maxsize": 0,
+    }
+
+
+def test_clear_resets_entries_and_counts():
+    cache = UserAgentCache()
+    cache.parse(FIREFOX)
+    cache.parse(FIREFOX)
+    cache.clear()
+
+    assert cache.get_stats()["hits"] == cache.get_stats()["size"] == 0
+
+
+def test_cache_is_thread_safe():
+    cache = UserAgentCache(maxsize=2)
+    agents = [FIREFOX, CHROME, CURL] * 200
+
+    def parse_all():
+        for agent in agents:
+            cache.parse(agent)
+
+    threads = [threading.Thread(target=parse_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.get_stats()
+    assert stats["hits"] + stats["misses"] == len(agents) * 4
+    assert stats["size"] <= 2
+
+
+def test_incoming_log_uses_the_configured_cache(log_path, read_log):
+    app = FastAPI()
+    incoming_log = FastAPIIncomingLog(
+        app, log_path=log_path, user_agent_cache_size=8
+    )
+
+    @app.get("/items")
+    def items():
+        return []
+
+    client = TestClient(app)
+    for _ in range(3):
+        client.get("/items", headers={"user-agent": FIREFOX})
+    records = read_log(log_path)
+
+    assert incoming_log.user_agent_cache.get_stats()["hits"] == 2
+    assert incoming_log.user_agent_cache.get_stats()["maxsize"] == 8
+    assert records[0]["browser"] == "Firefox:120.0"
+    assert records[0]["os"] == "Ubuntu:"
@@ -0,0 +1,187 @@
+import gc
+import json
+import os
+import threading
+import weakref
+
+import pytest
+
+from fastapi_and_logging.enums import OverflowPolicyEnum
+from fastapi_and_logging.writer import BatchWriter
+
+
+def read_lines(path) -> list:
+    with open(path) as file:
+        return file.read().splitlines()
+
+
+def test_writes_dict_str_bytes_and_callable_records(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(str(path), flush_interval=0.01)
+    writer.write({"index": 0})
+    writer.write('{"index": 1}\n')
+    writer.write(b'{"index": 2}\n')
+    writer.write(lambda: {"index": 3})
+    writer.stop()
+
+    assert [json.loads(line)["index"] for line in read_lines(path)] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+    assert writer.get_stats()["written"] == 4
+
+
+def test_drop_newest_keeps_the_first_records(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(
+        str(path),
+        batch_size=100,
+        flush_interval=60,
+        max_queue_size=3,
+        overflow_policy=OverflowPolicyEnum.DROP_NEWEST,
+    )
+    results = [writer.write({"index": index}) for index in range(5)]
+    writer.stop()
+
+    assert results == [True, True, True, False, False]
+    assert [json.loads(line)["index"] for line in read_lines(path)] == [
+        0,
+        1,
+        2,
+    ]
+    assert writer.get_stats()["dropped"] == 2
+
+
+def test_drop_oldest_keeps_the_last_records(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(
+        str(path),
+        batch_size=100,
+        flush_interval=60,
+        max_queue_size=3,
+        overflow_policy=OverflowPolicyEnum.DROP_OLDEST,
+    )
+    for index in range(5):
+        assert writer.write({"index": index})
+    writer.stop()
+
+    assert [json.loads(line)["index"] for line in read_lines(path)] == [
+        2,
+        3,
+        4,
+    ]
+    assert writer.get_stats()["dropped"] == 2
+
+
+def test_block_waits_for_room_and_loses_nothing(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(
+        str(path),
+        batch_size=2,
+        flush_interval=0.01,
+        max_queue_size=2,
+        overflow_policy=OverflowPolicyEnum.BLOCK,
+    )
+    producer = threading.Thread(
+        target=lambda: [writer.write({"index": i}) for i in range(50)]
+    )
+    producer.start()
+    producer.join(timeout=10)
+    assert not producer.is_alive()
+    writer.stop()
+
+    assert len(read_lines(path)) == 50
+    assert writer.get_stats()["dropped"] == 0
+
+
+def test_block_returns_false_when_stopped_while_waiting(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(
+        str(path),
+        batch_size=10,
+        flush_interval=60,
+        max_queue_size=1,
+        overflow_policy=OverflowPolicyEnum.BLOCK,
+    )
+    writer.write({"index": 0})
+    results = []
+    producer = threading.Thread(
+        target=lambda: results.append(writer.write({"index": 1}))
+    )
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+    writer.stop()
+    producer.join(timeout=10)
+
+    assert results == [False]
+    assert writer.get_stats()["dropped"] == 1
+    assert [json.loads(line)["index"] for line in read_lines(path)] == [0]
+
+
+def test_stopped_writer_is_not_kept_alive(tmp_path):
+    writer = BatchWriter(str(tmp_path / "batch.log"))
+    reference = weakref.ref(writer)
+    writer.stop()
+    del writer
+    gc.collect()
+
+    assert reference() is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_writer_restarts_in_forked_child(tmp_path):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(str(path), flush_interval=0.01)
+    writer.write({"index": 0})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            writer.write({"index": 1})
+            writer.stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    writer.stop()
+
+    assert sorted(json.loads(line)["index"] for line in read_lines(path)) == [
+        0,
+        1,
+    ]
+
+
+def test_write_after_stop_is_dropped(tmp_path):
+    writer = BatchWriter(str(tmp_path / "batch.log"))
+    writer.stop()
+
+    assert writer.write({"index": 0}) is False
+    assert writer.get_stats()["dropped"] == 1
+
+
+def test_failing_record_does_not_stop_the_writer(tmp_path, capsys):
+    path = tmp_path / "batch.log"
+    writer = BatchWriter(
+        str(path),
+        batch_size=2,
+        flush_interval=0.01,
+        max_queue_size=2,
+        overflow_policy=OverflowPolicyEnum.BLOCK,
+    )
+
+    def broken():
+        raise ValueError("cannot build record")
+
+    writer.write({"index": 0})
+    writer.write(broken)
+    for index in range(1, 10):
+        # Would block forever if the worker thread had died.
+        writer.write({"index": index})
+    writer.stop()
+
+    stats = writer.get_stats()
+    assert stats["failed"] == 1
+    assert stats["written"] == 10
+    assert len(read_lines(path)) == 10
+    assert "cannot build record" in capsys.readouterr().err